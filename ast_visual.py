@@ -1,48 +1,90 @@
-from graphviz import Digraph
+import os
 from pllm_parser.pllm_ast import *
+from pllm_parser.ast_visitor import ASTVisitor, walk
 
-class ASTVisualizer:
-    def __init__(self):
-        self.graph = Digraph(format='png')
+def _quote(text):
+    return '"' + str(text).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+
+def _format_position(position):
+    (start_line, start_col), (end_line, end_col) = position
+    return f"@ {start_line}:{start_col} ~ {end_line}:{end_col}"
+
+class DotWriter(ASTVisitor):
+    """
+    流式 DOT 输出：遍历 AST 时直接把节点与边写入 .dot 文件，不在内存中构造图。
+    标量字段与位置并入所属节点的标签，不单独成节点；
+    列表字段不单独成节点，列表元素直接以 "字段名[下标]" 为边标签连到父节点。
+    - max_depth: 超过该深度的子树折叠为一个节点，标注被省略的节点数；
+    - collapse: 这些类名的节点（如 AgentDef、FuncDef）整棵子树折叠为一个节点。
+    format 为 "png" 时 render() 调用 graphviz 把 .dot 渲染为图片（graphviz 仅在此时导入）。
+    """
+    def __init__(self, output_file="output/ast", max_depth=None, collapse=(), format="dot"):
+        super().__init__()
+        self.output_file = output_file
+        self.max_depth = max_depth
+        self.collapse = set(collapse)
+        self.format = format
         self.node_count = 0
+        self.depth = 0
+        self.out = None
+
+    @property
+    def dot_path(self):
+        return self.output_file + ".dot"
 
-    def add_node(self, label):
-        """添加一个节点到图中，并返回节点 ID"""
+    def add_node(self, label, collapsed=False):
+        """写出一个节点，并返回节点 ID"""
         node_id = f"node{self.node_count}"
-        self.graph.node(node_id, label)
         self.node_count += 1
+        style = ' style=dashed' if collapsed else ''
+        self.out.write(f"\t{node_id} [label={_quote(label)}{style}]\n")
         return node_id
 
+    def add_edge(self, parent_id, child_id, label):
+        self.out.write(f"\t{parent_id} -> {child_id} [label={_quote(label)}]\n")
+
     def visualize(self, ast):
-        """将 AST 转换为图形"""
-        if isinstance(ast, ASTNode):
-            # 当前节点
-            label = ast.__class__.__name__
-            node_id = self.add_node(label)
-
-            # 遍历子节点
-            for key, value in ast.__dict__.items():
-                if isinstance(value, (ASTNode, list)):
-                    child_id = self.visualize(value)
-                    self.graph.edge(node_id, child_id, label=key)
-                else:
-                    # 如果是简单值，直接显示
-                    child_id = self.add_node(f"{key}: {value}")
-                    self.graph.edge(node_id, child_id)
-            return node_id
-
-        elif isinstance(ast, list):
-            # 如果是列表，递归处理每个元素
-            list_node_id = self.add_node("List")
-            for item in ast:
-                child_id = self.visualize(item)
-                self.graph.edge(list_node_id, child_id)
-            return list_node_id
-
-        else:
-            # 如果是其他类型（如常量），直接显示
-            return self.add_node(str(ast))
-
-    def render(self, output_file="ast"):
-        """渲染并保存图形"""
-        self.graph.render("output/"+output_file, view=False)
\ No newline at end of file
+        """将 AST 以 DOT 格式写入 dot_path"""
+        os.makedirs(os.path.dirname(self.dot_path) or ".", exist_ok=True)
+        self.node_count = 0
+        self.depth = 0
+        with open(self.dot_path, "w", encoding="utf-8") as self.out:
+            self.out.write("digraph {\n")
+            self.visit(ast)
+            self.out.write("}\n")
+        self.out = None
+
+    def visitASTNode(self, ast):
+        name = ast.__class__.__name__
+        if name in self.collapse or (self.max_depth is not None and self.depth >= self.max_depth):
+            hidden = sum(1 for _ in walk(ast)) - 1
+            if hidden > 0 or name in self.collapse:
+                return self.add_node(f"{name} {_format_position(ast.position)}\n(+{hidden} nodes)", collapsed=True)
+
+        lines = [name]
+        children = []
+        for key in ast._fields:
+            value = getattr(ast, key)
+            if isinstance(value, ASTNode):
+                children.append((key, value))
+            elif isinstance(value, list):
+                children.extend((f"{key}[{i}]", item) for i, item in enumerate(value))
+            elif value != "":
+                lines.append(f"{key}: {value}")
+        lines.append(_format_position(ast.position))
+        node_id = self.add_node("\n".join(lines))
+
+        self.depth += 1
+        for key, child in children:
+            self.add_edge(node_id, self.visit(child), key)
+        self.depth -= 1
+        return node_id
+
+    def _defaultVisitor(self, ast):
+        return self.add_node(str(ast))
+
+    def render(self):
+        """format 为 "png" 时把 .dot 渲染为 PNG"""
+        if self.format == "png":
+            import graphviz
+            graphviz.render("dot", "png", self.dot_path, outfile=self.output_file + ".png")
@@ -0,0 +1,51 @@
+"""
+Measures the memory retained by the AST of a large synthetic PLLM program.
+
+Usage: python -m benchmarks.bench_ast_memory [--blocks 2000]
+"""
+import argparse
+import gc
+import tracemalloc
+from pllm_parser.pllm_lexer import lexer
+from pllm_parser.pllm_parser import parser
+from pllm_parser.ast_visitor import iter_child_nodes
+
+BLOCK = '''x{i} : int = (a + {i}) * 3 - b
+r{i} = {{ name = "n{i}", age = {i}, tags = ["a", "b", "c"] }}
+for e in r{i}.tags:
+    if e == "a":
+        total = total + x{i}
+    else:
+        total = total - 1
+_ = console(int_to_str(x{i}))
+'''
+
+def synthetic_source(blocks: int) -> str:
+    return "a = 1\nb = 2\ntotal = 0\n" + "".join(BLOCK.format(i=i) for i in range(blocks))
+
+def count_nodes(node) -> int:
+    return 1 + sum(count_nodes(child) for child in iter_child_nodes(node))
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Measure AST memory usage.")
+    arg_parser.add_argument("--blocks", type=int, default=2000)
+    args = arg_parser.parse_args()
+
+    source = synthetic_source(args.blocks)
+    # 先解析一次小程序，排除语法表等一次性开销
+    parser.parse("a = 1\n", lexer=lexer)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    lexer.lineno = 1
+    program = parser.parse(source, lexer=lexer)
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    nodes = count_nodes(program)
+    print(f"source: {len(source)} bytes, AST nodes: {nodes}")
+    print(f"retained: {retained / 1024 / 1024:.2f} MiB, {retained / nodes:.0f} bytes/node")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Code generation benchmark on programs with thousands of agents.
+
+Usage: python -m benchmarks.bench_codegen [--agents 1000 2000 4000 8000] [--repeat 3]
+"""
+import argparse
+import time
+from pllm_parser.pllm_parser import parse
+from generate.code_gen import CodeGenerator
+
+AGENT = '''agent a{i}:
+    input:
+        x: str
+    output:
+        y: str
+    model: "gpt-3.5-turbo"
+    n : int = {i}
+    if n > 3:
+        n = n - 1
+    chat: """
+    Rewrite {{x}} with care.
+    answer: ${{y}}
+    """
+'''
+
+CONNECTION = '''    e{i}: str
+        a{i}.output.y -> a{j}.input.x
+'''
+
+def synthetic_source(agents: int) -> str:
+    body = "".join(AGENT.format(i=i) for i in range(agents))
+    connections = "".join(CONNECTION.format(i=i, j=i + 1) for i in range(agents - 1))
+    return body + "connect:\n" + connections
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmark code generation.")
+    arg_parser.add_argument("--agents", type=int, nargs="+", default=[1000, 2000, 4000, 8000])
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    for agents in args.agents:
+        program, _ = parse(synthetic_source(agents))
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            CodeGenerator().generate(program)
+            best = min(best, time.perf_counter() - start)
+        print(f"agents: {agents:>6}  codegen: {best * 1000:9.2f} ms  ({best / agents * 1e6:.1f} us/agent)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Compiler benchmark suite: times each compiler stage on synthetic programs of several shapes
+(see benchmarks/synthetic.py), records the results as JSON and compares them against a baseline
+recorded on an earlier commit.
+
+Usage:
+    python -m benchmarks.bench_compiler --output bench.json
+    python -m benchmarks.bench_compiler --baseline bench.json [--threshold 0.2] [--min_ms 1.0]
+
+With --baseline the run exits with status 1 if any stage of any scenario got slower than the
+baseline by more than --threshold (relative) and --min_ms (absolute, to ignore noise on tiny stages).
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+from benchmarks.synthetic import generate_program
+from compile import compile_source
+from compile_cache import compiler_version
+from timings import Timings
+
+SCENARIOS = {
+    "baseline": {},
+    "many_agents": {"agents": 1000},
+    "wide_fan": {"agents": 200, "fan_in": 8, "fan_out": 4},
+    "deep_nesting": {"statements": 12, "depth": 5},
+    "wide_records": {"record_width": 64},
+    "large_templates": {"template_lines": 200},
+}
+
+# 导入等一次性开销不计入比较
+STAGES = ("lex", "parse", "type check", "code generation")
+
+def run_scenario(params: dict, repeat: int, backend: str) -> dict:
+    source = generate_program(**params)
+    best = {}
+    counts = {}
+    for i in range(repeat):
+        # 第一次运行额外统计计数；计数会给类型检查带来少量开销，因此计时取其余各次
+        timings = Timings(counters=(i == 0))
+        compile_source(source, verbose=False, backend=backend, timings=timings)
+        if i == 0:
+            counts = timings.counts
+            if repeat > 1:
+                continue
+        for phase in timings.phases:
+            if phase["name"] in STAGES:
+                best[phase["name"]] = min(best.get(phase["name"], float("inf")), phase["seconds"])
+    best["total"] = sum(best.values())
+    return {"params": params, "source_bytes": len(source), "stages": best, "counts": counts}
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results: dict, baseline: dict, threshold: float, min_ms: float) -> list:
+    """Returns the (scenario, stage, baseline seconds, current seconds) of every regressed stage."""
+    regressions = []
+    for name, result in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if previous is None or previous.get("params") != result["params"]:
+            continue
+        for stage, seconds in result["stages"].items():
+            old = previous["stages"].get(stage)
+            if old is None:
+                continue
+            if seconds > old * (1 + threshold) and (seconds - old) * 1000 > min_ms:
+                regressions.append((name, stage, old, seconds))
+    return regressions
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmark the compiler stages on synthetic programs.")
+    arg_parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    arg_parser.add_argument("--backend", choices=("text", "ast"), default="text")
+    arg_parser.add_argument("--output", default=None, help="Write the results as JSON to this file.")
+    arg_parser.add_argument("--baseline", default=None, help="JSON results of an earlier run to compare against.")
+    arg_parser.add_argument("--threshold", type=float, default=0.2, help="Relative slowdown counted as a regression.")
+    arg_parser.add_argument("--min_ms", type=float, default=1.0, help="Ignore slowdowns smaller than this many milliseconds.")
+    args = arg_parser.parse_args()
+
+    # 预热：导入各阶段模块并构建语法表
+    compile_source(generate_program(agents=2), verbose=False, backend=args.backend)
+
+    results = {
+        "git_commit": git_commit(),
+        "compiler_version": compiler_version(),
+        "python": platform.python_version(),
+        "repeat": args.repeat,
+        "backend": args.backend,
+        "scenarios": {},
+    }
+    for name in args.scenarios:
+        result = run_scenario(SCENARIOS[name], args.repeat, args.backend)
+        results["scenarios"][name] = result
+        stages = "  ".join(f"{stage}: {seconds * 1000:8.2f} ms" for stage, seconds in result["stages"].items())
+        print(f"{name:<16} {stages}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results have been saved to '{args.output}'.")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold, args.min_ms)
+        for name, stage, old, new in regressions:
+            print(f"REGRESSION {name} / {stage}: {old * 1000:.2f} ms -> {new * 1000:.2f} ms ({(new / old - 1) * 100:+.0f}%)")
+        if regressions:
+            sys.exit(1)
+        print(f"No stage regressed by more than {args.threshold:.0%} against '{args.baseline}'.")
+
+if __name__ == "__main__":
+    main()
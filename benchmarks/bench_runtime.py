@@ -0,0 +1,148 @@
+"""
+Runtime benchmark: runs compiled programs against the in-process mock LLM (pllm_runtime.mock_llm)
+and reports end-to-end makespan, chat throughput and the p50 / p99 / max latency of chat calls.
+
+Programs: the tests/multi_agents.pllm topology and synthetic DAGs (benchmarks/synthetic.py) with
+the given numbers of agents. Programs run in a temporary directory, so file built-ins do not touch
+the working tree.
+
+Usage: python -m benchmarks.bench_runtime [--agents 100 1000] [--fan_in 2] [--runs 5]
+                                          [--latency lognormal:3.9,0.5] [--error_rate 0.0]
+                                          [--rate_limit None] [--hedge 95] [--endpoints 1]
+                                          [--output runtime.json]
+
+With --endpoints N the chat requests are routed (pllm_runtime.routing) across N mock endpoints, each
+with its own rate limit and error rate.
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from benchmarks.synthetic import generate_program
+from compile import compile_source
+from pllm_runtime import (Endpoint, HedgePolicy, Router, close_clients, execute, set_client_factory,
+                          set_hedging, set_router)
+from pllm_runtime.mock_llm import FakeAsyncOpenAI, MockLLM, use_mock_llm
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def percentile(values: list, p: float) -> float:
+    """Nearest-rank percentile; 0 for no values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))]
+
+def load_program(source: str) -> dict:
+    """Compiles a PLLM program and returns its module namespace without running its connect block."""
+    code, parse_errors, _, _ = compile_source(source, verbose=False)
+    if parse_errors:
+        raise ValueError(f"Program does not parse: {parse_errors[0]['message']}")
+    namespace = {"__name__": "pllm_bench"}
+    exec(compile(code, "<bench>", "exec"), namespace)
+    return namespace
+
+async def run_program(namespace: dict, runs: int) -> dict:
+    chat_latencies = []
+    chat = namespace["chat"]
+
+    async def timed_chat(*args):
+        start = time.perf_counter()
+        try:
+            return await chat(*args)
+        finally:
+            chat_latencies.append(time.perf_counter() - start)
+
+    namespace["chat"] = timed_chat
+    makespans = []
+    start = time.perf_counter()
+    for _ in range(runs):
+        run_start = time.perf_counter()
+        await execute(namespace["graph"], namespace["param_mapping"], namespace)
+        makespans.append(time.perf_counter() - run_start)
+    elapsed = time.perf_counter() - start
+    namespace["chat"] = chat
+    await close_clients()
+    return {
+        "runs": runs,
+        "agents": len(namespace["graph"]),
+        "chat_calls": len(chat_latencies),
+        "throughput_calls_per_s": len(chat_latencies) / elapsed if elapsed else 0.0,
+        "makespan_p50_ms": percentile(makespans, 50) * 1000,
+        "makespan_max_ms": max(makespans) * 1000,
+        "chat_p50_ms": percentile(chat_latencies, 50) * 1000,
+        "chat_p99_ms": percentile(chat_latencies, 99) * 1000,
+        "chat_max_ms": max(chat_latencies, default=0.0) * 1000,
+    }
+
+def install_mocks(args) -> list:
+    """Makes the runtime use fresh mock endpoints; returns their MockLLMs."""
+    if args.endpoints <= 1:
+        set_router(None)
+        return [use_mock_llm(MockLLM(args.latency, args.rate_limit, args.error_rate, seed=args.seed))]
+    mocks = {f"mock://{i}": MockLLM(args.latency, args.rate_limit, args.error_rate, seed=args.seed + i)
+             for i in range(args.endpoints)}
+    set_client_factory(lambda base_url, api_key: FakeAsyncOpenAI(mocks[base_url], base_url, api_key))
+    set_router(Router({"*": [Endpoint(base_url, "mock") for base_url in mocks]}, strategy=args.routing))
+    return list(mocks.values())
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmark the runtime against the mock LLM.")
+    arg_parser.add_argument("--agents", type=int, nargs="+", default=[100, 1000], help="Sizes of the synthetic DAGs.")
+    arg_parser.add_argument("--fan_in", type=int, default=2)
+    arg_parser.add_argument("--runs", type=int, default=5)
+    arg_parser.add_argument("--latency", default="lognormal:3.9,0.5", help="Mock latency distribution in ms (see mock_llm.parse_latency).")
+    arg_parser.add_argument("--error_rate", type=float, default=0.0)
+    arg_parser.add_argument("--rate_limit", type=float, default=None)
+    arg_parser.add_argument("--hedge", type=float, default=None, metavar="PERCENTILE",
+                            help="Hedge chat requests slower than this percentile of the observed latencies.")
+    arg_parser.add_argument("--endpoints", type=int, default=1, help="Number of mock endpoints to route requests across.")
+    arg_parser.add_argument("--routing", choices=("least_outstanding", "latency"), default="least_outstanding")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--output", default=None, help="Write the results as JSON to this file.")
+    args = arg_parser.parse_args()
+
+    with open(os.path.join(ROOT, "tests", "multi_agents.pllm"), "r", encoding="utf-8") as f:
+        programs = [("multi_agents", f.read())]
+    programs += [(f"synthetic_{n}", generate_program(agents=n, fan_in=args.fan_in)) for n in args.agents]
+    # 类型检查器按相对路径读取内置函数签名，因此先在仓库目录下编译
+    namespaces = [(name, load_program(source)) for name, source in programs]
+
+    results = {"latency": args.latency, "error_rate": args.error_rate, "rate_limit": args.rate_limit,
+               "hedge": args.hedge, "endpoints": args.endpoints, "programs": {}}
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            with open("article.txt", "w", encoding="utf-8") as f:
+                f.write("A short article used by the multi_agents benchmark.\n")
+            for name, namespace in namespaces:
+                mocks = install_mocks(args)
+                policy = HedgePolicy(percentile=args.hedge) if args.hedge is not None else None
+                set_hedging(policy)
+                result = asyncio.run(run_program(namespace, args.runs))
+                errors = sum(mock.errors + mock.rate_limited for mock in mocks)
+                result.update(mock_requests=sum(mock.requests for mock in mocks),
+                              mock_errors=sum(mock.errors for mock in mocks),
+                              mock_rate_limited=sum(mock.rate_limited for mock in mocks))
+                if policy is not None:
+                    result.update(hedged=policy.hedged, hedge_wins=policy.hedge_wins)
+                results["programs"][name] = result
+                print(f"{name:<18} agents: {result['agents']:>5}  calls: {result['chat_calls']:>6}  "
+                      f"throughput: {result['throughput_calls_per_s']:8.1f}/s  "
+                      f"makespan p50: {result['makespan_p50_ms']:8.1f} ms  "
+                      f"chat p50/p99/max: {result['chat_p50_ms']:.1f}/{result['chat_p99_ms']:.1f}/{result['chat_max_ms']:.1f} ms  "
+                      f"errors: {errors}"
+                      + (f"  hedged: {policy.hedged} ({policy.hedge_wins} won)" if policy is not None else ""))
+        finally:
+            os.chdir(cwd)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results have been saved to '{args.output}'.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Cold-start benchmark: wall time of fresh interpreter processes running the compiler and the
+programs it generates. Each case is run several times and the median is reported, next to a bare
+`python -c pass` as the interpreter's own start-up cost.
+
+Usage: python -m benchmarks.bench_startup [--source tests/fibonacci.pllm] [--repeat 10]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def cold_start(command, env=None) -> float:
+    start = time.perf_counter()
+    subprocess.run(command, cwd=ROOT, env=env, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmark cold start of the compiler and of generated programs.")
+    arg_parser.add_argument("--source", nargs="+", default=["tests/fibonacci.pllm", "tests/simple_expr.pllm"])
+    arg_parser.add_argument("--repeat", type=int, default=10)
+    args = arg_parser.parse_args()
+
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_dir = os.path.join(tmp, "cache")
+        cases = [("python -c pass", [sys.executable, "-c", "pass"])]
+        for source in args.source:
+            name = os.path.splitext(os.path.basename(source))[0]
+            output = os.path.join(tmp, name + ".py")
+            compiler = [sys.executable, "compile.py", source, "--output_file", output]
+            cases.append((f"compile {name} (no cache)", compiler + ["--no_cache"]))
+            # 先编译一次写入缓存，之后的运行均命中缓存
+            cold_start(compiler + ["--cache_dir", cache_dir])
+            cases.append((f"compile {name} (cached)", compiler + ["--cache_dir", cache_dir]))
+            cases.append((f"run {name}.py", [sys.executable, output]))
+
+        width = max(len(label) for label, _ in cases)
+        for label, command in cases:
+            times = [cold_start(command, env) for _ in range(args.repeat)]
+            print(f"{label:<{width}}  median: {statistics.median(times) * 1000:8.2f} ms  min: {min(times) * 1000:8.2f} ms")
+
+if __name__ == "__main__":
+    main()
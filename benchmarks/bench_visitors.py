@@ -0,0 +1,92 @@
+"""
+Benchmark of AST visitor dispatch and child iteration on a synthetic 100k-node AST.
+
+Compares the legacy `getattr(self, f"visit{type(node).__name__}")` dispatch with the
+class-keyed dispatch table of ASTVisitor.
+
+Usage: python -m benchmarks.bench_visitors [--nodes 100000] [--repeat 5]
+"""
+import argparse
+import time
+from pllm_parser.pllm_ast import *
+from pllm_parser.ast_visitor import ASTVisitor, iter_child_nodes
+from type_system.type_checker import TypeChecker
+from generate.code_gen import CodeGenerator
+
+def build_expr(depth: int, counter: list) -> Expr:
+    counter[0] += 1
+    if depth == 0:
+        if counter[0] % 2:
+            return Identifier(name=f"v{counter[0] % 7}")
+        return Constant(value=counter[0] % 100)
+    return BinaryOp(left=build_expr(depth - 1, counter), op="+",
+                    right=build_expr(depth - 1, counter))
+
+def build_program(target_nodes: int, depth: int = 3) -> tuple:
+    """构造节点数约为 target_nodes 的程序，返回 (Program, 实际节点数)"""
+    counter = [1]
+    body = []
+    while counter[0] < target_nodes:
+        counter[0] += 2
+        body.append(AssignStmt(target=Identifier(name=f"x{len(body)}"),
+                               value=build_expr(depth, counter)))
+    return Program(body=body), counter[0]
+
+class _GetattrDispatch:
+    """旧的按方法名字符串分发方式"""
+    def visit(self, ast_node):
+        method_name = f"visit{type(ast_node).__name__}"
+        visitor = getattr(self, method_name, self._defaultVisitor)
+        return visitor(ast_node)
+
+class TableWalker(ASTVisitor):
+    def __init__(self):
+        super().__init__()
+        self.count = 0
+
+    def visitASTNode(self, node):
+        self.count += 1
+        for child in iter_child_nodes(node):
+            self.visit(child)
+
+class GetattrWalker(_GetattrDispatch, TableWalker):
+    def _defaultVisitor(self, node):
+        # getattr 方式没有 MRO 回退，所有节点都落到这里
+        return self.visitASTNode(node)
+
+class LegacyTypeChecker(_GetattrDispatch, TypeChecker):
+    pass
+
+class LegacyCodeGenerator(_GetattrDispatch, CodeGenerator):
+    pass
+
+def best_of(repeat: int, fn) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmark AST visitor dispatch.")
+    arg_parser.add_argument("--nodes", type=int, default=100000)
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    program, node_count = build_program(args.nodes)
+    cases = [
+        ("walk: getattr", lambda: GetattrWalker().visit(program)),
+        ("walk: table", lambda: TableWalker().visit(program)),
+        ("typecheck: getattr", lambda: LegacyTypeChecker().checkProgram(program)),
+        ("typecheck: table", lambda: TypeChecker().checkProgram(program)),
+        # generate() 先初始化代码生成器的状态（导入、指纹、死 agent 消除），再遍历程序
+        ("codegen: getattr", lambda: LegacyCodeGenerator().generate(program)),
+        ("codegen: table", lambda: CodeGenerator().generate(program)),
+    ]
+    print(f"AST nodes: {node_count}")
+    for name, fn in cases:
+        print(f"{name:<28} {best_of(args.repeat, fn) * 1000:9.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Generator of synthetic PLLM programs for benchmarking the compiler at scale.
+
+The generated programs parse and type check without errors. Their shape is controlled by:
+    agents          number of agents
+    fan_in          inputs per agent; input k of agent i is fed by agent i-1-k
+                    (the first agents have fewer inputs)
+    fan_out         outputs per agent; agent i's consumers all read its output y{i % fan_out}
+    statements      top-level statements in each agent body
+    depth           nesting depth of if / while / for blocks inside an agent body
+    record_width    fields of the record type every agent builds and reads
+    template_lines  lines of text in each chat template
+
+Usage: python -m benchmarks.synthetic [--agents 10] [--fan_in 2] ... > program.pllm
+"""
+import argparse
+
+DEFAULTS = {
+    "agents": 100,
+    "fan_in": 1,
+    "fan_out": 1,
+    "statements": 5,
+    "depth": 2,
+    "record_width": 4,
+    "template_lines": 4,
+}
+
+def _statements(count: int, depth: int, record_width: int, indent: str) -> list:
+    """产生 count 条语句；深度允许时每第 3 条为嵌套的 if / while / for 块"""
+    lines = []
+    for k in range(count):
+        if depth > 0 and k % 3 == 2:
+            kind = (k // 3) % 3
+            if kind == 0:
+                lines.append(f"{indent}if n > {k}:")
+            elif kind == 1:
+                lines.append(f"{indent}c = {k}")
+                lines.append(f"{indent}while c > 0:")
+                lines.append(f"{indent}    c = c - 1")
+            else:
+                lines.append(f"{indent}for e in items:")
+            lines.extend(_statements(2, depth - 1, record_width, indent + "    "))
+        elif k % 2 == 0:
+            lines.append(f"{indent}n = n + r.f{k % record_width} * {k + 2}")
+        else:
+            lines.append(f"{indent}s = int_to_str(n)")
+    return lines
+
+def record_type(record_width: int) -> str:
+    fields = ", ".join(f"f{j}: int" for j in range(record_width))
+    return f"type rec = record{{ {fields} }}\n\n"
+
+def agent_source(i: int, fan_in: int, fan_out: int, statements: int, depth: int,
+                 record_width: int, template_lines: int) -> str:
+    inputs = min(fan_in, i)
+    lines = [f"agent a{i}:"]
+    if inputs:
+        lines.append("    input:")
+        lines.extend(f"        x{k}: str" for k in range(inputs))
+    lines.append("    output:")
+    lines.extend(f"        y{k}: str" for k in range(fan_out))
+    lines.append('    model: "gpt-3.5-turbo"')
+    fields = ", ".join(f"f{j} = {i + j}" for j in range(record_width))
+    lines.append(f"    r : rec = {{ {fields} }}")
+    lines.append(f"    n : int = {i}")
+    lines.append("    c : int = 0")
+    lines.append('    s : str = ""')
+    lines.append("    items : list[int] = [1, 2, 3]")
+    lines.extend(_statements(statements, depth, record_width, "    "))
+    for k in range(1, fan_out):
+        lines.append(f"    y{k} = x{k % inputs}" if inputs else f"    y{k} = s")
+    lines.append('    chat: """')
+    for j in range(template_lines):
+        reference = f"{{x{j % inputs}}} and " if inputs else ""
+        lines.append(f"    Line {j} of the instructions for agent {i}, considering {reference}{{s}}.")
+    lines.append("    answer: ${y0}")
+    lines.append('    """')
+    return "\n".join(lines) + "\n\n"
+
+def connect_source(agents: int, fan_in: int, fan_out: int) -> str:
+    lines = []
+    for i in range(1, agents):
+        for k in range(min(fan_in, i)):
+            lines.append(f"    e{len(lines) // 2}: str")
+            lines.append(f"        a{i - 1 - k}.output.y{(i - 1 - k) % fan_out} -> a{i}.input.x{k}")
+    if not lines:
+        return ""
+    return "connect:\n" + "\n".join(lines) + "\n"
+
+def generate_program(agents: int = DEFAULTS["agents"], fan_in: int = DEFAULTS["fan_in"],
+                     fan_out: int = DEFAULTS["fan_out"], statements: int = DEFAULTS["statements"],
+                     depth: int = DEFAULTS["depth"], record_width: int = DEFAULTS["record_width"],
+                     template_lines: int = DEFAULTS["template_lines"]) -> str:
+    """Returns the source of a synthetic PLLM program of the given shape."""
+    record_width = max(record_width, 1)
+    fan_out = max(fan_out, 1)
+    body = "".join(agent_source(i, fan_in, fan_out, statements, depth, record_width, template_lines)
+                   for i in range(agents))
+    return record_type(record_width) + body + connect_source(agents, fan_in, fan_out)
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Print a synthetic PLLM program.")
+    for name, default in DEFAULTS.items():
+        arg_parser.add_argument(f"--{name}", type=int, default=default)
+    args = arg_parser.parse_args()
+    print(generate_program(**vars(args)), end="")
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,303 @@
+import time
+_IMPORT_START = time.perf_counter()
 import argparse
-from pllm_parser.pllm_lexer import lexer
-from pllm_parser.pllm_parser import parser
-from type_system.type_checker import TypeChecker
-from generate.code_gen import CodeGenerator
-from ast_visual import ASTVisualizer
+import glob
+import json
+import os
+from contextlib import nullcontext
+from compile_cache import CompileCache, DEFAULT_CACHE_DIR, source_key, compiler_version
+from timings import Timings, count_type_activity, no_phase
+# 解析器、类型检查器与各代码生成后端在首次使用时才导入：命中缓存时无需构建 PLY 语法表
+_IMPORT_SECONDS = time.perf_counter() - _IMPORT_START
+
+BACKENDS = ("text", "ast")
+
+def compile_source(data, cache=None, ast_visualizer=None, verbose=True, backend="text", timings=None,
+                   outputs=None):
+    """
+    Compiles PLLM source code into Python code.
+    Args:
+        data (str): The PLLM source code.
+        backend (str): "text" builds the code as text, "ast" builds a Python AST and unparses it.
+        cache (CompileCache): Compilation cache to read from and write to, or None.
+        ast_visualizer (DotWriter): Writes and renders the AST if given.
+        verbose (bool): Print the progress of each stage and the type errors.
+        timings (Timings): Records the time, CPU time and memory of each stage, and the token, node and
+            type counts, if given. Lexing and parsing are then run as separate phases.
+        outputs (list): Requested outputs of the program ("agent" or "agent.output"); only the agents
+            they depend on and the agents with side effects are scheduled. The cache must be created
+            with the matching variant (see _cache_variant).
+    Returns:
+        tuple: (generated code, parse errors, type errors, whether the result came from the cache)
+    """
+    log = print if verbose else (lambda *args: None)
+    phase = timings.phase if timings else no_phase
+    with phase("cache lookup"):
+        entry = cache.load(data) if cache else None
+    if entry is not None:
+        # 命中缓存：跳过词法分析、语法分析、类型检查与代码生成
+        log("Found cached compilation result, skipping parsing and type checking.")
+        if ast_visualizer:
+            with phase("render"):
+                _render_ast(ast_visualizer, entry.program, log)
+        if verbose:
+            from type_system.type_checker import TypeErrorHandler
+            cached_errors = TypeErrorHandler()
+            cached_errors.errors = entry.type_errors
+            cached_errors.show()
+        return entry.code, [], entry.type_errors, True
+
+    with count_type_activity(timings) if timings and timings.counters else nullcontext():
+        result, parse_errors, type_checker, generated_code = _compile_stages(
+            data, ast_visualizer, log, verbose, backend, timings, outputs)
+    type_errors = type_checker.err_handler.errors
+    if cache and not parse_errors:
+        with phase("cache store"):
+            cache.store(data, result, generated_code, type_errors)
+    return generated_code, list(parse_errors), type_errors, False
+
+def _render_ast(ast_visualizer, program, log):
+    ast_visualizer.visualize(program)
+    try:
+        ast_visualizer.render()
+    except Exception as e:
+        # 可视化是可选的：渲染失败（如未安装 graphviz）时保留 .dot 文件，继续编译
+        log(f"Warning: could not render the AST ({type(e).__name__}: {e}); kept '{ast_visualizer.dot_path}'.")
+
+def _compile_stages(data, ast_visualizer, log, verbose, backend, timings, outputs=None):
+    phase = timings.phase if timings else no_phase
+    # 解析源代码
+    log("Parsing source code...")
+    if timings:
+        # 词法分析与语法分析分为两个阶段分别计量
+        with phase("import parser"):
+            from pllm_parser.pllm_lexer import tokenize
+            from pllm_parser.pllm_parser import parse_tokens
+            from pllm_parser.ast_visitor import walk
+        with phase("lex"):
+            tokens = tokenize(data)
+        with phase("parse"):
+            result, parse_errors = parse_tokens(tokens, data)
+        if timings.counters:
+            timings.count("tokens", len(tokens))
+            timings.count("AST nodes", sum(1 for _ in walk(result)) if result else 0)
+    else:
+        from pllm_parser.pllm_parser import parse
+        result, parse_errors = parse(data)
+    log("Parsing completed.")
+    if ast_visualizer:
+        with phase("render"):
+            _render_ast(ast_visualizer, result, log)
+
+    if backend == "ast":
+        with phase("import type checker and code generator"):
+            import ast
+            from type_system.type_checker import TypeChecker
+            from generate.ast_gen import PyASTGenerator
+        log("Performing type checking...")
+        with phase("type check"):
+            type_checker = TypeChecker()
+            type_checker.checkProgram(result, show_errors=verbose)
+        log("Type checking completed.")
+
+        log("Generating Python code...")
+        with phase("code generation"):
+            generator = PyASTGenerator(outputs=outputs)
+            generated_code = ast.unparse(generator.generate(result)) + "\n"
+        liveness = generator.liveness
+        log("Code generation completed.")
+    else:
+        with phase("import type checker and code generator"):
+            from type_system.type_checker import TypeChecker
+            from generate.code_gen import CodeGenerator
+        # 类型检查
+        log("Performing type checking...")
+        with phase("type check"):
+            type_checker = TypeChecker()
+            type_checker.checkProgram(result, show_errors=verbose)
+        log("Type checking completed.")
+
+        # 代码生成
+        log("Generating Python code...")
+        with phase("code generation"):
+            generator = CodeGenerator(outputs)
+            generated_code = generator.generate(result)
+        liveness = generator.liveness
+        log("Code generation completed.")
+    # 未连接或被裁剪的 agent
+    for warning in liveness.warnings:
+        log(f"Warning: {warning}")
+    return result, parse_errors, type_checker, generated_code
+
+# In-memory compilation to code objects, for the REPL and embedders: the Python AST is compiled
+# directly, without generating source text and parsing it again.
+_code_objects = {}
+
+class PLLMSyntaxError(SyntaxError):
+    """PLLM source that does not parse; `errors` holds every parse error in the format of parse()."""
+    def __init__(self, errors, filename="<pllm>"):
+        first = errors[0]
+        message = first["message"] + (f" (and {len(errors) - 1} more error(s))" if len(errors) > 1 else "")
+        super().__init__(message, (filename, first["start"]["line"], None, None))
+        self.errors = errors
+
+def compile_to_code(data, filename="<pllm>", verbose=True):
+    """
+    Compiles PLLM source code into a Python code object, ready for exec().
+    Code objects are cached in memory by source hash, so compiling the same source again is free.
+    Args:
+        data (str): The PLLM source code.
+        filename (str): File name recorded in the code object and shown in tracebacks.
+        verbose (bool): Print the type errors.
+    Returns:
+        code: The compiled module code object.
+    Raises:
+        PLLMSyntaxError: The source has parse errors; type errors are only reported.
+    """
+    key = (source_key(data, "ast"), filename)
+    code = _code_objects.get(key)
+    if code is None:
+        from pllm_parser.pllm_parser import parse
+        from type_system.type_checker import TypeChecker
+        from generate.ast_gen import PyASTGenerator
+        program, parse_errors = parse(data)
+        if parse_errors:
+            raise PLLMSyntaxError(list(parse_errors), filename)
+        TypeChecker().checkProgram(program, show_errors=verbose)
+        code = compile(PyASTGenerator().generate(program), filename, "exec")
+        _code_objects[key] = code
+    return code
+
+# Batch compilation: compiles every file matched by a directory or glob pattern in a process pool.
+def _warm_up_worker():
+    # 预先解析一段小程序，让语法表、词法器与类型签名在处理第一个文件前就绪
+    compile_source("_ = console(1)\n", verbose=False)
+
+def _cache_variant(backend, outputs=None):
+    variant = "" if backend == "text" else backend
+    if outputs:
+        variant += "|outputs=" + ",".join(outputs)
+    return variant
+
+def _compile_file(input_file, output_file, cache_dir, backend):
+    start = time.perf_counter()
+    summary = {"input": input_file, "output": output_file}
+    variant = _cache_variant(backend)
+    try:
+        with open(input_file, 'r', encoding="utf-8") as f:
+            data = f.read()
+        summary["key"] = source_key(data, variant)
+        cache = CompileCache(cache_dir, variant) if cache_dir else None
+        generated_code, parse_errors, type_errors, cached = compile_source(data, cache, verbose=False, backend=backend)
+        os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+        with open(output_file, 'w', encoding="utf-8") as f:
+            f.write(generated_code)
+        summary.update(status="cached" if cached else "compiled",
+                       parse_errors=parse_errors, type_errors=type_errors)
+    except Exception as e:
+        summary.update(status="failed", error=f"{type(e).__name__}: {e}")
+    summary["seconds"] = time.perf_counter() - start
+    return summary
+
+def collect_inputs(pattern):
+    """Returns the .pllm files of a directory (recursively), or the files matched by a glob pattern."""
+    if os.path.isdir(pattern):
+        files = glob.glob(os.path.join(pattern, "**", "*.pllm"), recursive=True)
+    else:
+        files = glob.glob(pattern, recursive=True)
+    return sorted(f for f in files if os.path.isfile(f))
+
+def is_batch_input(input_file):
+    return os.path.isdir(input_file) or glob.has_magic(input_file)
+
+def batch_main(args):
+    start = time.perf_counter()
+    inputs = collect_inputs(args.input_file)
+    if not inputs:
+        print(f"Error: No source files match '{args.input_file}'.")
+        return
+    root = args.input_file if os.path.isdir(args.input_file) else os.path.commonpath([os.path.dirname(os.path.abspath(f)) for f in inputs])
+    summary_file = args.summary_file or os.path.join(args.output_dir, "summary.json")
+
+    # 上一次的编译摘要：源码与编译器均未变化且输出仍存在的文件无需重新编译
+    previous = {}
+    try:
+        with open(summary_file, 'r', encoding="utf-8") as f:
+            previous = {item["input"]: item for item in json.load(f)["files"]}
+    except (OSError, ValueError, KeyError):
+        pass
+
+    results = []
+    tasks = []
+    for input_file in inputs:
+        relative = os.path.relpath(os.path.abspath(input_file), os.path.abspath(root))
+        output_file = os.path.join(args.output_dir, os.path.splitext(relative)[0] + ".py")
+        last = previous.get(input_file)
+        if last and last["status"] != "failed" and last["output"] == output_file and os.path.exists(output_file):
+            with open(input_file, 'r', encoding="utf-8") as f:
+                if source_key(f.read(), _cache_variant(args.backend)) == last.get("key"):
+                    results.append({**last, "status": "up-to-date", "seconds": 0.0})
+                    continue
+        tasks.append((input_file, output_file))
+
+    cache_dir = None if args.no_cache else args.cache_dir
+    if tasks:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=args.jobs, initializer=_warm_up_worker) as pool:
+            futures = [pool.submit(_compile_file, input_file, output_file, cache_dir, args.backend)
+                       for input_file, output_file in tasks]
+            for future in futures:
+                result = future.result()
+                results.append(result)
+                print(f"[{result['status']}] {result['input']} -> {result['output']} ({result['seconds'] * 1000:.1f} ms)")
+                if result["status"] == "failed":
+                    print(f"    {result['error']}")
+
+    results.sort(key=lambda item: item["input"])
+    counts = {}
+    for result in results:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    summary = {
+        "compiler_version": compiler_version(),
+        "jobs": args.jobs,
+        "seconds": time.perf_counter() - start,
+        "counts": counts,
+        "files": results,
+    }
+    os.makedirs(os.path.dirname(summary_file) or ".", exist_ok=True)
+    with open(summary_file, 'w', encoding="utf-8") as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+    print(f"{len(results)} files: " + ", ".join(f"{n} {status}" for status, n in sorted(counts.items())))
+    print(f"Summary has been saved to '{summary_file}'.")
 
 def main():
     # 命令行参数解析
     parser_args = argparse.ArgumentParser(description="Compile source code into Python code.")
-    parser_args.add_argument("input_file", help="Path to the input source code file.")
+    parser_args.add_argument("input_file", help="Path to the input source code file, or a directory / glob pattern to compile in batch.")
     parser_args.add_argument("--output_file", default="output/output.py", help="Path to save the generated Python code.")
+    parser_args.add_argument("--backend", choices=BACKENDS, default="text", help="Code generation backend: build source text, or build a Python AST and unparse it.")
+    parser_args.add_argument("--outputs", default=None, help="Comma-separated outputs of the program (agent or agent.output); agents they do not depend on are pruned, except agents with side effects.")
+    parser_args.add_argument("--ast", choices=("dot", "png"), default=None, help="Visualize the AST as ast.dot in the directory of --output_file, or also render it to ast.png with graphviz.")
+    parser_args.add_argument("--ast_depth", type=int, default=None, help="Collapse AST subtrees below this depth in the visualization.")
+    parser_args.add_argument("--ast_collapse", default="", help="Comma-separated node classes (e.g. AgentDef,FuncDef) shown collapsed in the visualization.")
+    parser_args.add_argument("--timings", action="store_true", help="Print the wall time and CPU time of each compiler stage, and token / node / type counts.")
+    parser_args.add_argument("--timings_json", default=None, help="Write the timings as JSON to this file (implies --timings).")
+    parser_args.add_argument("--timings_memory", action="store_true", help="Also record the peak memory of each stage (slower, uses tracemalloc).")
+    parser_args.add_argument("--profile_dir", default=None, help="Dump a cProfile of each stage into this directory (implies --timings).")
+    parser_args.add_argument("--cache_dir", default=DEFAULT_CACHE_DIR, help="Directory of the compilation cache.")
+    parser_args.add_argument("--no_cache", action="store_true", help="Always recompile, neither reading nor writing the cache.")
+    parser_args.add_argument("--output_dir", default="output", help="Batch mode: directory to save the generated Python code.")
+    parser_args.add_argument("--jobs", type=int, default=os.cpu_count(), help="Batch mode: number of worker processes.")
+    parser_args.add_argument("--summary_file", default=None, help="Batch mode: path of the JSON summary (default: <output_dir>/summary.json).")
     args = parser_args.parse_args()
 
+    if is_batch_input(args.input_file):
+        if args.outputs:
+            print("Error: --outputs applies to a single source file.")
+            return
+        batch_main(args)
+        return
+
     input_file = args.input_file
     output_file = args.output_file
 
@@ -26,33 +312,35 @@ def main():
         print(f"Error reading file '{input_file}': {e}")
         return
 
-    # 初始化类型检查器和代码生成器
-    type_checker = TypeChecker()
-    code_generator = CodeGenerator()
-    ast_visualizer = ASTVisualizer()
+    outputs = [name.strip() for name in args.outputs.split(",") if name.strip()] if args.outputs else None
+    cache = None if args.no_cache else CompileCache(args.cache_dir, _cache_variant(args.backend, outputs))
 
-    try:
-        # 解析源代码
-        print("Parsing source code...")
-        result = parser.parse(data, lexer=lexer)
-        print("Parsing completed.")
-        ast_visualizer.visualize(result)
-        ast_visualizer.render()
+    ast_visualizer = None
+    if args.ast:
+        from ast_visual import DotWriter
+        collapse = [name.strip() for name in args.ast_collapse.split(",") if name.strip()]
+        ast_visualizer = DotWriter(os.path.join(os.path.dirname(output_file) or ".", "ast"),
+                                   args.ast_depth, collapse, args.ast)
 
-        # 类型检查
-        print("Performing type checking...")
-        type_checker.checkProgram(result)
-        print("Type checking completed.")
+    timings = None
+    if args.timings or args.timings_json or args.timings_memory or args.profile_dir:
+        timings = Timings(memory=args.timings_memory, profile_dir=args.profile_dir)
+        timings.add("import compiler entry point", _IMPORT_SECONDS)
 
-        # 代码生成
-        print("Generating Python code...")
-        generated_code = code_generator.generate(result)
-        print("Code generation completed.")
+    try:
+        generated_code, _, _, _ = compile_source(data, cache, ast_visualizer, backend=args.backend,
+                                                   timings=timings, outputs=outputs)
 
         # 保存生成的代码到输出文件
         with open(output_file, 'w', encoding="utf-8") as f:
             f.write(generated_code)
         print(f"Generated code has been saved to '{output_file}'.")
+        if timings:
+            print(timings.report())
+            if args.timings_json:
+                with open(args.timings_json, 'w', encoding="utf-8") as f:
+                    f.write(timings.to_json())
+                print(f"Timings have been saved to '{args.timings_json}'.")
 
     except Exception as e:
         print(f"Compilation failed: {e}")
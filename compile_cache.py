@@ -0,0 +1,127 @@
+"""
+File name: compile_cache.py
+Description: Binary compilation cache. Stores the parsed AST together with the
+generated Python code, keyed by the source content hash and the compiler version.
+"""
+import hashlib
+import marshal
+import os
+from typing import Optional
+from pllm_parser import pllm_ast
+from pllm_parser.pllm_ast import ASTNode
+
+# Bump CACHE_FORMAT whenever the layout of a cache entry changes.
+CACHE_FORMAT = 2
+DEFAULT_CACHE_DIR = ".pllm_cache"
+
+COMPILER_SOURCES = ("pllm_parser", "type_system", "generate", "pllm_runtime")
+
+_compiler_version = None
+
+def compiler_version() -> str:
+    """
+    Returns a fingerprint of the compiler: a hash over every source file of the lexer, parser,
+    type system, code generator and runtime, so that editing any of them invalidates the cache.
+    """
+    global _compiler_version
+    if _compiler_version is None:
+        root = os.path.dirname(os.path.abspath(__file__))
+        digest = hashlib.sha256(str(CACHE_FORMAT).encode())
+        for package in COMPILER_SOURCES:
+            package_dir = os.path.join(root, package)
+            for name in sorted(os.listdir(package_dir)):
+                if name.endswith((".py", ".json")):
+                    digest.update(name.encode())
+                    with open(os.path.join(package_dir, name), "rb") as f:
+                        digest.update(f.read())
+        _compiler_version = digest.hexdigest()
+    return _compiler_version
+
+def source_key(source_code: str, variant: str = "") -> str:
+    """
+    Cache key of a source file: hash of the compiler version and the source content.
+    `variant` distinguishes outputs of the same source compiled differently (e.g. another backend).
+    """
+    digest = hashlib.sha256(compiler_version().encode())
+    digest.update(variant.encode())
+    digest.update(source_code.encode("utf-8"))
+    return digest.hexdigest()
+
+# Encoding of AST nodes into marshal-friendly values.
+# A node becomes a tuple (class name, position, *field values); tuples never occur
+# as field values, so every tuple inside a field is a node.
+NODE_CLASSES = {
+    name: obj for name, obj in vars(pllm_ast).items()
+    if isinstance(obj, type) and issubclass(obj, ASTNode)
+}
+
+def encode_ast(value):
+    if isinstance(value, ASTNode):
+        return (value.__class__.__name__, value.position,
+                *(encode_ast(getattr(value, name)) for name in value._fields))
+    if isinstance(value, list):
+        return [encode_ast(item) for item in value]
+    return value
+
+def decode_ast(data):
+    if isinstance(data, tuple):
+        cls = NODE_CLASSES[data[0]]
+        node = cls.__new__(cls)
+        node.position = data[1]
+        for name, value in zip(cls._fields, data[2:]):
+            setattr(node, name, decode_ast(value))
+        return node
+    if isinstance(data, list):
+        return [decode_ast(item) for item in data]
+    return data
+
+class CacheEntry:
+    """
+    A cache hit. The generated code and type errors are available immediately;
+    the AST is only decoded when `program` is accessed.
+    """
+    def __init__(self, ast_data, code: str, type_errors: list):
+        self._ast_data = ast_data
+        self._program = None
+        self.code = code
+        self.type_errors = type_errors
+
+    @property
+    def program(self) -> pllm_ast.Program:
+        if self._program is None:
+            self._program = decode_ast(self._ast_data)
+        return self._program
+
+class CompileCache:
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, variant: str = ""):
+        self.cache_dir = cache_dir
+        self.variant = variant
+
+    def _path(self, source_code: str) -> str:
+        return os.path.join(self.cache_dir, source_key(source_code, self.variant) + ".bin")
+
+    def load(self, source_code: str) -> Optional[CacheEntry]:
+        """
+        Looks up the compilation result of the given source.
+        Returns None on a miss or if the entry cannot be read.
+        """
+        try:
+            with open(self._path(source_code), "rb") as f:
+                cache_format, ast_data, code, type_errors = marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        if cache_format != CACHE_FORMAT:
+            return None
+        return CacheEntry(ast_data, code, type_errors)
+
+    def store(self, source_code: str, program_node: pllm_ast.Program, code: str, type_errors: list) -> None:
+        """Stores the compilation result of the given source. Failures to write are ignored."""
+        path = self._path(source_code)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                marshal.dump((CACHE_FORMAT, encode_ast(program_node), code, type_errors), f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Warning: could not write compilation cache '{path}': {e}")
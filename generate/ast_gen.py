@@ -0,0 +1,327 @@
+import ast
+from pllm_parser.pllm_ast import *
+from pllm_parser.ast_visitor import ASTVisitor
+from generate.triplestring_parser import process_string
+from generate.topo_manager import TopoManager
+from generate.fingerprint import AgentFingerprints
+from generate.liveness import AgentLiveness
+from type_system.streams import streamed_connections
+from type_system.parallel import accumulators
+from pllm_runtime import BUILT_INS
+
+BIN_OPS = {
+    "+": ast.Add, "-": ast.Sub, "*": ast.Mult, "/": ast.Div, "%": ast.Mod,
+}
+CMP_OPS = {
+    "==": ast.Eq, "!=": ast.NotEq, "<": ast.Lt, ">": ast.Gt, "<=": ast.LtE, ">=": ast.GtE,
+}
+
+def _load(name: str) -> ast.Name:
+    return ast.Name(id=name, ctx=ast.Load())
+
+def _store(name: str) -> ast.Name:
+    return ast.Name(id=name, ctx=ast.Store())
+
+def _call(func: str, *args: ast.expr) -> ast.Call:
+    return ast.Call(func=_load(func), args=list(args), keywords=[])
+
+def _literal(value) -> ast.expr:
+    """由 dict/list/tuple/str 等 Python 常量值构造对应的表达式节点"""
+    if isinstance(value, dict):
+        return ast.Dict(keys=[_literal(k) for k in value], values=[_literal(v) for v in value.values()])
+    if isinstance(value, list):
+        return ast.List(elts=[_literal(v) for v in value], ctx=ast.Load())
+    if isinstance(value, tuple):
+        return ast.Tuple(elts=[_literal(v) for v in value], ctx=ast.Load())
+    return ast.Constant(value=value)
+
+class PyASTGenerator(ASTVisitor):
+    """
+    PyASTGenerator 直接构造 Python 的 ast.Module，而不是拼接源代码文本。
+    生成结果可以直接交给 compile() 得到代码对象，省去文本再解析的开销；
+    需要源代码文本时可用 ast.unparse 得到。生成语义与 CodeGenerator 一致。
+    语句节点的行号取自 PLLM 源码，运行时错误的回溯会指向 PLLM 源码行。
+    top_level_await 为 True 时 connect 块生成模块级的 await execute(...)，
+    供在已有事件循环中执行的场合（如 REPL 会话）使用，编译时需带上 ast.PyCF_ALLOW_TOP_LEVEL_AWAIT。
+    outputs 与 CodeGenerator 相同，指定请求的程序输出。
+    """
+    def __init__(self, top_level_await: bool = False, outputs=None):
+        super().__init__()
+        self.top_level_await = top_level_await
+        self.outputs = outputs
+        self.body = []
+        self.module_imports = set()
+        self.runtime_names = set()
+        self.fingerprints = AgentFingerprints()
+        self.liveness = AgentLiveness(outputs)
+        self.stream_outputs, self.stream_inputs = {}, {}
+        self.streamed_outputs, self.streamed_inputs = set(), set()
+        self.parallel_count = 0
+        self.parallel_accumulators = set()
+
+    def generate(self, program_node: Program) -> ast.Module:
+        self.body = []
+        self.module_imports = set()
+        self.runtime_names = set()
+        self.fingerprints = AgentFingerprints()
+        self.liveness = AgentLiveness(self.outputs)
+        self.parallel_count = 0
+        self.visit(program_node)
+        imports = [ast.Import(names=[ast.alias(name=name)]) for name in sorted(self.module_imports)]
+        if self.runtime_names:
+            imports.append(ast.ImportFrom(module="pllm_runtime",
+                                          names=[ast.alias(name=n) for n in sorted(self.runtime_names)],
+                                          level=0))
+        for stmt in imports:
+            stmt.lineno = stmt.end_lineno = 1
+        module = ast.Module(body=imports + self.body, type_ignores=[])
+        return ast.fix_missing_locations(module)
+
+    def emit(self, stmt: ast.stmt, node: ASTNode = None) -> None:
+        """向当前语句列表追加一条语句，并记录 PLLM 源码中的行号"""
+        if node is not None and node.position[0][0] > 0:
+            (start_line, _), (end_line, _) = node.position
+            stmt.lineno, stmt.end_lineno = start_line, max(start_line, end_line)
+            stmt.col_offset = stmt.end_col_offset = 0
+        self.body.append(stmt)
+
+    def block(self, stmts) -> list:
+        """生成一组语句，返回语句列表；空块生成 pass"""
+        outer = self.body
+        self.body = []
+        try:
+            for stmt in stmts:
+                self.visit(stmt)
+            return self.body or [ast.Pass()]
+        finally:
+            self.body = outer
+
+    def _defaultVisitor(self, node) -> None:
+        # 语法错误的恢复产生式把缺失的部分记为 ""，这样的 AST 无法生成代码
+        if node == "" or node is None:
+            raise ValueError("Cannot generate code: the program has syntax errors.")
+        raise NotImplementedError(f"PyASTGenerator has no visitor for {type(node).__name__}.")
+
+    def visitTypeDefStmt(self, node) -> None:
+        return
+
+    def visitProgram(self, node: Program) -> None:
+        # agent 定义在 connect 块之前生成，因此先从 connect 块中找出流式连接
+        self.stream_outputs, self.stream_inputs = streamed_connections(node.body)
+        for child in node.body:
+            self.fingerprints.add(child)
+            self.liveness.add(child)
+            self.visit(child)
+
+    def visitAgentDef(self, node: AgentDef) -> None:
+        params, defaults, outputs = [], [], []
+        body_items = []
+        for child in node.body:
+            if isinstance(child, InputBlock):
+                for var_decl in child.variables:
+                    params.append(ast.arg(arg=var_decl.name.name))
+                    defaults.append(self.visit(var_decl.value) if var_decl.value != "" else ast.Constant(value=None))
+            elif isinstance(child, OutputBlock):
+                outputs.extend(var_decl.name.name for var_decl in child.variables)
+            else:
+                body_items.append(child)
+        self.streamed_outputs = self.stream_outputs.get(node.name.name, set())
+        self.streamed_inputs = self.stream_inputs.get(node.name.name, set())
+        body = self.block(body_items)
+        self.streamed_outputs, self.streamed_inputs = set(), set()
+        if outputs:
+            body = [stmt for stmt in body if not isinstance(stmt, ast.Pass)]
+            body.append(ast.Return(value=ast.Dict(keys=[ast.Constant(value=name) for name in outputs],
+                                                  values=[_load(name) for name in outputs])))
+        self.emit(ast.AsyncFunctionDef(
+            name=node.name.name,
+            args=ast.arguments(posonlyargs=[], args=params, kwonlyargs=[], kw_defaults=[], defaults=defaults),
+            body=body, decorator_list=[], returns=None, type_params=[]), node)
+
+    def visitModelBlock(self, node: ModelBlock) -> None:
+        self.emit(ast.Assign(targets=[_store("model_name")], value=self.visit(node.model_name)), node)
+
+    def visitChatBlock(self, node: ChatBlock) -> None:
+        input_vars, output_vars, processed_string = process_string(node.template)
+        # 同名输出变量只对应一个 <completionK> 标签；模板中多次引用的输入变量只传入一次
+        input_vars = list(dict.fromkeys(input_vars))
+        output_vars = list(dict.fromkeys(output_vars))
+        prompt = ast.Constant(value=ast.literal_eval(processed_string))
+        if input_vars:
+            prompt = ast.Call(func=ast.Attribute(value=prompt, attr="format", ctx=ast.Load()), args=[],
+                              keywords=[ast.keyword(arg=var, value=_load(var)) for var in input_vars])
+        self.emit(ast.Assign(targets=[_store("prompt")], value=prompt), node)
+        self.runtime_names.add("chat")
+        chat_call = ast.Await(value=_call("chat", _load("model_name"), _load("prompt"),
+                                          ast.Constant(value=len(output_vars))))
+        if output_vars:
+            target = ast.List(elts=[_store(var) for var in output_vars], ctx=ast.Store())
+            self.emit(ast.Assign(targets=[target], value=chat_call), node)
+        else:
+            self.emit(ast.Expr(value=chat_call), node)
+
+    def _extract_agent_name(self, agent_ref: AgentRef) -> str:
+        return agent_ref.parts[0].name
+
+    def visitConnectBlock(self, node: ConnectBlock) -> None:
+        topo_manager = TopoManager()
+        topo_manager.build_graph(node.connections, self._extract_agent_name)
+        graph, param_mapping, outputs = self.liveness.prune(topo_manager.graph, topo_manager.param_mapping)
+        self.emit(ast.Assign(targets=[_store("graph")], value=_literal(graph)), node)
+        self.emit(ast.Assign(targets=[_store("param_mapping")], value=_literal(param_mapping)), node)
+        fingerprints = self.fingerprints.fingerprints(graph, self.liveness.unmemoizable_agents())
+        self.emit(ast.Assign(targets=[_store("agent_fingerprints")], value=_literal(fingerprints)), node)
+        stream_mapping = {agent: sorted(params) for agent, params in self.stream_inputs.items() if agent in param_mapping}
+        if stream_mapping:
+            self.emit(ast.Assign(targets=[_store("stream_mapping")], value=_literal(stream_mapping)), node)
+        self.runtime_names.add("execute")
+        execute = _call("execute", _load("graph"), _load("param_mapping"), _call("globals"))
+        if outputs is not None:
+            self.emit(ast.Assign(targets=[_store("graph_outputs")], value=_literal(outputs)), node)
+            execute.keywords.append(ast.keyword(arg="keep", value=_load("graph_outputs")))
+        if self.top_level_await:
+            self.emit(ast.Expr(value=ast.Await(value=execute)), node)
+            return
+        self.module_imports.add("asyncio")
+        run = ast.Expr(value=ast.Call(
+            func=ast.Attribute(value=_load("asyncio"), attr="run", ctx=ast.Load()),
+            args=[execute], keywords=[]))
+        is_main = ast.Compare(left=_load("__name__"), ops=[ast.Eq()], comparators=[ast.Constant(value="__main__")])
+        self.emit(ast.If(test=is_main, body=[run], orelse=[]), node)
+
+    def visitFuncDef(self, node: FuncDef) -> None:
+        params = [ast.arg(arg=param.name.name) for param in node.params]
+        self.emit(ast.FunctionDef(
+            name=node.name.name,
+            args=ast.arguments(posonlyargs=[], args=params, kwonlyargs=[], kw_defaults=[], defaults=[]),
+            body=self.block(node.stmt_body), decorator_list=[], returns=None, type_params=[]), node)
+
+    def visitReturnStmt(self, node: ReturnStmt) -> None:
+        self.emit(ast.Return(value=self.visit(node.value) if node.value != "" else None), node)
+
+    def visitAssignStmt(self, node: AssignStmt) -> None:
+        target = node.target
+        if isinstance(target, Identifier) and target.name in self.parallel_accumulators:
+            # 并行 for 中的累加 v = v + e：先收集 e，循环结束后按元素顺序累加
+            self.emit(self._append(target.name, self.visit(node.value.right)), node)
+            return
+        if isinstance(target, Identifier):
+            target_expr = _store(target.name)
+        elif isinstance(target, FieldAccess):
+            target_expr = ast.Subscript(value=self.visit(target.obj), slice=ast.Constant(value=target.field.name),
+                                        ctx=ast.Store())
+        elif isinstance(target, IndexAccess):
+            target_expr = ast.Subscript(value=self.visit(target.obj), slice=self.visit(target.index),
+                                        ctx=ast.Store())
+        else:
+            return
+        self.emit(ast.Assign(targets=[target_expr], value=self.visit(node.value)), node)
+        if isinstance(target, Identifier) and target.name in self.streamed_outputs:
+            # 流式输出：把新追加的元素发送给下游
+            self.runtime_names.add("emit_stream")
+            emit = _call("emit_stream", ast.Constant(value=target.name), _load(target.name))
+            self.emit(ast.Expr(value=ast.Await(value=emit)), node)
+
+    def visitIfStmt(self, node: IfStmt) -> None:
+        orelse = self.block(node.else_block) if node.else_block else []
+        self.emit(ast.If(test=self.visit(node.condition), body=self.block(node.body), orelse=orelse), node)
+
+    def visitWhileStmt(self, node: WhileStmt) -> None:
+        self.emit(ast.While(test=self.visit(node.condition), body=self.block(node.body), orelse=[]), node)
+
+    def visitForStmt(self, node: ForStmt) -> None:
+        if isinstance(node.iterable, Identifier) and node.iterable.name in self.streamed_inputs:
+            # 流式输入：元素到达一个处理一个
+            self.runtime_names.add("iterate_stream")
+            self.emit(ast.AsyncFor(target=_store(node.iterator.name), iter=_call("iterate_stream", self.visit(node.iterable)),
+                                   body=self.block(node.body), orelse=[]), node)
+            return
+        self.emit(ast.For(target=_store(node.iterator.name), iter=self.visit(node.iterable),
+                          body=self.block(node.body), orelse=[]), node)
+
+    def _append(self, name: str, value: ast.expr) -> ast.stmt:
+        append = ast.Attribute(value=_load(name), attr="append", ctx=ast.Load())
+        return ast.Expr(value=ast.Call(func=append, args=[value], keywords=[]))
+
+    def _accumulate(self, name: str, part: ast.expr) -> list:
+        if name in self.parallel_accumulators:
+            # 外层并行 for 的累加变量
+            return [self._append(name, part)]
+        stmts = [ast.Assign(targets=[_store(name)], value=ast.BinOp(left=_load(name), op=ast.Add(), right=part))]
+        if name in self.streamed_outputs:
+            self.runtime_names.add("emit_stream")
+            stmts.append(ast.Expr(value=ast.Await(value=_call("emit_stream", ast.Constant(value=name), _load(name)))))
+        return stmts
+
+    def visitParallelForStmt(self, node: ParallelForStmt) -> None:
+        # 与 CodeGenerator 相同：循环体生成为嵌套协程函数，由 parallel_map 并发执行，结束后按元素顺序累加
+        self.parallel_count += 1
+        func_name = f"_parallel_{self.parallel_count}"
+        accumulated = accumulators(node.body)
+        outer_accumulators, outer_streamed = self.parallel_accumulators, self.streamed_outputs
+        self.parallel_accumulators, self.streamed_outputs = set(accumulated), set()
+        body = [ast.Assign(targets=[_store(name)], value=ast.List(elts=[], ctx=ast.Load())) for name in accumulated]
+        body.extend(self.block(node.body))
+        if accumulated:
+            body.append(ast.Return(value=ast.List(elts=[_load(name) for name in accumulated], ctx=ast.Load())))
+        self.parallel_accumulators, self.streamed_outputs = outer_accumulators, outer_streamed
+        self.emit(ast.AsyncFunctionDef(
+            name=func_name,
+            args=ast.arguments(posonlyargs=[], args=[ast.arg(arg=node.iterator.name)], kwonlyargs=[],
+                               kw_defaults=[], defaults=[]),
+            body=body, decorator_list=[], returns=None, type_params=[]), node)
+        self.runtime_names.add("parallel_map")
+        args = [_load(func_name), self.visit(node.iterable)]
+        if node.limit != "":
+            args.append(self.visit(node.limit))
+        map_call = ast.Await(value=_call("parallel_map", *args))
+        if not accumulated:
+            self.emit(ast.Expr(value=map_call), node)
+            return
+        merge = [ast.For(target=_store("_part"),
+                         iter=ast.Subscript(value=_load("_results"), slice=ast.Constant(value=index), ctx=ast.Load()),
+                         body=self._accumulate(name, _load("_part")), orelse=[])
+                 for index, name in enumerate(accumulated)]
+        self.emit(ast.For(target=_store("_results"), iter=map_call, body=merge, orelse=[]), node)
+
+    def visitBreakStmt(self, node: BreakStmt) -> None:
+        self.emit(ast.Break(), node)
+
+    def visitContinueStmt(self, node: ContinueStmt) -> None:
+        self.emit(ast.Continue(), node)
+
+    def visitBinaryOp(self, node: BinaryOp) -> ast.expr:
+        left = self.visit(node.left)
+        right = self.visit(node.right)
+        if node.op in CMP_OPS:
+            return ast.Compare(left=left, ops=[CMP_OPS[node.op]()], comparators=[right])
+        return ast.BinOp(left=left, op=BIN_OPS[node.op](), right=right)
+
+    def visitIdentifier(self, node: Identifier) -> ast.expr:
+        return _load(node.name)
+
+    def visitConstant(self, node: Constant) -> ast.expr:
+        value = node.value
+        if isinstance(value, str):
+            # 字符串常量保留了源码中的引号
+            return ast.Constant(value=ast.literal_eval(value))
+        return ast.Constant(value=value)
+
+    def visitListExpr(self, node: ListExpr) -> ast.expr:
+        return ast.List(elts=[self.visit(element) for element in node.elements], ctx=ast.Load())
+
+    def visitRecordExpr(self, node: RecordExpr) -> ast.expr:
+        return ast.Dict(keys=[ast.Constant(value=inst_assign.field.name) for inst_assign in node.fields],
+                        values=[self.visit(inst_assign.value) for inst_assign in node.fields])
+
+    def visitFieldAccess(self, node: FieldAccess) -> ast.expr:
+        return ast.Subscript(value=self.visit(node.obj), slice=ast.Constant(value=node.field.name), ctx=ast.Load())
+
+    def visitIndexAccess(self, node: IndexAccess) -> ast.expr:
+        return ast.Subscript(value=self.visit(node.obj), slice=self.visit(node.index), ctx=ast.Load())
+
+    def visitFuncCall(self, node: FuncCall) -> ast.expr:
+        func_name = node.func_name.name
+        if func_name in BUILT_INS:
+            self.runtime_names.add(func_name)
+        return _call(func_name, *(self.visit(arg) for arg in node.args))
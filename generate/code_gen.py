@@ -1,10 +1,15 @@
 # TODO: Generate Python code based on tree pattern matching.
-from typing import Optional
 from contextlib import contextmanager
 from pllm_parser.pllm_ast import *
+from pllm_parser.ast_visitor import ASTVisitor
 from type_system.type_pre import Type, string_to_type, RecordType, ListType, FunctionType
 from generate.triplestring_parser import process_string
 from generate.topo_manager import TopoManager
+from generate.fingerprint import AgentFingerprints
+from generate.liveness import AgentLiveness
+from type_system.streams import streamed_connections
+from type_system.parallel import accumulators
+from pllm_runtime import BUILT_INS, __version__ as RUNTIME_VERSION
 
 class IndentManager:
     """
@@ -44,8 +49,14 @@ class IndentManager:
         finally:
             self.current_level -= 1
 
-class CodeGenerator:
-    def __init__(self):
+class CodeGenerator(ASTVisitor):
+    """
+    outputs: 可选，请求的程序输出（"agent" 或 "agent.output" 的列表），connect 块只调度计算它们
+    所需的 agent 与有副作用的 agent（见 generate.liveness）。
+    """
+    def __init__(self, outputs=None):
+        super().__init__()
+        self.outputs = outputs
         self.indent_manager = IndentManager()
         self.code = []
 
@@ -56,43 +67,66 @@ class CodeGenerator:
         indent = self.indent_manager.get_indent()
         self.code.append(f"{indent}{line}\n")
 
-    def get_pos(self):
-        return len(self.code)
-    
-    def insert_line(self, line, pos):
-        indent = self.indent_manager.get_indent()
-        self.code.insert(pos, f"{indent}{line}\n")
-
     @contextmanager
     def indent(self):
         with self.indent_manager.indent():
             yield
 
+    @contextmanager
+    def fragment(self):
+        """
+        在上下文内把代码输出到一个新的片段（行列表）中，退出后恢复原输出位置。
+        适用于需要先生成代码体、再确定其头部的结构：调用方在片段生成后
+        先输出头部，再把片段追加到后面，整个输出只需一次线性拼接。
+        """
+        outer = self.code
+        self.code = []
+        try:
+            yield self.code
+        finally:
+            self.code = outer
+
     def _initCodeGenerator(self):
-        # TODO: Prepare for generating
-        self._include_built_in_functions("generate/built_in.py")
+        # 生成的代码中用到的标准库模块与引用到的 pllm_runtime 名称，用于生成导入语句
+        self.module_imports = set()
+        self.runtime_names = set()
+        self.fingerprints = AgentFingerprints()
+        self.liveness = AgentLiveness(self.outputs)
+        # 流式连接的上游输出与下游输入，以及当前 agent 中的流式输出与输入
+        self.stream_outputs, self.stream_inputs = {}, {}
+        self.streamed_outputs, self.streamed_inputs = set(), set()
+        # 已生成的并行 for 的个数（用于命名迭代函数），以及当前迭代函数中的累加变量
+        self.parallel_count = 0
+        self.parallel_accumulators = set()
         return
-    
-    def _include_built_in_functions(self, built_in_path: str) -> None:
-        with open(built_in_path, 'r', encoding="utf-8") as f:
-            built_in_code = f.read()
-            self.add_line(built_in_code)
-    
+
+    def _initStreams(self, nodes) -> None:
+        # agent 定义在 connect 块之前生成，因此先从 connect 块中找出流式连接
+        self.stream_outputs, self.stream_inputs = streamed_connections(nodes)
+
+    def _runtime_imports(self) -> list:
+        """
+        生成文件头部的导入语句，只导入程序实际用到的模块，只从 pllm_runtime 导入程序实际引用的名称。
+        """
+        lines = [f"# import (pllm_runtime {RUNTIME_VERSION})\n"]
+        lines.extend(f"import {name}\n" for name in sorted(self.module_imports))
+        if self.runtime_names:
+            lines.append(f"from pllm_runtime import {', '.join(sorted(self.runtime_names))}\n")
+        lines.append("\n")
+        return lines
+
+    def get_code(self) -> str:
+        return ''.join(self._runtime_imports() + self.code)
+
     def show(self):
         # TODO: Write to file and compile
         with open('test.py', 'w', encoding="utf-8") as f:
-            for line in self.code:
-                f.write(line)
+            f.write(self.get_code())
 
     def generate(self, program_node: Program) -> str:
         self._initCodeGenerator()
         self.visit(program_node)
-        return ''.join(self.code)
-
-    def visit(self, ast_node: ASTNode) -> Optional[str]:
-        method_name: str = f"visit{type(ast_node).__name__}"
-        visitor = getattr(self, method_name, self._defaultVisitor)
-        return visitor(ast_node)
+        return self.get_code()
 
     def _defaultVisitor(self, node) -> None:
         # TODO: 抛出一个错误
@@ -103,7 +137,10 @@ class CodeGenerator:
         return
 
     def visitProgram(self, node: Program) -> None:
+        self._initStreams(node.body)
         for child in node.body:
+            self.fingerprints.add(child)
+            self.liveness.add(child)
             self.visit(child)
 
     def visitVarDecl(self, node: VarDecl) -> str:
@@ -117,10 +154,12 @@ class CodeGenerator:
 
     def visitAgentDef(self, node: AgentDef) -> None:
         agent_name_str = self.visit(node.name)
-        agent_def_pos = self.get_pos()
         agent_params = []
         agent_returns = []
-        with self.indent():
+        self.streamed_outputs = self.stream_outputs.get(agent_name_str, set())
+        self.streamed_inputs = self.stream_inputs.get(agent_name_str, set())
+        # 参数列表要在访问完 agent 体后才能确定，因此 agent 体先输出到单独的片段中
+        with self.indent(), self.fragment() as agent_body:
             for child in node.body:
                 if isinstance(child, InputBlock):
                     for var_decl in child.variables:
@@ -130,8 +169,10 @@ class CodeGenerator:
                         agent_returns.append(self.visit(var_decl))
                 else:
                     self.visit(child)
+        self.streamed_outputs, self.streamed_inputs = set(), set()
         agent_def_str = f"async def {agent_name_str}({', '.join(agent_params)}):"
-        self.insert_line(agent_def_str, agent_def_pos)
+        self.add_line(agent_def_str)
+        self.code.extend(agent_body)
         with self.indent():
             if agent_returns:
                 return_dict = ", ".join(f"'{var.split('=')[0]}': {var.split('=')[0]}" for var in agent_returns)
@@ -154,34 +195,20 @@ class CodeGenerator:
 
     def visitChatBlock(self, node: ChatBlock) -> None:
         input_vars, output_vars, processed_string = process_string(node.template)
+        # 同名输出变量只对应一个 <completionK> 标签；模板中多次引用的输入变量只传入一次
+        input_vars = list(dict.fromkeys(input_vars))
+        output_vars = list(dict.fromkeys(output_vars))
         if input_vars:
             input_formatting = ", ".join([f"{var}={var}" for var in input_vars])
             self.add_line(f'prompt={processed_string}.format({input_formatting})')
         else:
             self.add_line(f'prompt={processed_string}')
-        self.add_line('client=AsyncOpenAI(')
-        self.add_line('    base_url=BASE_URL,')
-        self.add_line('    api_key=API_KEY')
-        self.add_line(')')
-        self.add_line('try:')
-        with self.indent():
-            self.add_line('response=await client.chat.completions.create(')
-            with self.indent():
-                    self.add_line('model=model_name,')
-                    self.add_line('messages=[')
-                    self.add_line('    {"role": "system", "content": SYS_PROMPT},')
-                    self.add_line('    {"role": "user", "content": prompt}')
-                    self.add_line(']')
-            self.add_line(')')
-            if output_vars:
-                for i, var in enumerate(output_vars):
-                    self.add_line(f'import re')
-                    self.add_line(f'match_{i}=re.search(r"<completion{i}>(.*?)</completion{i}>", response.choices[0].message.content, re.DOTALL)')
-                    self.add_line(f'{var}=match_{i}.group(1).strip() if match_{i} else ""')
-        self.add_line('except Exception as e:')
-        with self.indent():
-            self.add_line('print(f"Error in chat block: {e}")')
-            self.add_line(f'{", ".join(output_vars)}=""')  # Set outputs to empty string on error
+        self.runtime_names.add("chat")
+        chat_call = f"await chat(model_name, prompt, {len(output_vars)})"
+        if output_vars:
+            self.add_line(f"[{', '.join(output_vars)}] = {chat_call}")
+        else:
+            self.add_line(chat_call)
 
     def _extract_agent_name(self, agent_ref: AgentRef) -> str:
         """
@@ -200,16 +227,30 @@ class CodeGenerator:
         if len(parts) >= 1:
             return parts[0]
                 
+    def _stream_mapping(self, param_mapping: dict) -> dict:
+        """{agent: [流式输入]}，只包含调度中的 agent"""
+        return {agent: sorted(params) for agent, params in self.stream_inputs.items() if agent in param_mapping}
+
     def visitConnectBlock(self, node: ConnectBlock) -> None:
         topo_manager = TopoManager()
         topo_manager.build_graph(node.connections, self._extract_agent_name)
-        graph_code = f"graph = {repr(topo_manager.graph)}"
+        graph, param_mapping, outputs = self.liveness.prune(topo_manager.graph, topo_manager.param_mapping)
+        graph_code = f"graph = {repr(graph)}"
         self.add_line(graph_code)
-        param_mapping_code = f"param_mapping={repr(topo_manager.param_mapping)}"
+        param_mapping_code = f"param_mapping={repr(param_mapping)}"
         self.add_line(param_mapping_code)
+        self.add_line(f"agent_fingerprints = {repr(self.fingerprints.fingerprints(graph, self.liveness.unmemoizable_agents()))}")
+        stream_mapping = self._stream_mapping(param_mapping)
+        if stream_mapping:
+            self.add_line(f"stream_mapping = {repr(stream_mapping)}")
+        if outputs is not None:
+            self.add_line(f"graph_outputs = {repr(outputs)}")
+        self.module_imports.add("asyncio")
+        self.runtime_names.add("execute")
         self.add_line('if __name__ == "__main__":')
         with self.indent():
-            execute_call = "asyncio.run(execute(graph, param_mapping))"
+            keep = ", keep=graph_outputs" if outputs is not None else ""
+            execute_call = f"asyncio.run(execute(graph, param_mapping, globals(){keep}))"
             self.add_line(execute_call)
     
     def visitFuncDef(self, node: FuncDef) -> None:
@@ -235,11 +276,18 @@ class CodeGenerator:
             self.add_line("return")
     
     def visitAssignStmt(self, node: AssignStmt) -> None:
-        if isinstance(node.target, Identifier):
+        if isinstance(node.target, Identifier) and node.target.name in self.parallel_accumulators:
+            # 并行 for 中的累加 v = v + e：先收集 e，循环结束后按元素顺序累加
+            self.add_line(f"{node.target.name}.append({self.visit(node.value.right)})")
+        elif isinstance(node.target, Identifier):
             target_code = self.visit(node.target)
             expr_code = self.visit(node.value)
             assign_code = f"{target_code} = {expr_code}"
             self.add_line(assign_code)
+            if target_code in self.streamed_outputs:
+                # 流式输出：把新追加的元素发送给下游
+                self.runtime_names.add("emit_stream")
+                self.add_line(f"await emit_stream('{target_code}', {target_code})")
         elif isinstance(node.target, FieldAccess):
             target_code = f"{self.visit(node.target.obj)}['{node.target.field.name}']"
             expr_code = self.visit(node.value)
@@ -274,11 +322,58 @@ class CodeGenerator:
     def visitForStmt(self, node: ForStmt) -> None:
         iterator_code = node.iterator.name
         iterable_code = self.visit(node.iterable)
-        self.add_line(f"for {iterator_code} in {iterable_code}:")
+        if isinstance(node.iterable, Identifier) and node.iterable.name in self.streamed_inputs:
+            # 流式输入：元素到达一个处理一个
+            self.runtime_names.add("iterate_stream")
+            self.add_line(f"async for {iterator_code} in iterate_stream({iterable_code}):")
+        else:
+            self.add_line(f"for {iterator_code} in {iterable_code}:")
         with self.indent():
             for stmt in node.body:
                 self.visit(stmt)
 
+    def _accumulate(self, name: str, part_code: str) -> None:
+        if name in self.parallel_accumulators:
+            # 外层并行 for 的累加变量
+            self.add_line(f"{name}.append({part_code})")
+            return
+        self.add_line(f"{name} = ({name} + {part_code})")
+        if name in self.streamed_outputs:
+            self.runtime_names.add("emit_stream")
+            self.add_line(f"await emit_stream('{name}', {name})")
+
+    def visitParallelForStmt(self, node: ParallelForStmt) -> None:
+        """
+        循环体生成为以迭代变量为参数的嵌套协程函数，由 parallel_map 并发执行；
+        函数返回各累加变量在本次迭代中的增量，循环结束后按元素顺序累加。
+        """
+        self.parallel_count += 1
+        func_name = f"_parallel_{self.parallel_count}"
+        accumulated = accumulators(node.body)
+        outer_accumulators, outer_streamed = self.parallel_accumulators, self.streamed_outputs
+        self.parallel_accumulators, self.streamed_outputs = set(accumulated), set()
+        self.add_line(f"async def {func_name}({node.iterator.name}):")
+        with self.indent():
+            for name in accumulated:
+                self.add_line(f"{name} = []")
+            for stmt in node.body:
+                self.visit(stmt)
+            if accumulated:
+                self.add_line(f"return [{', '.join(accumulated)}]")
+        self.parallel_accumulators, self.streamed_outputs = outer_accumulators, outer_streamed
+        self.runtime_names.add("parallel_map")
+        limit_code = f", {self.visit(node.limit)}" if node.limit != "" else ""
+        map_code = f"await parallel_map({func_name}, {self.visit(node.iterable)}{limit_code})"
+        if not accumulated:
+            self.add_line(map_code)
+            return
+        self.add_line(f"for _results in {map_code}:")
+        with self.indent():
+            for index, name in enumerate(accumulated):
+                self.add_line(f"for _part in _results[{index}]:")
+                with self.indent():
+                    self._accumulate(name, "_part")
+
     def visitBreakStmt(self, node: BreakStmt) -> None:
         self.add_line("break")
 
@@ -330,5 +425,7 @@ class CodeGenerator:
 
     def visitFuncCall(self, node: FuncCall) -> str:
         func_name = self.visit(node.func_name)
+        if func_name in BUILT_INS:
+            self.runtime_names.add(func_name)
         arg_codes = [self.visit(arg) for arg in node.args]
         return f"{func_name}({', '.join(arg_codes)})"
\ No newline at end of file
@@ -0,0 +1,34 @@
+import hashlib
+from pllm_parser.pllm_ast import AgentDef, ConnectBlock
+from pllm_parser.ast_visitor import dump
+
+class AgentFingerprints:
+    """
+    Content fingerprints of the agents of a program, emitted by the code generators as
+    `agent_fingerprints` so that the runtime can memoize agent outputs across runs.
+    An agent's fingerprint covers its own definition (inputs, outputs, model, body and chat template)
+    and every other top-level definition or statement before the connect block (functions, types,
+    global variables), since the agent may depend on them. Positions are not included, so moving
+    code or changing whitespace keeps the fingerprints.
+    The code generators leave agents with side effects and agents that read files (see
+    AgentLiveness.unmemoizable_agents) out of `agent_fingerprints`, so they are never memoized: their
+    side effects happen on every run and they see the current contents of the files.
+    """
+    def __init__(self):
+        self._context = hashlib.sha256()
+        self._agents = {}
+
+    def add(self, node) -> None:
+        """Records a top-level node of the program, in program order."""
+        if isinstance(node, AgentDef):
+            self._agents[node.name.name] = hashlib.sha256(dump(node).encode()).hexdigest()
+        elif not isinstance(node, ConnectBlock):
+            self._context.update(dump(node).encode())
+
+    def fingerprints(self, agent_names, exclude=()) -> dict:
+        """{agent name: fingerprint} for the given agents defined so far, except those in exclude."""
+        context = self._context.hexdigest()
+        return {
+            name: hashlib.sha256(f"{context}:{self._agents[name]}".encode()).hexdigest()[:16]
+            for name in agent_names if name in self._agents and name not in exclude
+        }
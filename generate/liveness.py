@@ -0,0 +1,116 @@
+from pllm_parser.pllm_ast import AgentDef, FuncDef, FuncCall, OutputBlock
+from pllm_parser.ast_visitor import walk
+
+# 有副作用的内置函数：调用它们（直接或经由自定义函数）的 agent 即使没有输出也必须运行
+SIDE_EFFECTS = frozenset({"write_file", "append_file", "write_lines", "console"})
+# 读取文件的内置函数：其结果取决于运行时的文件内容，不在 agent 指纹与输入的范围内
+FILE_READS = frozenset({"read_file", "read_lines"})
+
+class AgentLiveness:
+    """
+    Dead-agent elimination for the connect block.
+    The live agents are those reachable backward, along the connections, from the outputs of the
+    program and from the agents with side effects (calls to write_file, append_file, write_lines or
+    console, directly or through user functions). The outputs of the program are the requested
+    agents if given, otherwise the sink agents that have outputs. Every other agent is pruned from
+    the emitted schedule. Agents with side effects that are defined but not connected are scheduled
+    as isolated agents; other unconnected agents are reported, since they are never run.
+    Agents not defined before the connect block are treated as agents with outputs and no side effects.
+    """
+    def __init__(self, outputs=None):
+        # 请求的输出，形如 "agent" 或 "agent.output"；None 表示汇点 agent
+        self.outputs = outputs
+        self._calls = {}  # 自定义函数名 -> 其中调用的函数名
+        self._agents = {}  # agent 名 -> (其中调用的函数名, 输出名列表)
+        self.warnings = []
+
+    def add(self, node) -> None:
+        """Records a top-level node of the program, in program order."""
+        if isinstance(node, (AgentDef, FuncDef)):
+            calls = {child.func_name.name for child in walk(node) if isinstance(child, FuncCall)}
+            if isinstance(node, FuncDef):
+                self._calls[node.name.name] = calls
+                return
+            outputs = [var.name.name for item in node.body if isinstance(item, OutputBlock) for var in item.variables]
+            self._agents[node.name.name] = (calls, outputs)
+
+    def _functions_calling(self, built_ins) -> set:
+        """The given built-in functions and the user functions that call them, directly or indirectly."""
+        functions = set(built_ins)
+        changed = True
+        while changed:
+            changed = False
+            for name, calls in self._calls.items():
+                if name not in functions and calls & functions:
+                    functions.add(name)
+                    changed = True
+        return functions
+
+    def _agents_calling(self, built_ins) -> set:
+        functions = self._functions_calling(built_ins)
+        return {name for name, (calls, _) in self._agents.items() if calls & functions}
+
+    def effectful_agents(self) -> set:
+        """The agents recorded so far that call a function with side effects, directly or through user functions."""
+        return self._agents_calling(SIDE_EFFECTS)
+
+    def unmemoizable_agents(self) -> set:
+        """
+        The agents whose outputs cannot be reused across runs: those with side effects, and those
+        that read files, whose contents are not covered by the fingerprint and the inputs.
+        """
+        return self._agents_calling(SIDE_EFFECTS | FILE_READS)
+
+    def _requested_agents(self, graph: dict) -> list:
+        agents = []
+        for output in self.outputs:
+            agent_name, _, output_name = output.partition(".")
+            if agent_name not in graph and agent_name not in self._agents:
+                raise ValueError(f"Requested output '{output}': no agent named '{agent_name}'.")
+            if output_name and agent_name in self._agents and output_name not in self._agents[agent_name][1]:
+                raise ValueError(f"Requested output '{output}': agent '{agent_name}' has no output '{output_name}'.")
+            if agent_name not in agents:
+                agents.append(agent_name)
+        return agents
+
+    def prune(self, graph: dict, param_mapping: dict):
+        """
+        Returns (graph, param_mapping, outputs) restricted to the live agents, where outputs lists
+        the requested agents, or None without requested outputs.
+        """
+        effectful_agents = self.effectful_agents()
+        effectful = [name for name in self._agents if name in effectful_agents]
+        requested = None if self.outputs is None else self._requested_agents(graph)
+        graph = {name: list(neighbors) for name, neighbors in graph.items()}
+        for name in self._agents:
+            if name in graph:
+                continue
+            if name in effectful:
+                self.warnings.append(f"Agent '{name}' is not connected; it is scheduled because it has side effects.")
+                graph[name] = []
+            elif requested is not None and name in requested:
+                graph[name] = []
+            else:
+                self.warnings.append(f"Agent '{name}' is not connected and is never run.")
+        if requested is not None:
+            roots = set(requested)
+        else:
+            roots = {name for name, neighbors in graph.items()
+                     if not neighbors and (name not in self._agents or self._agents[name][1])}
+        roots.update(name for name in effectful if name in graph)
+
+        # 沿连接反向求可达的 agent
+        live = set()
+        stack = list(roots)
+        while stack:
+            name = stack.pop()
+            if name in live:
+                continue
+            live.add(name)
+            stack.extend(source for source, _ in param_mapping.get(name, {}).values())
+        for name in graph:
+            if name not in live:
+                self.warnings.append(f"Agent '{name}' is pruned: none of the outputs of the program depend on it.")
+        pruned_graph = {name: [n for n in neighbors if n in live] for name, neighbors in graph.items() if name in live}
+        pruned_mapping = {name: mapping for name, mapping in param_mapping.items() if name in live}
+        return pruned_graph, pruned_mapping, requested
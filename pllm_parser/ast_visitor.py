@@ -0,0 +1,79 @@
+from pllm_parser.pllm_ast import ASTNode
+
+def _node_classes(base=ASTNode):
+    """递归收集 base 及其所有子类"""
+    classes = [base]
+    for sub in base.__subclasses__():
+        classes.extend(_node_classes(sub))
+    return classes
+
+def iter_fields(node: ASTNode):
+    """按节点类声明的 _fields 顺序产出 (字段名, 字段值)"""
+    for name in node._fields:
+        yield name, getattr(node, name)
+
+def iter_child_nodes(node: ASTNode):
+    """产出节点的全部直接子节点，列表字段会被展开"""
+    for name in node._fields:
+        value = getattr(node, name)
+        if isinstance(value, ASTNode):
+            yield value
+        elif isinstance(value, list):
+            for item in value:
+                if isinstance(item, ASTNode):
+                    yield item
+
+def walk(node: ASTNode):
+    """按先序产出 node 及其全部后代节点"""
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(reversed(list(iter_child_nodes(node))))
+
+def dump(node) -> str:
+    """节点内容的规范文本表示，不含位置，用于比较或哈希 AST"""
+    if isinstance(node, ASTNode):
+        fields = ", ".join(f"{name}={dump(value)}" for name, value in iter_fields(node))
+        return f"{type(node).__name__}({fields})"
+    if isinstance(node, list):
+        return f"[{', '.join(dump(item) for item in node)}]"
+    return repr(node)
+
+class ASTVisitor:
+    """
+    AST 访问者基类。
+    在实例化时为每个 AST 节点类预先建立 {节点类: 绑定方法} 分发表，
+    visit 时直接按 type(node) 查表，避免每次访问都拼接方法名并调用 getattr。
+    处理方法按 MRO 解析：visitIdentifier 未实现时依次尝试 visitExpr、visitASTNode，
+    都没有则交给 _defaultVisitor。
+    """
+    def __init__(self):
+        self._dispatch = {}
+        for cls in _node_classes():
+            self._register(cls)
+
+    def _register(self, cls):
+        for base in cls.__mro__:
+            visitor = getattr(self, f"visit{base.__name__}", None)
+            if visitor is not None:
+                break
+        else:
+            visitor = self._defaultVisitor
+        self._dispatch[cls] = visitor
+        return visitor
+
+    def visit(self, ast_node):
+        visitor = self._dispatch.get(ast_node.__class__)
+        if visitor is None:
+            # 非 AST 值（如空字符串）或运行期新增的节点类，首次遇到时登记
+            visitor = self._register(ast_node.__class__)
+        return visitor(ast_node)
+
+    def generic_visit(self, node: ASTNode) -> None:
+        """依次访问节点的全部子节点"""
+        for child in iter_child_nodes(node):
+            self.visit(child)
+
+    def _defaultVisitor(self, node):
+        return
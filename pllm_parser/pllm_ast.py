@@ -5,172 +5,260 @@ Author: Sun Ao
 Last edited: 2025-6-3
 """
 
+# 节点位置使用紧凑表示 ((start_line, start_column), (end_line, end_column))。
+# 父节点直接复用子节点的起止元组，因此大量节点共享同一组元组对象。
+NO_POSITION = ((0, 0), (0, 0))
+
+def position_to_dict(position) -> dict:
+    """将紧凑位置转换为诊断信息使用的 {"start": {...}, "end": {...}} 格式"""
+    (start_line, start_column), (end_line, end_column) = position or NO_POSITION
+    return {
+        "start": {"line": start_line, "column": start_column},
+        "end": {"line": end_line, "column": end_column}
+    }
+
 class ASTNode:
     """基础 AST 节点类"""
+    # _fields: 各子类的语法字段（按构造参数顺序）；_attributes: 所有节点共有的附加属性
+    _fields = ()
+    _attributes = ("position",)
+    # 使用 __slots__ 代替实例 __dict__
+    __slots__ = ("position",)
+
     def __init__(self, **kwargs):
-        self.__dict__.update(kwargs)
+        for key, value in kwargs.items():
+            setattr(self, key, value)
 
     def __repr__(self):
-        fields = ", ".join(f"{key}={value!r}" for key, value in self.__dict__.items())
+        fields = ", ".join(f"{key}={getattr(self, key)!r}" for key in self._fields + self._attributes)
         return f"{self.__class__.__name__}({fields})"
 
 class Program(ASTNode):
     """程序节点，包含全局块和多个语句/定义"""
-    def __init__(self, body=[], position={}):
+    _fields = ("body",)
+    __slots__ = _fields
+    def __init__(self, body=[], position=NO_POSITION):
         super().__init__(body=body, position=position)
 
 class VarDecl(ASTNode):
     """变量声明节点"""
-    def __init__(self, name, var_type="", value="", position={}):
+    _fields = ("name", "var_type", "value")
+    __slots__ = _fields
+    def __init__(self, name, var_type="", value="", position=NO_POSITION):
         super().__init__(name=name, var_type=var_type, value=value, position=position)
 
 class AgentDef(ASTNode):
     """代理定义"""
-    def __init__(self, name, body=[], position={}):
+    _fields = ("name", "body")
+    __slots__ = _fields
+    def __init__(self, name, body=[], position=NO_POSITION):
         super().__init__(name=name, body=body, position=position)
 
 class InputBlock(ASTNode):
     """输入块"""
-    def __init__(self, variables=[], position={}):
+    _fields = ("variables",)
+    __slots__ = _fields
+    def __init__(self, variables=[], position=NO_POSITION):
         super().__init__(variables=variables, position=position)
 
 class OutputBlock(ASTNode):
     """输出块"""
-    def __init__(self, variables=[], position={}):
+    _fields = ("variables",)
+    __slots__ = _fields
+    def __init__(self, variables=[], position=NO_POSITION):
         super().__init__(variables=variables, position=position)
 
 class ModelBlock(ASTNode):
     """模型块"""
-    def __init__(self, model_name, position={}):
+    _fields = ("model_name",)
+    __slots__ = _fields
+    def __init__(self, model_name, position=NO_POSITION):
         super().__init__(model_name=model_name, position=position)
 
 class ChatBlock(ASTNode):
     """聊天块"""
-    def __init__(self, name, template, position={}):
+    _fields = ("name", "template")
+    __slots__ = _fields
+    def __init__(self, name, template, position=NO_POSITION):
         super().__init__(name=name, template=template, position=position)
 
 class ConnectBlock(ASTNode):
     """连接块"""
-    def __init__(self, connections=[], position={}):
+    _fields = ("connections",)
+    __slots__ = _fields
+    def __init__(self, connections=[], position=NO_POSITION):
         super().__init__(connections=connections, position=position)
 
 class Connection(ASTNode):
     """连接定义"""
-    def __init__(self, name, conn_type, source, target, position={}):
+    _fields = ("name", "conn_type", "source", "target")
+    __slots__ = _fields
+    def __init__(self, name, conn_type, source, target, position=NO_POSITION):
         super().__init__(name=name, conn_type=conn_type, source=source, target=target, position=position)
 
 class AgentRef(ASTNode):
     """代理引用（嵌套结构）"""
-    def __init__(self, parts, position={}):
+    _fields = ("parts",)
+    __slots__ = _fields
+    def __init__(self, parts, position=NO_POSITION):
         super().__init__(parts=parts, position=position)
 
 class FuncDef(ASTNode):
     """函数定义节点"""
-    def __init__(self, name, params=[], return_type="", stmt_body=[], position={}):
+    _fields = ("name", "params", "return_type", "stmt_body")
+    __slots__ = _fields
+    def __init__(self, name, params=[], return_type="", stmt_body=[], position=NO_POSITION):
         super().__init__(name=name, params=params, return_type=return_type, 
                          stmt_body=stmt_body, position=position)
 
 class ParamDecl(ASTNode):
     """参数声明"""
-    def __init__(self, name, param_type="", default_value="", position={}):
+    _fields = ("name", "param_type", "default_value")
+    __slots__ = _fields
+    def __init__(self, name, param_type="", default_value="", position=NO_POSITION):
         super().__init__(name=name, param_type=param_type, default_value=default_value, position=position)
 
 class Stmt(ASTNode):
     """语句基类"""
+    __slots__ = ()
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
 class AssignStmt(Stmt):
     """赋值语句"""
-    def __init__(self, target, var_type="", value="", position={}):
+    _fields = ("target", "var_type", "value")
+    __slots__ = _fields
+    def __init__(self, target, var_type="", value="", position=NO_POSITION):
         super().__init__(target=target, var_type=var_type, value=value, position=position)
 
 class ReturnStmt(Stmt):
     """返回语句"""
-    def __init__(self, value="", position={}):
+    _fields = ("value",)
+    __slots__ = _fields
+    def __init__(self, value="", position=NO_POSITION):
         super().__init__(value=value, position=position)
 
 class IfStmt(Stmt):
     """条件语句"""
-    def __init__(self, condition, body, else_block, position={}):
+    _fields = ("condition", "body", "else_block")
+    __slots__ = _fields
+    def __init__(self, condition, body, else_block, position=NO_POSITION):
         super().__init__(condition=condition, body=body, else_block=else_block, position=position)
 
 class WhileStmt(Stmt):
     """循环语句"""
-    def __init__(self, condition, body, position={}):
+    _fields = ("condition", "body")
+    __slots__ = _fields
+    def __init__(self, condition, body, position=NO_POSITION):
         super().__init__(condition=condition, body=body, position=position)
 
 class ForStmt(Stmt):
     """For 循环"""
-    def __init__(self, iterator, iterable, body, position={}):
+    _fields = ("iterator", "iterable", "body")
+    __slots__ = _fields
+    def __init__(self, iterator, iterable, body, position=NO_POSITION):
         super().__init__(iterator=iterator, iterable=iterable, body=body, position=position)
 
+class ParallelForStmt(Stmt):
+    """并行 For 循环：各次迭代并发执行，最多 limit 个同时运行"""
+    _fields = ("iterator", "iterable", "limit", "body")
+    __slots__ = _fields
+    def __init__(self, iterator, iterable, body, limit="", position=NO_POSITION):
+        super().__init__(iterator=iterator, iterable=iterable, limit=limit, body=body, position=position)
+
 class BreakStmt(Stmt):
     """Break 语句"""
-    def __init__(self, position={}):
+    _fields = ()
+    __slots__ = _fields
+    def __init__(self, position=NO_POSITION):
         super().__init__(position=position)
 
 class ContinueStmt(Stmt):
     """Continue 语句"""
-    def __init__(self, position={}):
+    _fields = ()
+    __slots__ = _fields
+    def __init__(self, position=NO_POSITION):
         super().__init__(position=position)
 
 class TypeDefStmt(Stmt):
     """类型别名语句"""
-    def __init__(self, name, type="", position={}):
+    _fields = ("name", "type")
+    __slots__ = _fields
+    def __init__(self, name, type="", position=NO_POSITION):
         super().__init__(name=name, type=type, position=position)
 
 class Expr(ASTNode):
     """表达式基类"""
+    __slots__ = ()
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
 class BinaryOp(Expr):
     """二元操作表达式"""
-    def __init__(self, left, op, right, position={}):
+    _fields = ("left", "op", "right")
+    __slots__ = _fields
+    def __init__(self, left, op, right, position=NO_POSITION):
         """初始化二元操作表达式"""
         super().__init__(left=left, op=op, right=right, position=position)
 
 class FuncCall(Expr):
     """函数调用表达式"""
-    def __init__(self, func_name, args=[], position={}):
+    _fields = ("func_name", "args")
+    __slots__ = _fields
+    def __init__(self, func_name, args=[], position=NO_POSITION):
         super().__init__(func_name=func_name, args=args, position=position)
 
 class Identifier(Expr):
     """标识符"""
-    def __init__(self, name, position={}):
+    _fields = ("name",)
+    __slots__ = _fields
+    def __init__(self, name, position=NO_POSITION):
         super().__init__(name=name, position=position)
 
 class Constant(Expr):
     """字面值"""
-    def __init__(self, value, position={}):
+    _fields = ("value",)
+    __slots__ = _fields
+    def __init__(self, value, position=NO_POSITION):
         super().__init__(value=value, position=position)
 
 class ListExpr(Expr):
     """列表表达式"""
-    def __init__(self, elements=[], position={}):
+    _fields = ("elements",)
+    __slots__ = _fields
+    def __init__(self, elements=[], position=NO_POSITION):
         super().__init__(elements=elements, position=position)
 
 class RecordExpr(Expr):
     """记录表达式"""
-    def __init__(self, fields=[], position={}):
+    _fields = ("fields",)
+    __slots__ = _fields
+    def __init__(self, fields=[], position=NO_POSITION):
         super().__init__(fields=fields, position=position)
 
 class InstanceAssign(Expr):
-    def __init__(self, field, value="", position={}):
+    _fields = ("field", "value")
+    __slots__ = _fields
+    def __init__(self, field, value="", position=NO_POSITION):
         super().__init__(field=field, value=value, position=position)
 
 class TupleExpr(Expr):
     """元组表达式"""
-    def __init__(self, elements=[], position={}):
+    _fields = ("elements",)
+    __slots__ = _fields
+    def __init__(self, elements=[], position=NO_POSITION):
         super().__init__(elements=elements, position=position)
 
 class FieldAccess(Expr):
     """字段访问"""
-    def __init__(self, obj, field, position={}):
+    _fields = ("obj", "field")
+    __slots__ = _fields
+    def __init__(self, obj, field, position=NO_POSITION):
         super().__init__(obj=obj, field=field, position=position)
 
 class IndexAccess(Expr):
     """列表访问"""
-    def __init__(self, obj, index, position={}):
+    _fields = ("obj", "index")
+    __slots__ = _fields
+    def __init__(self, obj, index, position=NO_POSITION):
         super().__init__(obj=obj, index=index, position=position)
\ No newline at end of file
@@ -22,6 +22,7 @@ reserved = {
     "list": "TYPE_LIST",
     "unit": "TYPE_UNIT",
     "union": "TYPE_UNION",
+    "stream": "TYPE_STREAM",
     "fun": "FUN",
     "for": "FOR",
     "in": "IN",
@@ -196,4 +197,37 @@ Initialize the lexer.
 lexer = lex.lex()
 lexer.token_original = lexer.token
 lexer.token = lexer_token
-lexer.lineno = 1
\ No newline at end of file
+lexer.lineno = 1
+
+def reset_lexer():
+    """Reset the indentation and line state, so that the lexer can be reused for another source."""
+    indent_stack[:] = [0]
+    lexer.dedent_tokens = []
+    lexer.lineno = 1
+
+def tokenize(source_code):
+    """Lexes the whole source (with INDENT/DEDENT tokens) and returns the list of tokens."""
+    reset_lexer()
+    lexer.input(source_code)
+    tokens = []
+    while True:
+        token = lexer.token()
+        if token is None:
+            return tokens
+        tokens.append(token)
+
+class TokenStream:
+    """
+    Replays a list of tokens produced by `tokenize` through the lexer interface the parser expects,
+    so that lexing and parsing can be run (and measured) as separate phases.
+    """
+    def __init__(self, tokens, source_code):
+        self._tokens = iter(tokens)
+        self.lexdata = source_code
+        self.lineno = 1
+
+    def input(self, data):
+        self.lexdata = data
+
+    def token(self):
+        return next(self._tokens, None)
@@ -7,7 +7,7 @@ Last edited: 2025-6-2
 
 import ply.yacc as yacc
 from pllm_parser.pllm_ast import *
-from pllm_parser.pllm_lexer import lexer, tokens
+from pllm_parser.pllm_lexer import lexer, tokens, reset_lexer, TokenStream
 
 """
 Precedence and associativity of operators
@@ -154,7 +154,7 @@ def p_input_block_error(p):
     '''input_block : INPUT COLON INDENT error DEDENT'''
     p[0] = InputBlock(variables=[],
                       position=get_position(p))
-    parse_errors.append({**get_position(p), "message": "Invalid variable declaration in input block"})
+    parse_errors.append({**position_to_dict(get_position(p)), "message": "Invalid variable declaration in input block"})
 
 def p_output_block(p):
     '''output_block : OUTPUT COLON INDENT var_decl_list DEDENT'''
@@ -164,7 +164,7 @@ def p_output_block_error(p):
     '''output_block : OUTPUT COLON INDENT error DEDENT'''
     p[0] = OutputBlock(variables=[],
                       position=get_position(p))
-    parse_errors.append({**get_position(p), "message": "Invalid variable declaration in output block"})
+    parse_errors.append({**position_to_dict(get_position(p)), "message": "Invalid variable declaration in output block"})
 
 def p_model_block(p):
     '''model_block : MODEL COLON constant'''
@@ -174,7 +174,7 @@ def p_model_block_error(p):
     '''model_block : MODEL COLON error'''
     p[0] = ModelBlock(model_name="",
                       position=get_position(p))
-    parse_errors.append({**get_position(p), "message": "Invalid model name"})
+    parse_errors.append({**position_to_dict(get_position(p)), "message": "Invalid model name"})
 
 def p_chat_block(p):
     '''chat_block : CHAT identifier COLON TRIPLE_STRING
@@ -198,9 +198,17 @@ def p_connection_list(p):
         p[0] = [p[1]]
 
 def p_connection(p):
-    '''connection : identifier COLON type INDENT agent_ref ARROW agent_ref DEDENT'''
+    '''connection : identifier COLON conn_type INDENT agent_ref ARROW agent_ref DEDENT'''
     p[0] = Connection(name=p[1], conn_type=p[3], source=p[5], target=p[7], position=get_position(p))
 
+def p_conn_type(p):
+    '''conn_type : type
+                 | TYPE_STREAM LBRACKET type RBRACKET'''
+    if len(p) == 5:
+        p[0] = f"stream[{p[3]}]"
+    else:
+        p[0] = p[1]
+
 def p_agent_ref(p):
     '''agent_ref : identifier agent_ref_tail'''
     p[0] = AgentRef(parts=[p[1]] + p[2], position=get_position(p))
@@ -232,13 +240,13 @@ def p_func_def_error(p):
                        stmt_body=p[9],
                        position=get_position(p))
         p[0].params.append()
-        parse_errors.append({**get_position(p), "message": "Invalid parameter list in function definition"})
+        parse_errors.append({**position_to_dict(get_position(p)), "message": "Invalid parameter list in function definition"})
     else:
         p[0] = FuncDef(name=p[2], params=[],
                        stmt_body=p[7],
                        position=get_position(p))
         p[0].params.append()
-        parse_errors.append({**get_position(p), "message": "Invalid parameter list in function definition"})
+        parse_errors.append({**position_to_dict(get_position(p)), "message": "Invalid parameter list in function definition"})
 
 def p_param_list(p):
     '''param_list : param_decl param_list_tail
@@ -274,6 +282,7 @@ def p_statement_list(p):
 
 def p_statement(p):
     '''statement : for_stmt
+                 | parallel_for_stmt
                  | if_stmt
                  | while_stmt
                  | assign_stmt
@@ -302,12 +311,12 @@ def p_assign_stmt_error(p):
         p[0] = AssignStmt(target=p[1], var_type=p[3],
                           value="",
                           position=get_position(p))
-        parse_errors.append({**get_position(p), "message": "Invalid expression in assignment"})
+        parse_errors.append({**position_to_dict(get_position(p)), "message": "Invalid expression in assignment"})
     else:
         p[0] = AssignStmt(target=p[1],
                           value="",
                           position=get_position(p))
-        parse_errors.append({**get_position(p), "message": "Invalid expression in assignment"})
+        parse_errors.append({**position_to_dict(get_position(p)), "message": "Invalid expression in assignment"})
 
 def p_assign_target(p):
     '''assign_target : identifier 
@@ -327,7 +336,37 @@ def p_for_stmt_error(p):
     '''for_stmt : FOR identifier IN error COLON stmt_block'''
     p[0] = ForStmt(iterator=p[2], iterable="",
                    body=p[6], position=get_position(p))
-    parse_errors.append({**get_position(p), "message": "Invalid iterable in For"})
+    parse_errors.append({**position_to_dict(get_position(p)), "message": "Invalid iterable in For"})
+
+def p_parallel_for_stmt(p):
+    '''parallel_for_stmt : IDENTIFIER FOR identifier IN expr IDENTIFIER expr COLON parallel_block
+                         | IDENTIFIER FOR identifier IN expr COLON parallel_block'''
+    # parallel 与 limit 不是保留字，按上下文识别，仍可用作变量名
+    if p[1] != "parallel":
+        parse_errors.append({**position_to_dict(get_position(p)), "message": f"Expected 'parallel' before 'for', got '{p[1]}'"})
+    if len(p) == 10:
+        if p[6] != "limit":
+            parse_errors.append({**position_to_dict(get_position(p)), "message": f"Expected 'limit' in parallel for, got '{p[6]}'"})
+        p[0] = ParallelForStmt(iterator=p[3], iterable=p[5], limit=p[7], body=p[9], position=get_position(p))
+    else:
+        p[0] = ParallelForStmt(iterator=p[3], iterable=p[5], body=p[7], position=get_position(p))
+
+def p_parallel_block(p):
+    '''parallel_block : INDENT parallel_item_list DEDENT'''
+    p[0] = p[2]
+
+def p_parallel_item_list(p):
+    '''parallel_item_list : parallel_item parallel_item_list
+                          | parallel_item'''
+    if len(p) == 3:
+        p[0] = [p[1]] + p[2]
+    else:
+        p[0] = [p[1]]
+
+def p_parallel_item(p):
+    '''parallel_item : statement
+                     | chat_block'''
+    p[0] = p[1]
 
 def p_break_stmt(p):
     '''break_stmt : BREAK'''
@@ -351,11 +390,11 @@ def p_if_stmt_error(p):
     if len(p) == 8:
         p[0] = IfStmt(condition="",
                       body=p[4], else_block=p[7], position=get_position(p))
-        parse_errors.append({**get_position(p), "message": "Invalid condition of If"})
+        parse_errors.append({**position_to_dict(get_position(p)), "message": "Invalid condition of If"})
     else:
         p[0] = IfStmt(condition="",
                       body=p[4], else_block=None, position=get_position(p))
-        parse_errors.append({**get_position(p), "message": "Invalid condition of If"})
+        parse_errors.append({**position_to_dict(get_position(p)), "message": "Invalid condition of If"})
 
 def p_while_stmt(p):
     '''while_stmt : WHILE expr COLON stmt_block'''
@@ -365,7 +404,7 @@ def p_while_stmt_error(p):
     '''while_stmt : WHILE error COLON stmt_block'''
     p[0] = WhileStmt(condition="",
                      body=p[4], position=get_position(p))
-    parse_errors.append({**get_position(p), "message": "Invalid condition of While"})
+    parse_errors.append({**position_to_dict(get_position(p)), "message": "Invalid condition of While"})
 
 def p_expr(p):
     '''expr : expr bin_op expr_tail
@@ -512,16 +551,16 @@ TODO: Implement column information. PLY does not provide column information by d
 """
 def get_position(p, start_idx=1, end_idx=None):
     def find_leftmost(obj):
-        if hasattr(obj, "position") and obj.position and obj.position["start"]["line"] > 0:
-            return obj.position["start"]
+        if hasattr(obj, "position") and obj.position and obj.position[0][0] > 0:
+            return obj.position[0]
         elif isinstance(obj, list) and obj:
             return find_leftmost(obj[0])
         else:
             return None
 
     def find_rightmost(obj):
-        if hasattr(obj, "position") and obj.position and obj.position["end"]["line"] > 0:
-            return obj.position["end"]
+        if hasattr(obj, "position") and obj.position and obj.position[1][0] > 0:
+            return obj.position[1]
         elif isinstance(obj, list) and obj:
             return find_rightmost(obj[-1])
         else:
@@ -535,7 +574,8 @@ def get_position(p, start_idx=1, end_idx=None):
         right = find_rightmost(p[end_idx])
 
         if left and right:
-            return {"start": left, "end": right}
+            # 直接复用子节点的位置元组
+            return (left, right)
 
         start_lineno = p.lineno(start_idx)
         start_lexpos = p.lexpos(start_idx)
@@ -546,15 +586,9 @@ def get_position(p, start_idx=1, end_idx=None):
         start_column = start_lexpos - start_line_start + 1
         end_line_start = data.rfind('\n', 0, end_lexpos) + 1
         end_column = end_lexpos - end_line_start + len(str(p[end_idx]))
-        return {
-            "start": {"line": start_lineno, "column": start_column},
-            "end": {"line": end_lineno, "column": end_column}
-        }
+        return ((start_lineno, start_column), (end_lineno, end_column))
     except Exception:
-        return {
-            "start": {"line": 0, "column": 0},
-            "end": {"line": 0, "column": 0}
-        }
+        return NO_POSITION
 
 """
 Construct the parser.
@@ -571,5 +605,16 @@ def parse(source_code):
     """
     global parse_errors
     parse_errors = []
+    reset_lexer()
     result = parser.parse(source_code, lexer=lexer)
-    return result, parse_errors
\ No newline at end of file
+    return result, parse_errors
+
+def parse_tokens(token_list, source_code):
+    """
+    Parses a token list produced by `pllm_lexer.tokenize(source_code)`.
+    Returns the same (AST, parse errors) tuple as `parse`.
+    """
+    global parse_errors
+    parse_errors = []
+    result = parser.parse(lexer=TokenStream(token_list, source_code))
+    return result, parse_errors
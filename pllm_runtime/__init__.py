@@ -0,0 +1,43 @@
+"""
+Runtime support shared by all programs generated by the PLLM compiler.
+Generated code imports only the names it references, e.g. `from pllm_runtime import chat, execute`.
+"""
+import importlib
+from pllm_runtime.built_in import *
+from pllm_runtime.built_in import __all__ as BUILT_INS
+
+__version__ = "1.0.0"
+
+# 执行器与 LLM 客户端依赖 asyncio，在首次访问时才导入：只用到内置函数的程序启动时不必加载它们
+_LAZY_NAMES = {
+    "AgentTimeoutError": "pllm_runtime.timeouts",
+    "emit_stream": "pllm_runtime.streams",
+    "execute": "pllm_runtime.executor",
+    "iterate_stream": "pllm_runtime.streams",
+    "Endpoint": "pllm_runtime.routing",
+    "HedgePolicy": "pllm_runtime.hedging",
+    "Router": "pllm_runtime.routing",
+    "Stream": "pllm_runtime.streams",
+    "SYS_PROMPT": "pllm_runtime.llm",
+    "chat": "pllm_runtime.llm",
+    "close_clients": "pllm_runtime.llm",
+    "get_client": "pllm_runtime.llm",
+    "parallel_map": "pllm_runtime.parallel",
+    "parse_completions": "pllm_runtime.llm",
+    "set_client_factory": "pllm_runtime.llm",
+    "set_hedging": "pllm_runtime.llm",
+    "set_router": "pllm_runtime.llm",
+    "subgraph": "pllm_runtime.executor",
+    "TimeoutPolicy": "pllm_runtime.timeouts",
+}
+
+def __getattr__(name):
+    module_name = _LAZY_NAMES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_NAMES))
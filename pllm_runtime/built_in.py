@@ -1,62 +1,19 @@
-# import 
-from openai import AsyncOpenAI
-import asyncio
-from typing import *
-from config import API_KEY, BASE_URL
+"""
+Public built-in functions callable from PLLM programs.
+Their type signatures are declared in type_system/built_in_sig.json.
+"""
 
-SYS_PROMPT = """You are an AI assistant designed to generate structured outputs. 
-Complete the contents of all `<completionK>` tags in order.
-For example, you should respond as follows:
-<completion0>...</completion0>
-<completion1>...</completion1>
-Do not include any additional explanation or text outside the `<completion>` tags.
-Ensure all `<completionK>` tags are present, even if the values are empty or null. Missing values should be represented by an empty string within the `<completion>` tags.
-Follow this sequence strictly and do not deviate from the provided instructions."""
+__all__ = [
+    "read_file",
+    "write_file",
+    "append_file",
+    "read_lines",
+    "write_lines",
+    "int_to_str",
+    "str_to_int",
+    "console",
+]
 
-# private
-async def execute(graph, param_mapping):
-    """
-    异步执行一个有向无环图 (DAG) 结构的 agent 函数，根据参数映射将输出作为输入传递。
-
-    参数:
-        graph (dict): 表示 DAG 的字典，键为 agent 名称，值为依赖的 agent 名称列表（邻居）。
-        param_mapping (dict): 指定每个 agent 输入参数如何从其他 agent 的输出获取的映射。
-            格式: {agent_name: {param_name: (source_agent, source_output)}}
-
-    返回:
-        dict: 一个字典，将每个 agent 名称映射到其输出（即对应 agent 函数的返回值）。
-
-    说明:
-        - agent 函数必须在全局作用域中定义，并且是可 await 的 (async) 。
-        - 执行顺序遵循 graph 中定义的依赖关系。
-        - 所有无依赖的 agent 会首先执行；有依赖的 agent 会在其依赖项完成后执行。
-    """
-    agent_outputs = {}
-    in_degree = {node: 0 for node in graph}
-    for node, neighbors in graph.items():
-        for neighbor in neighbors:
-            in_degree[neighbor] += 1
-    queue = [node for node in graph if in_degree[node] == 0]
-    async def execute_agent(agent_name):
-        inputs = {}
-        if agent_name in param_mapping:
-            for param_name, (source_agent, source_output) in param_mapping[agent_name].items():
-                inputs[param_name] = agent_outputs[source_agent][source_output]
-        agent_outputs[agent_name] = await globals()[agent_name](**inputs)
-    while queue:
-        current_batch = queue[:]
-        queue = []
-        tasks = []
-        for agent in current_batch:
-            tasks.append(asyncio.create_task(execute_agent(agent)))
-            for neighbor in graph[agent]:
-                in_degree[neighbor] -= 1
-                if in_degree[neighbor] == 0:
-                    queue.append(neighbor)
-        await asyncio.gather(*tasks)
-    return agent_outputs
-
-# public
 def read_file(file_path: str) -> str:
     """
     Reads the content of a file and returns it as a string.
@@ -150,4 +107,4 @@ def console(input) -> None:
     Args:
         input (Any): The input to print.
     """
-    print(input)
\ No newline at end of file
+    print(input)
@@ -0,0 +1,150 @@
+"""
+Per-agent checkpoints of agent-graph runs, so that a failed run can be resumed without repeating
+the agents (and LLM calls) that had already completed.
+
+Checkpoints are stored in a SQLite file, keyed by run ID and agent name. Each entry records a hash
+of the agent's code and of its inputs; on resume an agent is skipped only if both still match,
+otherwise the checkpoint is stale and the agent runs again.
+
+MemoStore memoizes agent outputs across runs instead, keyed by the agent fingerprints the compiler
+emits (`agent_fingerprints`) and the hash of the inputs: after editing one agent of a program, only
+that agent and the agents whose inputs change as a result run again.
+"""
+import hashlib
+import json
+import sqlite3
+import time
+
+def _hash_code(code, digest) -> None:
+    digest.update(code.co_code)
+    digest.update(repr(code.co_names).encode())
+    for const in code.co_consts:
+        # 嵌套的代码对象（内部函数、推导式）的 repr 含有内存地址，递归哈希其内容
+        if hasattr(const, "co_code"):
+            _hash_code(const, digest)
+        else:
+            digest.update(repr(const).encode())
+
+def _inputs_json(inputs: dict) -> str:
+    return json.dumps(inputs, sort_keys=True, default=repr)
+
+def input_hash(agent_name: str, agent, inputs: dict) -> str:
+    """Hash of an agent invocation: its name, its code and its inputs."""
+    digest = hashlib.sha256(agent_name.encode())
+    code = getattr(agent, "__code__", None)
+    if code is not None:
+        _hash_code(code, digest)
+    digest.update(_inputs_json(inputs).encode())
+    return digest.hexdigest()
+
+def memo_key(fingerprint: str, inputs: dict) -> str:
+    """Memoization key of an agent invocation: the agent's compiler fingerprint and its inputs."""
+    return hashlib.sha256(f"{fingerprint}:{_inputs_json(inputs)}".encode()).hexdigest()
+
+def _encode_outputs(agent_name: str, outputs):
+    try:
+        return json.dumps(outputs)
+    except (TypeError, ValueError):
+        print(f"Warning: outputs of agent '{agent_name}' cannot be recorded.")
+        return None
+
+class CheckpointStore:
+    """
+    Checkpoints of one run in a SQLite file.
+    Args:
+        path (str): The SQLite file; created if it does not exist.
+        run_id (str): Identifies the run; one file can hold the checkpoints of many runs.
+        resume (bool): Reuse the checkpoints already recorded for run_id. Otherwise they are
+            discarded and the run starts from scratch.
+    """
+    def __init__(self, path: str, run_id: str, resume: bool = False):
+        self.path = path
+        self.run_id = run_id
+        self.reused = []
+        self.stale = []
+        self._connection = sqlite3.connect(path)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS checkpoints ("
+            "run_id TEXT, agent TEXT, input_hash TEXT, outputs TEXT, finished_at REAL, "
+            "PRIMARY KEY (run_id, agent))"
+        )
+        if not resume:
+            self._connection.execute("DELETE FROM checkpoints WHERE run_id = ?", (run_id,))
+        self._connection.commit()
+
+    def load(self, agent_name: str, digest: str):
+        """
+        Returns (True, outputs) if the agent completed in this run with the same input hash,
+        otherwise (False, None).
+        """
+        row = self._connection.execute(
+            "SELECT input_hash, outputs FROM checkpoints WHERE run_id = ? AND agent = ?",
+            (self.run_id, agent_name),
+        ).fetchone()
+        if row is None:
+            return False, None
+        if row[0] != digest:
+            self.stale.append(agent_name)
+            return False, None
+        self.reused.append(agent_name)
+        return True, json.loads(row[1])
+
+    def save(self, agent_name: str, digest: str, outputs) -> bool:
+        """Records the outputs of a completed agent. Outputs that are not JSON serializable are not recorded."""
+        encoded = _encode_outputs(agent_name, outputs)
+        if encoded is None:
+            return False
+        self._connection.execute(
+            "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?)",
+            (self.run_id, agent_name, digest, encoded, time.time()),
+        )
+        # 每个 agent 完成后立即提交，运行中途失败时已完成的结果不会丢失
+        self._connection.commit()
+        return True
+
+    def completed(self) -> list:
+        """Names of the agents recorded for this run."""
+        rows = self._connection.execute("SELECT agent FROM checkpoints WHERE run_id = ?", (self.run_id,))
+        return [row[0] for row in rows]
+
+    def close(self) -> None:
+        self._connection.close()
+
+class MemoStore:
+    """
+    Agent outputs memoized across runs in a SQLite file (may be the same file as the checkpoints).
+    Args:
+        path (str): The SQLite file; created if it does not exist.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        # 命中与未命中的次数；长时间运行的数据集与服务只需计数，不保留 agent 名
+        self.hits = 0
+        self.misses = 0
+        self._connection = sqlite3.connect(path)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS memo (key TEXT PRIMARY KEY, agent TEXT, outputs TEXT, created_at REAL)"
+        )
+        self._connection.commit()
+
+    def load(self, agent_name: str, key: str):
+        """Returns (True, outputs) if outputs are memoized under key, otherwise (False, None)."""
+        row = self._connection.execute("SELECT outputs FROM memo WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return False, None
+        self.hits += 1
+        return True, json.loads(row[0])
+
+    def save(self, agent_name: str, key: str, outputs) -> bool:
+        encoded = _encode_outputs(agent_name, outputs)
+        if encoded is None:
+            return False
+        self._connection.execute(
+            "INSERT OR REPLACE INTO memo VALUES (?, ?, ?, ?)", (key, agent_name, encoded, time.time())
+        )
+        self._connection.commit()
+        return True
+
+    def close(self) -> None:
+        self._connection.close()
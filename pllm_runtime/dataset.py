@@ -0,0 +1,125 @@
+"""
+Dataset mode: runs a compiled agent graph once per record of a JSONL or CSV file.
+
+Each record supplies the inputs of the agents that are not fed by connections (usually the root
+agents): a key "agent.param" sets that parameter of that agent, a plain key "param" sets the
+parameter of that name of every agent that has one. Records are read lazily and run concurrently,
+at most `window` at a time, so each record moves through the graph independently of the others and
+memory stays bounded regardless of the size of the file. For every record one JSON line is written
+with its index and the outputs of the output agents (see output_agents), or the error that ended its run.
+"""
+import asyncio
+import csv
+import inspect
+import json
+import time
+from pllm_runtime.executor import execute
+
+def read_records(path: str):
+    """Yields the records of a JSONL file (one JSON object per line) or a CSV file with a header."""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if path.endswith(".csv"):
+            yield from csv.DictReader(f)
+            return
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError(f"{path}:{line_number}: expected a JSON object per line.")
+            yield record
+
+def free_parameters(graph: dict, param_mapping: dict, agents: dict) -> dict:
+    """{agent name: [parameters not fed by a connection]} for the agents of the graph."""
+    free = {}
+    for agent_name in graph:
+        connected = param_mapping.get(agent_name, {})
+        params = [name for name in inspect.signature(agents[agent_name]).parameters if name not in connected]
+        if params:
+            free[agent_name] = params
+    return free
+
+def record_inputs(record: dict, free: dict) -> dict:
+    """Maps the fields of a record to {agent name: {param: value}}; fields matching no parameter are ignored."""
+    inputs = {}
+    for key, value in record.items():
+        agent_name, sep, param = key.partition(".")
+        if sep:
+            if param in free.get(agent_name, ()):
+                inputs.setdefault(agent_name, {})[param] = value
+            continue
+        for agent_name, params in free.items():
+            if key in params:
+                inputs.setdefault(agent_name, {})[key] = value
+    return inputs
+
+def sink_agents(graph: dict) -> list:
+    return [agent_name for agent_name, consumers in graph.items() if not consumers]
+
+def output_agents(namespace: dict) -> list:
+    """The outputs requested when compiling (graph_outputs, see compile.py --outputs), or the sink agents."""
+    return namespace.get("graph_outputs") or sink_agents(namespace["graph"])
+
+class DatasetStats:
+    def __init__(self):
+        self.records = 0
+        self.errors = 0
+        self.start = time.perf_counter()
+
+    def report(self) -> str:
+        seconds = time.perf_counter() - self.start
+        rate = self.records / seconds if seconds else 0.0
+        return f"{self.records} record(s) in {seconds:.2f} s ({rate:.1f}/s), {self.errors} error(s)."
+
+async def run_dataset(namespace: dict, records, output, window: int = 32, ordered: bool = False,
+                      **execute_options) -> DatasetStats:
+    """
+    Runs the graph of a loaded program (namespace) for every record and writes one JSON line per
+    record to the text file `output`.
+    Args:
+        window (int): Maximum number of records in flight.
+        ordered (bool): Write the results in input order; results that finish early wait for the
+            earlier records and keep their slot in the window meanwhile. Otherwise results are
+            written as they finish.
+        execute_options: Passed on to execute (memo, timeouts).
+    """
+    graph, param_mapping = namespace["graph"], namespace["param_mapping"]
+    free = free_parameters(graph, param_mapping, namespace)
+    targets = output_agents(namespace)
+    stats = DatasetStats()
+    slots = asyncio.Semaphore(window)
+    finished = {}
+    next_index = 0
+
+    def write(index: int, line: str) -> None:
+        nonlocal next_index
+        if not ordered:
+            output.write(line + "\n")
+            slots.release()
+            return
+        finished[index] = line
+        while next_index in finished:
+            output.write(finished.pop(next_index) + "\n")
+            next_index += 1
+            slots.release()
+
+    async def run_record(index: int, record: dict) -> None:
+        try:
+            outputs = await execute(graph, param_mapping, namespace, inputs=record_inputs(record, free),
+                                    keep=targets, **execute_options)
+            result = {"index": index, "outputs": {name: outputs.get(name) for name in targets}}
+        except Exception as e:
+            stats.errors += 1
+            result = {"index": index, "error": f"{type(e).__name__}: {e}"}
+        stats.records += 1
+        write(index, json.dumps(result, ensure_ascii=False, default=repr))
+
+    tasks = set()
+    for index, record in enumerate(records):
+        await slots.acquire()
+        task = asyncio.create_task(run_record(index, record))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    if tasks:
+        await asyncio.wait(tasks)
+    return stats
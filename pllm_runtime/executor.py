@@ -0,0 +1,227 @@
+import asyncio
+import time
+
+def subgraph(graph, param_mapping, targets):
+    """
+    只保留计算 targets 中的 agent 所需的部分：targets 及其沿连接反向可达的全部上游 agent。
+
+    参数:
+        graph (dict), param_mapping (dict): 与 execute 相同。
+        targets (iterable): 需要其输出的 agent 名称。
+
+    返回:
+        tuple: (graph, param_mapping)，只包含所需的 agent，targets 中的 agent 可能不再是汇点。
+    """
+    needed = set()
+    stack = list(targets)
+    while stack:
+        agent_name = stack.pop()
+        if agent_name in needed:
+            continue
+        if agent_name not in graph:
+            raise ValueError(f"No agent named '{agent_name}' in the graph.")
+        needed.add(agent_name)
+        stack.extend(source_agent for source_agent, _ in param_mapping.get(agent_name, {}).values())
+    return ({agent_name: [n for n in neighbors if n in needed] for agent_name, neighbors in graph.items() if agent_name in needed},
+            {agent_name: mapping for agent_name, mapping in param_mapping.items() if agent_name in needed})
+
+async def execute(graph, param_mapping, agents, checkpoint=None, memo=None, timeouts=None, inputs=None, keep=None,
+                  targets=None, stream_buffer=16):
+    """
+    异步执行一个有向无环图 (DAG) 结构的 agent 函数，根据参数映射将输出作为输入传递。
+
+    参数:
+        graph (dict): 表示 DAG 的字典，键为 agent 名称，值为依赖的 agent 名称列表（邻居）。
+        param_mapping (dict): 指定每个 agent 输入参数如何从其他 agent 的输出获取的映射。
+            格式: {agent_name: {param_name: (source_agent, source_output)}}
+        agents (dict): agent 名称到 agent 函数的映射，生成的程序传入自身的 globals()。
+        checkpoint (CheckpointStore): 可选。每个 agent 完成后记录其输出；已记录且代码与输入未变的
+            agent 不再执行，直接使用记录的输出（见 pllm_runtime.checkpoint）。
+        memo (MemoStore): 可选。按编译器生成的 agents["agent_fingerprints"] 与输入的哈希跨运行缓存
+            agent 的输出；指纹与输入都未变的 agent 不再执行。没有指纹的 agent 不参与缓存。
+        timeouts (TimeoutPolicy): 可选。限制每个 agent 的运行时间与整个运行的截止时间，超时的 agent
+            被取消（其中进行中的 chat 请求随之取消），并按策略使运行失败、重试或以空字符串作为输出
+            继续（见 pllm_runtime.timeouts）。以空输出继续的 agent 不写入检查点与缓存。
+        inputs (dict): 可选。不由连接提供的 agent 输入参数的值，格式: {agent_name: {param_name: value}}，
+            例如数据集模式中每条记录提供给根 agent 的输入。
+        keep (iterable): 可选。需要返回其输出的 agent，默认为汇点 agent（没有下游的 agent）。
+        targets (iterable): 可选。按需求值：只运行计算这些 agent 所需的子图（见 subgraph），并返回
+            它们的输出（作为 keep）。不被 targets 依赖的 agent 即使有副作用也不会运行。
+        stream_buffer (int): 流式连接（编译器生成的 agents["stream_mapping"]，即 connect 块中
+            stream[T] 类型的连接）的队列容量；队列满时上游 agent 等待下游读取。
+
+    返回:
+        dict: 一个字典，将 keep 中的每个 agent 名称映射到其输出（即对应 agent 函数的返回值）。
+
+    说明:
+        - agent 函数必须是可 await 的 (async) 。
+        - 执行顺序遵循 graph 中定义的依赖关系。
+        - 所有无依赖的 agent 会首先执行；有依赖的 agent 在其依赖项完成后立即执行。
+        - 通过流式连接读取的 agent 在上游 agent 开始运行时即开始，边产生边读取列表元素（见
+          pllm_runtime.streams）。这样的 agent 不写入检查点与缓存，超时时也不重试。
+        - 流式连接的上游 agent 一旦送出了元素，超时时既不重试也不以空输出继续，而是使运行失败：
+          下游已读取的元素无法撤回，重试或空输出会使下游看到两次运行混合的结果。
+        - 任一 agent 失败时，仍在运行的 agent 会被取消，异常由 execute 抛出。
+        - 中间结果按 param_mapping 做引用计数：每个输出在最后一个读取它的 agent 开始运行后即被释放，
+          没有 agent 读取的输出在产生时即被丢弃，以降低大字符串中间结果的内存峰值。
+    """
+    if targets is not None:
+        keep = list(targets)
+        graph, param_mapping = subgraph(graph, param_mapping, keep)
+    if checkpoint is not None:
+        from pllm_runtime.checkpoint import input_hash
+    if memo is not None:
+        from pllm_runtime.checkpoint import memo_key
+        fingerprints = agents.get("agent_fingerprints", {})
+    if timeouts is not None:
+        from pllm_runtime.timeouts import AgentTimeoutError
+        run_deadline = timeouts.start()
+    fallbacks = set()
+    agent_outputs = {}
+    keep = {node for node, neighbors in graph.items() if not neighbors} if keep is None else set(keep)
+    streamed = {(agent_name, param_name) for agent_name, params in agents.get("stream_mapping", {}).items()
+                for param_name in params if param_name in param_mapping.get(agent_name, ())}
+    # 同一对 agent 之间还有普通连接时下游须等上游完成，不能流式读取（否则上游在队列满时阻塞）
+    streamed = {(agent_name, param_name) for agent_name, param_name in streamed
+                if all((agent_name, name) in streamed for name, (source, _) in param_mapping[agent_name].items()
+                       if source == param_mapping[agent_name][param_name][0])}
+    # 每个 (agent, 输出) 尚未开始运行的读取者数量；流式连接的读取者从队列读取，不计入
+    readers = {}
+    for agent_name, mapping in param_mapping.items():
+        for param_name, source in mapping.items():
+            if (agent_name, param_name) not in streamed:
+                readers[source] = readers.get(source, 0) + 1
+    # 开始运行前需等待其完成的上游 agent，与只需其已开始运行的上游 agent（只经流式连接相连）
+    after_done = {node: set() for node in graph}
+    after_start = {node: set() for node in graph}
+    for node, neighbors in graph.items():
+        for neighbor in neighbors:
+            after_done[neighbor].add(node)
+    streams, writers = {}, {}
+    if streamed:
+        from pllm_runtime.streams import Stream, StreamWriter, stream_writers
+    for agent_name, param_name in streamed:
+        source_agent, source_output = param_mapping[agent_name][param_name]
+        streams[agent_name, param_name] = Stream(stream_buffer)
+        writer = writers.setdefault(source_agent, {}).setdefault(source_output, StreamWriter())
+        writer.streams.append(streams[agent_name, param_name])
+        after_done[agent_name].discard(source_agent)
+        after_start[agent_name].add(source_agent)
+    stream_consumers = {agent_name for agent_name, _ in streamed}
+    def store(agent_name, outputs):
+        if agent_name in keep:
+            agent_outputs[agent_name] = outputs
+            return
+        consumed = {name: value for name, value in (outputs or {}).items() if (agent_name, name) in readers}
+        if consumed:
+            agent_outputs[agent_name] = consumed
+    def release(sources):
+        for source in sources:
+            readers[source] -= 1
+            source_agent, source_output = source
+            if readers[source] == 0 and source_agent not in keep:
+                del agent_outputs[source_agent][source_output]
+                if not agent_outputs[source_agent]:
+                    del agent_outputs[source_agent]
+    async def run_agent(agent_name, inputs):
+        if timeouts is None:
+            return await agents[agent_name](**inputs)
+        retries = 0
+        while True:
+            budget = timeouts.budget(agent_name, run_deadline)
+            try:
+                return await asyncio.wait_for(agents[agent_name](**inputs), budget)
+            except asyncio.TimeoutError:
+                timeouts.timed_out[agent_name] += 1
+            # 已经送出流式元素的上游 agent 不能重试或以空输出继续：下游已读取了本次运行的部分元素
+            streamed_out = any(writer.sent > 0 for writer in writers.get(agent_name, {}).values())
+            if timeouts.on_timeout == "retry" and retries < timeouts.retries and agent_name not in stream_consumers \
+                    and not streamed_out and (run_deadline is None or time.monotonic() < run_deadline):
+                retries += 1
+                continue
+            if timeouts.on_timeout == "fallback" and not streamed_out:
+                # 与 chat 出错时一致：下游读取的每个输出都为空字符串
+                fallbacks.add(agent_name)
+                return {source_output: ""
+                        for mapping in param_mapping.values()
+                        for source_agent, source_output in mapping.values() if source_agent == agent_name}
+            raise AgentTimeoutError(agent_name, budget)
+    external_inputs = inputs or {}
+    async def outputs_of(agent_name, inputs):
+        if (checkpoint is None and memo is None) or agent_name in stream_consumers:
+            return await run_agent(agent_name, inputs)
+        if checkpoint is not None:
+            digest = input_hash(agent_name, agents[agent_name], inputs)
+            found, outputs = checkpoint.load(agent_name, digest)
+            if found:
+                return outputs
+        found, key = False, None
+        if memo is not None and agent_name in fingerprints:
+            key = memo_key(fingerprints[agent_name], inputs)
+            found, outputs = memo.load(agent_name, key)
+        if not found:
+            outputs = await run_agent(agent_name, inputs)
+            if key is not None and agent_name not in fallbacks:
+                memo.save(agent_name, key, outputs)
+        if checkpoint is not None and agent_name not in fallbacks:
+            checkpoint.save(agent_name, digest, outputs)
+        return outputs
+    async def execute_agent(agent_name):
+        inputs = dict(external_inputs.get(agent_name, ()))
+        if agent_name in param_mapping:
+            read = []
+            for param_name, source in param_mapping[agent_name].items():
+                if (agent_name, param_name) in streams:
+                    inputs[param_name] = streams[agent_name, param_name]
+                    continue
+                source_agent, source_output = source
+                inputs[param_name] = agent_outputs[source_agent][source_output]
+                read.append(source)
+            release(read)
+        agent_writers = writers.get(agent_name)
+        if agent_writers:
+            stream_writers.set(agent_writers)
+        try:
+            outputs = await outputs_of(agent_name, inputs)
+        finally:
+            for param_name in param_mapping.get(agent_name, ()):
+                if (agent_name, param_name) in streams:
+                    streams[agent_name, param_name].abandon()
+        if agent_writers:
+            # 发送尚未发送的元素（例如输出来自检查点或缓存）并结束流
+            for output_name, writer in agent_writers.items():
+                await writer.close((outputs or {}).get(output_name))
+        store(agent_name, outputs)
+    pending = {node: len(after_done[node]) + len(after_start[node]) for node in graph}
+    on_start = {node: [] for node in graph}
+    on_done = {node: [] for node in graph}
+    for node in graph:
+        for source in after_start[node]:
+            on_start[source].append(node)
+        for source in after_done[node]:
+            on_done[source].append(node)
+    running = {}
+    def start(agent_name):
+        running[asyncio.create_task(execute_agent(agent_name))] = agent_name
+        for node in on_start[agent_name]:
+            pending[node] -= 1
+            if pending[node] == 0:
+                start(node)
+    for node in [node for node in graph if pending[node] == 0]:
+        start(node)
+    try:
+        while running:
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                agent_name = running.pop(task)
+                task.result()
+                for node in on_done[agent_name]:
+                    pending[node] -= 1
+                    if pending[node] == 0:
+                        start(node)
+    except BaseException:
+        for task in running:
+            task.cancel()
+        raise
+    return {agent_name: agent_outputs[agent_name] for agent_name in graph
+            if agent_name in keep and agent_name in agent_outputs}
@@ -0,0 +1,95 @@
+"""
+Hedged chat requests: when a request has not answered within a high percentile of the latencies
+observed so far, a duplicate request is sent (optionally to another endpoint or model); the first
+valid response wins and the other request is cancelled. Enabled with llm.set_hedging(HedgePolicy(...)).
+"""
+import asyncio
+from collections import deque
+
+class LatencyTracker:
+    """Latencies of the most recent successful requests, per model."""
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self._samples = {}
+
+    def record(self, model_name: str, seconds: float) -> None:
+        samples = self._samples.get(model_name)
+        if samples is None:
+            samples = self._samples[model_name] = deque(maxlen=self.window)
+        samples.append(seconds)
+
+    def count(self, model_name: str) -> int:
+        return len(self._samples.get(model_name, ()))
+
+    def percentile(self, model_name: str, p: float):
+        """Nearest-rank percentile of the recorded latencies in seconds; None without samples."""
+        samples = self._samples.get(model_name)
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))]
+
+class HedgePolicy:
+    """
+    When and where to send hedged requests.
+    Args:
+        percentile (float): Hedge once the request has been outstanding longer than this percentile
+            of the recent latencies of its model.
+        min_samples (int): Until this many latencies are recorded, use initial_delay instead.
+        initial_delay (float): Hedge delay in seconds before enough latencies are known.
+        min_delay (float): Lower bound of the hedge delay in seconds, so that hedging does not double
+            the load when the latencies are small and uniform.
+        base_url, api_key (str): Endpoint of the hedged request; defaults to the primary endpoint.
+        model (str): Model of the hedged request; defaults to the model of the chat block.
+    """
+    def __init__(self, percentile: float = 95, min_samples: int = 20, initial_delay: float = 2.0,
+                 min_delay: float = 0.0, base_url: str = None, api_key: str = None, model: str = None):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.base_url = base_url
+        self.api_key = api_key
+        self.model = model
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def delay(self, tracker: LatencyTracker, model_name: str) -> float:
+        if tracker.count(model_name) < self.min_samples:
+            return self.initial_delay
+        return max(self.min_delay, tracker.percentile(model_name, self.percentile))
+
+async def hedged(policy: HedgePolicy, tracker: LatencyTracker, model_name: str, primary, hedge, is_valid):
+    """
+    Runs primary() and, if it has not produced a valid result after the policy's delay (or failed
+    before that), hedge(). Returns the first valid result and cancels the other request. If neither
+    result is valid, returns the last one; if both requests fail, raises the last error.
+    """
+    pending = {asyncio.ensure_future(primary())}
+    hedge_task = None
+    result, error = None, None
+    try:
+        while pending:
+            timeout = policy.delay(tracker, model_name) if hedge_task is None else None
+            done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                try:
+                    result = task.result()
+                except Exception as e:
+                    error = e
+                    continue
+                if is_valid(result):
+                    if task is hedge_task:
+                        policy.hedge_wins += 1
+                    return result
+            if hedge_task is None:
+                # 超过延迟阈值仍未返回，或主请求失败/结果无效：发出对冲请求
+                policy.hedged += 1
+                hedge_task = asyncio.ensure_future(hedge())
+                pending.add(hedge_task)
+        if result is not None:
+            return result
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
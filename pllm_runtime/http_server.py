@@ -0,0 +1,41 @@
+"""
+Minimal HTTP/1.1 on asyncio streams, shared by the local servers of the runtime (mock_llm, serve).
+Supports keep-alive and bodies with Content-Length; no chunked request bodies.
+"""
+import asyncio
+import json
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 429: "Too Many Requests",
+           500: "Internal Server Error", 503: "Service Unavailable", 504: "Gateway Timeout"}
+
+async def read_requests(reader):
+    """Yields (method, path, headers, body) for each request of a connection until it is closed."""
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                return
+            method, path, _ = request_line.decode("latin-1").split(" ", 2)
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            body = await reader.readexactly(int(headers.get("content-length", 0)))
+            yield method, path.split("?")[0], headers, body
+            if headers.get("connection", "").lower() == "close":
+                return
+    except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+        return
+
+def response_head(status: int, headers: dict) -> bytes:
+    lines = [f"HTTP/1.1 {status} {REASONS.get(status, '')}"] + [f"{k}: {v}" for k, v in headers.items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+async def send_json(writer, status: int, payload, extra_headers: dict = None) -> None:
+    body = json.dumps(payload, ensure_ascii=False, default=repr).encode()
+    headers = {"Content-Type": "application/json", "Content-Length": str(len(body)), **(extra_headers or {})}
+    writer.write(response_head(status, headers) + body)
+    await writer.drain()
@@ -0,0 +1,148 @@
+import asyncio
+import re
+import time
+import weakref
+from pllm_runtime.hedging import LatencyTracker, hedged
+
+SYS_PROMPT = """You are an AI assistant designed to generate structured outputs. 
+Complete the contents of all `<completionK>` tags in order.
+For example, you should respond as follows:
+<completion0>...</completion0>
+<completion1>...</completion1>
+Do not include any additional explanation or text outside the `<completion>` tags.
+Ensure all `<completionK>` tags are present, even if the values are empty or null. Missing values should be represented by an empty string within the `<completion>` tags.
+Follow this sequence strictly and do not deviate from the provided instructions."""
+
+# 每个事件循环一组客户端：AsyncOpenAI 的连接池绑定在创建它的事件循环上
+_clients = weakref.WeakKeyDictionary()
+_client_factory = None
+
+def set_client_factory(factory=None):
+    """
+    Replaces the way clients are created: factory(base_url, api_key) must return an object with the
+    AsyncOpenAI chat interface (e.g. mock_llm.FakeAsyncOpenAI). None restores AsyncOpenAI.
+    Clients created before the call are dropped.
+    """
+    global _client_factory
+    _client_factory = factory
+    _clients.clear()
+
+def get_client(base_url=None, api_key=None):
+    """
+    Returns the shared AsyncOpenAI client of the running event loop for the given endpoint,
+    creating it on first use. Defaults to BASE_URL and API_KEY from config.
+    """
+    if _client_factory is None and (base_url is None or api_key is None):
+        from config import API_KEY, BASE_URL
+        base_url = BASE_URL if base_url is None else base_url
+        api_key = API_KEY if api_key is None else api_key
+    loop_clients = _clients.setdefault(asyncio.get_running_loop(), {})
+    client = loop_clients.get((base_url, api_key))
+    if client is None:
+        if _client_factory is not None:
+            client = _client_factory(base_url, api_key)
+        else:
+            from openai import AsyncOpenAI
+            client = AsyncOpenAI(base_url=base_url, api_key=api_key)
+        loop_clients[(base_url, api_key)] = client
+    return client
+
+async def close_clients():
+    """Closes and forgets the clients of the running event loop, e.g. before a long-lived loop is closed."""
+    for client in _clients.pop(asyncio.get_running_loop(), {}).values():
+        await client.close()
+
+# 各模型最近的请求延迟，供对冲策略确定延迟阈值
+latencies = LatencyTracker()
+_hedge_policy = None
+_router = None
+
+def set_router(router=None):
+    """
+    Routes the requests of all chat blocks across the endpoints of the given routing.Router;
+    None sends them to BASE_URL from config again.
+    """
+    global _router
+    _router = router
+
+def set_hedging(policy=None):
+    """
+    Enables hedged requests for all chat blocks with the given hedging.HedgePolicy; None disables them.
+    """
+    global _hedge_policy
+    _hedge_policy = policy
+
+_completion_patterns = []
+
+def _patterns(n_outputs):
+    while len(_completion_patterns) < n_outputs:
+        i = len(_completion_patterns)
+        _completion_patterns.append(re.compile(rf"<completion{i}>(.*?)</completion{i}>", re.DOTALL))
+    return _completion_patterns
+
+def has_all_completions(content, n_outputs):
+    """True if content contains every `<completionK>` tag of the n_outputs outputs."""
+    return all(pattern.search(content) for pattern in _patterns(n_outputs)[:n_outputs])
+
+def parse_completions(content, n_outputs):
+    """
+    Extracts the contents of the `<completion0>` ... `<completion{n_outputs-1}>` tags.
+    Missing tags yield empty strings.
+    """
+    outputs = []
+    for pattern in _patterns(n_outputs)[:n_outputs]:
+        match = pattern.search(content)
+        outputs.append(match.group(1).strip() if match else "")
+    return outputs
+
+async def _request(model_name, prompt, base_url, api_key):
+    response = await get_client(base_url, api_key).chat.completions.create(
+        model=model_name,
+        messages=[
+            {"role": "system", "content": SYS_PROMPT},
+            {"role": "user", "content": prompt}
+        ]
+    )
+    return response.choices[0].message.content
+
+async def complete(model_name, prompt, base_url=None, api_key=None):
+    """
+    Sends one chat request and returns the content of the response, recording its latency.
+    Without an explicit endpoint the request is routed by the router (set_router), if any.
+    """
+    start = time.perf_counter()
+    try:
+        if base_url is None and _router is not None:
+            content = await _router.send(
+                model_name, lambda endpoint, model: _request(model, prompt, endpoint.base_url, endpoint.api_key))
+        else:
+            content = await _request(model_name, prompt, base_url, api_key)
+    except asyncio.CancelledError:
+        # 被取消的慢请求也计入（作为其延迟的下界），否则对冲会使记录的尾部延迟越来越短
+        latencies.record(model_name, time.perf_counter() - start)
+        raise
+    latencies.record(model_name, time.perf_counter() - start)
+    return content
+
+async def chat(model_name, prompt, n_outputs):
+    """
+    Runs a chat block: sends the prompt to the model and returns the values of its
+    n_outputs `<completionK>` tags in order. On error every output is an empty string.
+    With hedging enabled (set_hedging), a slow request is duplicated and the first response
+    containing every tag is used.
+    """
+    try:
+        policy = _hedge_policy
+        if policy is None:
+            content = await complete(model_name, prompt)
+        else:
+            content = await hedged(
+                policy, latencies, model_name,
+                lambda: complete(model_name, prompt),
+                lambda: complete(policy.model or model_name, prompt, policy.base_url, policy.api_key),
+                lambda content: has_all_completions(content, n_outputs),
+            )
+        return parse_completions(content, n_outputs)
+    except Exception as e:
+        print(f"Error in chat block: {e}")
+        return [""] * n_outputs
@@ -0,0 +1,290 @@
+"""
+Deterministic local stand-in for the OpenAI-compatible chat completion endpoint, for benchmarking
+and testing generated programs without a real model.
+
+    MockLLM          the behaviour: latency distribution, rate limit, error injection, streaming
+                     and responses that fill every `<completionK>` tag of the prompt
+    FakeAsyncOpenAI  in-process client with the `chat.completions.create` interface of AsyncOpenAI;
+                     `use_mock_llm(mock)` makes the runtime's chat blocks use it
+    MockLLMServer    the same behaviour served over HTTP at /v1/chat/completions, so that the real
+                     openai client can be pointed at it through config.BASE_URL
+
+Usage: python -m pllm_runtime.mock_llm [--port 8765] [--latency lognormal:3.9,0.5]
+                                       [--rate_limit 50] [--error_rate 0.01] [--seed 0]
+Then set BASE_URL = "http://127.0.0.1:8765/v1" in config.py.
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+import time
+import zlib
+from pllm_runtime.http_server import read_requests, response_head, send_json
+
+_COMPLETION_TAG = re.compile(r"<completion(\d+)>")
+
+def parse_latency(spec: str):
+    """
+    Parses a latency distribution in milliseconds and returns a function rng -> seconds.
+    Formats: "fixed:MS", "uniform:LOW,HIGH", "normal:MEAN,STDDEV", "lognormal:MU,SIGMA"
+    (MU and SIGMA of the underlying normal distribution, e.g. lognormal:3.9,0.5 has a median of about 50 ms).
+    """
+    kind, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(",")] if args else []
+    if kind == "fixed" and len(values) == 1:
+        return lambda rng: values[0] / 1000
+    if kind == "uniform" and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1]) / 1000
+    if kind == "normal" and len(values) == 2:
+        return lambda rng: max(0.0, rng.gauss(values[0], values[1])) / 1000
+    if kind == "lognormal" and len(values) == 2:
+        return lambda rng: rng.lognormvariate(values[0], values[1]) / 1000
+    raise ValueError(f"Invalid latency distribution '{spec}'.")
+
+class MockLLMError(Exception):
+    """An injected failure; `status` is the HTTP status the server answers with."""
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.status_code = status
+
+class MockLLM:
+    """
+    Behaviour shared by the fake client and the HTTP server.
+    Args:
+        latency (str): Latency distribution of a whole response, see `parse_latency`.
+        rate_limit (float): Requests per second allowed (token bucket, one second of burst);
+            excess requests fail with status 429. None disables the limit.
+        error_rate (float): Probability that a request fails with status 500.
+        stream_chunks (int): Number of chunks a streamed response is split into.
+        seed (int): Seed of the random draws. Each request draws from its own generator seeded by
+            the seed, the model, the prompt and how many times that prompt was seen, so the latency
+            and errors of a request do not depend on the order in which concurrent requests arrive.
+    """
+    def __init__(self, latency: str = "fixed:0", rate_limit: float = None, error_rate: float = 0.0,
+                 stream_chunks: int = 4, seed: int = 0):
+        self.latency = latency
+        self._latency = parse_latency(latency)
+        self.rate_limit = rate_limit
+        self.error_rate = error_rate
+        self.stream_chunks = max(stream_chunks, 1)
+        self.seed = seed
+        self._seen = {}
+        self._tokens = rate_limit
+        self._refilled = time.monotonic()
+        self.requests = 0
+        self.errors = 0
+        self.rate_limited = 0
+
+    def _rng(self, model: str, prompt: str) -> random.Random:
+        key = (model, prompt)
+        occurrence = self._seen.get(key, 0)
+        self._seen[key] = occurrence + 1
+        return random.Random(f"{self.seed}:{model}:{occurrence}:{prompt}")
+
+    def _take_token(self) -> bool:
+        if self.rate_limit is None:
+            return True
+        now = time.monotonic()
+        self._tokens = min(self.rate_limit, self._tokens + (now - self._refilled) * self.rate_limit)
+        self._refilled = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    def respond(self, model: str, prompt: str) -> str:
+        """The response text: every `<completionK>` tag of the prompt filled in, in order."""
+        tags = sorted({int(k) for k in _COMPLETION_TAG.findall(prompt)})
+        digest = zlib.crc32(prompt.encode()) % 10000
+        return "".join(f"<completion{k}>mock {model} #{digest} output {k}</completion{k}>" for k in tags)
+
+    def _admit(self, model: str, prompt: str):
+        """Counts the request and decides its latency, or raises the injected error."""
+        self.requests += 1
+        rng = self._rng(model, prompt)
+        latency = self._latency(rng)
+        if not self._take_token():
+            self.rate_limited += 1
+            raise MockLLMError(429, "Rate limit exceeded (mock).")
+        if rng.random() < self.error_rate:
+            self.errors += 1
+            raise MockLLMError(500, "Injected server error (mock).")
+        return latency
+
+    async def complete(self, model: str, messages: list) -> str:
+        prompt = messages[-1]["content"] if messages else ""
+        latency = self._admit(model, prompt)
+        await asyncio.sleep(latency)
+        return self.respond(model, prompt)
+
+    async def stream(self, model: str, messages: list):
+        """Yields the response in `stream_chunks` pieces spread over the latency."""
+        prompt = messages[-1]["content"] if messages else ""
+        latency = self._admit(model, prompt)
+        content = self.respond(model, prompt)
+        size = math.ceil(len(content) / self.stream_chunks) or 1
+        for start in range(0, max(len(content), 1), size):
+            await asyncio.sleep(latency / self.stream_chunks)
+            yield content[start:start + size]
+
+# In-process fake client. Responses mimic the attribute layout of the openai objects the runtime reads.
+class _Obj:
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+def _completion(model: str, content: str) -> _Obj:
+    message = _Obj(role="assistant", content=content)
+    return _Obj(model=model, object="chat.completion",
+                choices=[_Obj(index=0, message=message, finish_reason="stop")])
+
+def _chunk(model: str, content: str, finish_reason=None) -> _Obj:
+    delta = _Obj(role="assistant", content=content)
+    return _Obj(model=model, object="chat.completion.chunk",
+                choices=[_Obj(index=0, delta=delta, finish_reason=finish_reason)])
+
+class _FakeCompletions:
+    def __init__(self, mock: MockLLM):
+        self._mock = mock
+
+    async def create(self, model, messages, stream=False, **kwargs):
+        if not stream:
+            return _completion(model, await self._mock.complete(model, messages))
+        pieces = self._mock.stream(model, messages)
+        # 与 openai 一致：错误在 create 时抛出，而不是在迭代时
+        first = await pieces.__anext__()
+
+        async def chunks():
+            yield _chunk(model, first)
+            async for piece in pieces:
+                yield _chunk(model, piece)
+            yield _chunk(model, "", finish_reason="stop")
+        return chunks()
+
+class FakeAsyncOpenAI:
+    """Drop-in replacement for openai.AsyncOpenAI backed by a MockLLM."""
+    def __init__(self, mock: MockLLM = None, base_url=None, api_key=None, **kwargs):
+        self.mock = mock or MockLLM()
+        self.base_url = base_url
+        self.api_key = api_key
+        self.chat = _Obj(completions=_FakeCompletions(self.mock))
+
+    async def close(self):
+        return
+
+def use_mock_llm(mock: MockLLM = None) -> MockLLM:
+    """Makes the runtime's chat blocks use a FakeAsyncOpenAI backed by `mock`. Returns the mock."""
+    from pllm_runtime.llm import set_client_factory
+    mock = mock or MockLLM()
+    set_client_factory(lambda base_url, api_key: FakeAsyncOpenAI(mock, base_url, api_key))
+    return mock
+
+# HTTP server speaking the subset of the OpenAI API used by the runtime, with keep-alive and
+# server-sent events for `"stream": true`.
+class MockLLMServer:
+    def __init__(self, mock: MockLLM = None, host: str = "127.0.0.1", port: int = 8765):
+        self.mock = mock or MockLLM()
+        self.host = host
+        self.port = port
+        self._server = None
+        self._ids = 0
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def serve_forever(self):
+        await self.start()
+        print(f"Mock LLM listening on {self.base_url} (latency {self.mock.latency}, "
+              f"rate limit {self.mock.rate_limit}, error rate {self.mock.error_rate})")
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def _handle(self, reader, writer):
+        try:
+            async for method, path, _, body in read_requests(reader):
+                await self._route(method, path, body, writer)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method, path, body, writer):
+        if method == "GET" and path.rstrip("/").endswith("/models"):
+            return await send_json(writer, 200, {"object": "list", "data": [{"id": "mock", "object": "model"}]})
+        if method != "POST" or not path.rstrip("/").endswith("/chat/completions"):
+            return await send_json(writer, 404, {"error": {"message": f"No route for {method} {path}."}})
+        try:
+            request = json.loads(body or b"{}")
+            model, messages = request["model"], request["messages"]
+        except (ValueError, KeyError) as e:
+            return await send_json(writer, 400, {"error": {"message": f"Invalid request: {e}"}})
+        self._ids += 1
+        completion_id = f"chatcmpl-mock-{self._ids}"
+        try:
+            if request.get("stream"):
+                pieces = self.mock.stream(model, messages)
+                first = await pieces.__anext__()
+                await self._stream(writer, completion_id, model, first, pieces)
+            else:
+                content = await self.mock.complete(model, messages)
+                await send_json(writer, 200, {
+                    "id": completion_id, "object": "chat.completion", "created": int(time.time()), "model": model,
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+                })
+        except MockLLMError as e:
+            error_type = "rate_limit_exceeded" if e.status == 429 else "server_error"
+            await send_json(writer, e.status, {"error": {"message": str(e), "type": error_type}},
+                                  {"Retry-After": "1"} if e.status == 429 else None)
+
+    async def _stream(self, writer, completion_id, model, first, pieces):
+        writer.write(response_head(200, {"Content-Type": "text/event-stream", "Transfer-Encoding": "chunked"}))
+
+        async def event(content, finish_reason=None):
+            data = json.dumps({"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                               "model": model, "choices": [{"index": 0, "delta": {"content": content},
+                                                            "finish_reason": finish_reason}]})
+            await send(f"data: {data}\n\n".encode())
+
+        async def send(payload):
+            writer.write(f"{len(payload):x}\r\n".encode() + payload + b"\r\n")
+            await writer.drain()
+
+        await event(first)
+        async for piece in pieces:
+            await event(piece)
+        await event("", "stop")
+        await send(b"data: [DONE]\n\n")
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Run a local mock of the OpenAI chat completion endpoint.")
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=8765)
+    arg_parser.add_argument("--latency", default="lognormal:3.9,0.5", help="Latency distribution in ms, e.g. fixed:50, uniform:10,100, normal:50,10, lognormal:3.9,0.5.")
+    arg_parser.add_argument("--rate_limit", type=float, default=None, help="Requests per second; excess requests get 429.")
+    arg_parser.add_argument("--error_rate", type=float, default=0.0, help="Probability of a 500 response.")
+    arg_parser.add_argument("--stream_chunks", type=int, default=4)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+    mock = MockLLM(args.latency, args.rate_limit, args.error_rate, args.stream_chunks, args.seed)
+    try:
+        asyncio.run(MockLLMServer(mock, args.host, args.port).serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
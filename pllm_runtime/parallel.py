@@ -0,0 +1,35 @@
+"""
+Parallel for loops (`parallel for x in xs limit N:`): the generated code turns the body of the loop
+into a coroutine function of the iterator and runs it over the elements with parallel_map, at most
+N iterations at a time. The results are returned in the order of the elements, so accumulations
+like `drafts = drafts + [draft]` are applied in the same order as in a sequential loop.
+"""
+import asyncio
+
+PARALLEL_LIMIT = 16
+
+async def parallel_map(func, items, limit: int = PARALLEL_LIMIT) -> list:
+    """
+    Awaits func(item) for every item, at most `limit` at a time, and returns the results in the
+    order of the items. If an iteration fails the others are cancelled and the error is raised.
+    """
+    if not isinstance(limit, int) or limit < 1:
+        raise ValueError(f"Parallel for limit must be a positive integer, got {limit!r}.")
+    items = list(items)
+    results = [None] * len(items)
+    pending = iter(enumerate(items))
+
+    async def worker():
+        # 固定数量的 worker 依次领取下一个元素，不必为每个元素创建任务
+        for index, item in pending:
+            results[index] = await func(item)
+
+    workers = [asyncio.ensure_future(worker()) for _ in range(min(limit, len(items)))]
+    try:
+        await asyncio.gather(*workers)
+    except BaseException:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        raise
+    return results
@@ -0,0 +1,174 @@
+"""
+Routing of chat requests across several interchangeable OpenAI-compatible endpoints.
+
+The `model:` string of each chat block selects a pool of endpoints; within the pool a request goes
+to the endpoint with the fewest outstanding requests, or with the lowest expected wait (outstanding
+requests times smoothed latency). Endpoints that keep failing are taken out of rotation by a circuit
+breaker for a cooldown period and then probed with a single request; rate-limited endpoints (429) are
+only skipped for their Retry-After period. A failed request is retried on another endpoint of the
+pool. Enabled with llm.set_router(Router(...)).
+"""
+import fnmatch
+import json
+import time
+
+STRATEGIES = ("least_outstanding", "latency")
+
+class NoEndpointError(RuntimeError):
+    """No endpoint of the pool is available for the request."""
+
+def _retry_after(error: Exception, default: float) -> float:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after", default))
+    except (TypeError, ValueError):
+        return default
+
+class Endpoint:
+    """
+    One OpenAI-compatible backend.
+    Args:
+        base_url, api_key (str): Where and how to send requests.
+        model (str): Model name to request from this backend instead of the chat block's model,
+            for backends that serve the same model under another name.
+        name (str): Used in statistics; defaults to base_url.
+    """
+    def __init__(self, base_url: str, api_key: str, model: str = None, name: str = None):
+        self.base_url = base_url
+        self.api_key = api_key
+        self.model = model
+        self.name = name or base_url
+        self.outstanding = 0
+        self.latency = None  # 平滑后的延迟（秒）
+        self.failures = 0  # 连续失败次数
+        self.open_until = 0.0  # 熔断结束时间（time.monotonic）
+        self.probing = False
+        self.busy_until = 0.0  # 被限流（429）时暂停使用的结束时间
+        self.requests = 0
+        self.errors = 0
+
+    def available(self, now: float) -> bool:
+        """Closed circuit, or open circuit past its cooldown with no probe in flight."""
+        if now < self.open_until or now < self.busy_until:
+            return False
+        return not self.probing
+
+    def stats(self) -> dict:
+        return {"requests": self.requests, "errors": self.errors, "outstanding": self.outstanding,
+                "latency_ms": None if self.latency is None else self.latency * 1000,
+                "circuit": "open" if self.open_until > time.monotonic() else "closed"}
+
+class Router:
+    """
+    Args:
+        pools (dict): {model pattern: [Endpoint, ...]}. Patterns are matched against the `model:`
+            string of the chat block; exact names take precedence, then fnmatch patterns such as
+            "gpt-4*", in the order given ("*" as a catch-all).
+        strategy (str): "least_outstanding" or "latency".
+        failure_threshold (int): Consecutive failures that open an endpoint's circuit.
+        cooldown (float): Seconds an open circuit stays open before a probe request.
+        busy_delay (float): Seconds a rate-limited endpoint is skipped if the response has no Retry-After.
+        smoothing (float): Weight of the newest sample in the smoothed latency.
+    """
+    def __init__(self, pools: dict, strategy: str = "least_outstanding", failure_threshold: int = 3,
+                 cooldown: float = 30.0, busy_delay: float = 1.0, smoothing: float = 0.2):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"strategy must be one of {', '.join(STRATEGIES)}, not '{strategy}'.")
+        self.pools = pools
+        self.strategy = strategy
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.busy_delay = busy_delay
+        self.smoothing = smoothing
+
+    @classmethod
+    def from_json(cls, path: str) -> "Router":
+        """
+        Reads a router configuration:
+            {"strategy": "latency",
+             "pools": {"gpt-3.5-turbo": [{"base_url": "...", "api_key": "..."}, ...], "*": [...]}}
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+        pools = {pattern: [Endpoint(**endpoint) for endpoint in endpoints]
+                 for pattern, endpoints in config.pop("pools").items()}
+        return cls(pools, **config)
+
+    def pool(self, model_name: str) -> list:
+        if model_name in self.pools:
+            return self.pools[model_name]
+        for pattern, endpoints in self.pools.items():
+            if fnmatch.fnmatchcase(model_name, pattern):
+                return endpoints
+        raise NoEndpointError(f"No endpoint pool for model '{model_name}'.")
+
+    def choose(self, model_name: str, exclude=()) -> Endpoint:
+        now = time.monotonic()
+        candidates = [e for e in self.pool(model_name) if e not in exclude and e.available(now)]
+        if not candidates:
+            raise NoEndpointError(f"No available endpoint for model '{model_name}'.")
+        if self.strategy == "latency":
+            # 尚无延迟数据的端点优先，以便尽快获得其延迟
+            return min(candidates, key=lambda e: (e.latency is not None, (e.outstanding + 1) * (e.latency or 0), e.outstanding))
+        return min(candidates, key=lambda e: (e.outstanding, e.latency or 0))
+
+    def _succeeded(self, endpoint: Endpoint, seconds: float, probe: bool) -> None:
+        endpoint.failures = 0
+        if probe:
+            endpoint.probing = False
+            endpoint.open_until = 0.0
+        endpoint.latency = seconds if endpoint.latency is None \
+            else (1 - self.smoothing) * endpoint.latency + self.smoothing * seconds
+
+    def _failed(self, endpoint: Endpoint, error: Exception, probe: bool) -> None:
+        endpoint.errors += 1
+        if probe:
+            endpoint.probing = False
+        if getattr(error, "status_code", None) == 429:
+            # 限流说明端点繁忙而非故障：按 Retry-After 暂停使用，不计入熔断
+            endpoint.busy_until = time.monotonic() + _retry_after(error, self.busy_delay)
+            return
+        endpoint.failures += 1
+        if probe or endpoint.failures >= self.failure_threshold:
+            endpoint.open_until = time.monotonic() + self.cooldown
+
+    async def send(self, model_name: str, request):
+        """
+        Sends request(endpoint, model) to an endpoint of the model's pool, failing over to the other
+        endpoints of the pool on errors. Raises the last error if every endpoint failed.
+        """
+        tried = []
+        error = None
+        while True:
+            try:
+                endpoint = self.choose(model_name, tried)
+            except NoEndpointError:
+                if error is not None:
+                    raise error
+                raise
+            tried.append(endpoint)
+            # 熔断冷却结束后的第一个请求作为探测；熔断期间返回的旧请求不会关闭熔断
+            probe = endpoint.open_until > 0
+            endpoint.probing = probe
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+            start = time.monotonic()
+            try:
+                result = await request(endpoint, endpoint.model or model_name)
+            except Exception as e:
+                self._failed(endpoint, e, probe)
+                error = e
+                continue
+            except BaseException:
+                # 被取消的请求不计入端点的健康状况
+                if probe:
+                    endpoint.probing = False
+                raise
+            finally:
+                endpoint.outstanding -= 1
+            self._succeeded(endpoint, time.monotonic() - start, probe)
+            return result
+
+    def stats(self) -> dict:
+        return {endpoint.name: endpoint.stats() for endpoints in self.pools.values() for endpoint in endpoints}
@@ -0,0 +1,168 @@
+"""
+Runs a program generated by the PLLM compiler with per-agent checkpoints and memoized outputs.
+
+Usage: python -m pllm_runtime.run output/output.py [--run_id ID] [--checkpoint FILE] [--resume] [--memo]
+                                                   [--hedge PERCENTILE] [--timeout S] [--agent_timeout NAME=S]
+                                                   [--deadline S] [--on_timeout fail|retry|fallback] [--retries N]
+                                                   [--endpoints endpoints.json] [--targets AGENT,...]
+       python -m pllm_runtime.run output/output.py --dataset records.jsonl --output results.jsonl [--window N]
+                                                   [--ordered] [--memo] ...
+       python -m pllm_runtime.run output/output.py --serve 127.0.0.1:8000 [--max_concurrency N] [--max_queue N]
+                                                   [--memo] ...
+
+Without --resume the checkpoints of the run are discarded and every agent runs. With --resume the
+agents that completed in an earlier attempt of the same run, with unchanged code and inputs, are
+skipped and their recorded outputs are passed on; only the remaining agents run.
+
+With --memo agent outputs are also memoized across runs by agent fingerprint and inputs, so that
+after editing and recompiling a program only the edited agents and their downstream agents run.
+
+With --hedge chat requests slower than the given percentile of the observed latencies are duplicated
+and the first valid response is used (see pllm_runtime.hedging).
+
+--timeout, --agent_timeout and --deadline bound the running time of the agents and of the whole run;
+--on_timeout chooses what happens to an agent that runs out of time (see pllm_runtime.timeouts).
+
+--endpoints routes the chat requests across the endpoint pools of a router configuration
+(see pllm_runtime.routing.Router.from_json) instead of BASE_URL from config.
+
+--dataset runs the graph once per record of a JSONL or CSV file (see pllm_runtime.dataset). Checkpoints
+are per run and not used in dataset mode; with --memo an interrupted dataset run can be repeated
+without repeating the records that had completed.
+
+--serve runs the graph as an HTTP service on host:port or unix:/path (see pllm_runtime.serve).
+
+--targets evaluates only the agents needed for the outputs of the given agents, in every mode, and
+returns, writes or serves those outputs instead of the outputs of the sink agents.
+"""
+import argparse
+import asyncio
+import importlib.util
+import os
+from pllm_runtime.checkpoint import CheckpointStore, MemoStore
+from pllm_runtime.dataset import read_records, run_dataset
+from pllm_runtime.executor import execute, subgraph
+from pllm_runtime.hedging import HedgePolicy
+from pllm_runtime.llm import close_clients, set_hedging, set_router
+from pllm_runtime.routing import Router
+from pllm_runtime.serve import GraphService, parse_address
+from pllm_runtime.timeouts import ON_TIMEOUT, TimeoutPolicy
+
+def load_program(path: str) -> dict:
+    """Imports a generated program without running its connect block and returns its namespace."""
+    spec = importlib.util.spec_from_file_location("pllm_program", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return vars(module)
+
+def select_targets(namespace: dict, targets: list) -> dict:
+    """A namespace whose graph holds only the agents needed for the outputs of the target agents."""
+    graph, param_mapping = subgraph(namespace["graph"], namespace["param_mapping"], targets)
+    return {**namespace, "graph": graph, "param_mapping": param_mapping, "graph_outputs": list(targets)}
+
+def parse_agent_timeouts(specs: list) -> dict:
+    """Parses NAME=SECONDS arguments."""
+    agent_timeouts = {}
+    for spec in specs:
+        name, sep, seconds = spec.partition("=")
+        if not sep:
+            raise ValueError(f"Invalid agent timeout '{spec}', expected NAME=SECONDS.")
+        agent_timeouts[name] = float(seconds)
+    return agent_timeouts
+
+async def run_program(namespace: dict, checkpoint: CheckpointStore = None, memo: MemoStore = None,
+                      timeouts: TimeoutPolicy = None) -> dict:
+    try:
+        return await execute(namespace["graph"], namespace["param_mapping"], namespace,
+                             checkpoint=checkpoint, memo=memo, timeouts=timeouts, keep=namespace.get("graph_outputs"))
+    finally:
+        await close_clients()
+
+async def run_dataset_file(namespace: dict, args, **execute_options):
+    try:
+        with open(args.output, "w", encoding="utf-8") as output:
+            stats = await run_dataset(namespace, read_records(args.dataset), output, args.window, args.ordered,
+                                      **execute_options)
+        print(stats.report())
+    finally:
+        await close_clients()
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Run a compiled PLLM program with checkpoints.")
+    arg_parser.add_argument("program", help="Python file generated by compile.py.")
+    arg_parser.add_argument("--run_id", default=None, help="Identifies the run; defaults to the program's file name.")
+    arg_parser.add_argument("--checkpoint", default=".pllm_checkpoints.db", help="SQLite file holding the checkpoints and memoized outputs.")
+    arg_parser.add_argument("--resume", action="store_true", help="Skip the agents that completed in an earlier attempt of the run.")
+    arg_parser.add_argument("--memo", action="store_true", help="Reuse the outputs of agents whose fingerprint and inputs are unchanged since any earlier run.")
+    arg_parser.add_argument("--hedge", type=float, default=None, metavar="PERCENTILE", help="Hedge chat requests slower than this percentile of the observed latencies.")
+    arg_parser.add_argument("--timeout", type=float, default=None, help="Timeout in seconds of every agent.")
+    arg_parser.add_argument("--agent_timeout", action="append", default=[], metavar="NAME=SECONDS", help="Timeout of one agent; may be repeated.")
+    arg_parser.add_argument("--deadline", type=float, default=None, help="Time in seconds for the whole run.")
+    arg_parser.add_argument("--on_timeout", choices=ON_TIMEOUT, default="fail", help="What to do with an agent that runs out of time.")
+    arg_parser.add_argument("--retries", type=int, default=1, help="Retries of an agent that timed out, with --on_timeout retry.")
+    arg_parser.add_argument("--endpoints", default=None, metavar="FILE", help="JSON router configuration with the endpoint pools of each model.")
+    arg_parser.add_argument("--targets", default=None, metavar="AGENT,...", help="Run only the agents needed for the outputs of these agents.")
+    arg_parser.add_argument("--dataset", default=None, metavar="FILE", help="Run the graph once per record of this JSONL or CSV file.")
+    arg_parser.add_argument("--output", default=None, metavar="FILE", help="Results of --dataset, one JSON line per record (default: <dataset>.out.jsonl).")
+    arg_parser.add_argument("--window", type=int, default=32, help="Records in flight at a time with --dataset.")
+    arg_parser.add_argument("--ordered", action="store_true", help="Write the results of --dataset in input order.")
+    arg_parser.add_argument("--serve", default=None, metavar="ADDRESS", help="Serve the graph over HTTP on host:port, port or unix:/path.")
+    arg_parser.add_argument("--max_concurrency", type=int, default=16, help="Runs executing at a time with --serve.")
+    arg_parser.add_argument("--max_queue", type=int, default=256, help="Requests waiting for a slot with --serve before new ones are rejected.")
+    arg_parser.add_argument("--drain_timeout", type=float, default=30.0, help="Seconds to wait for runs in progress when --serve stops.")
+    args = arg_parser.parse_args()
+
+    namespace = load_program(args.program)
+    if "graph" not in namespace:
+        print(f"Error: '{args.program}' has no connect block.")
+        return
+    if args.targets:
+        try:
+            namespace = select_targets(namespace, [name.strip() for name in args.targets.split(",") if name.strip()])
+        except ValueError as e:
+            print(f"Error: {e}")
+            return
+    memo = MemoStore(args.checkpoint) if args.memo else None
+    if args.hedge is not None:
+        set_hedging(HedgePolicy(percentile=args.hedge))
+    if args.endpoints:
+        set_router(Router.from_json(args.endpoints))
+    timeouts = None
+    if args.timeout is not None or args.agent_timeout or args.deadline is not None:
+        timeouts = TimeoutPolicy(args.timeout, parse_agent_timeouts(args.agent_timeout), args.deadline,
+                                 args.on_timeout, args.retries)
+    if args.serve:
+        host, port, unix_path = parse_address(args.serve)
+        service = GraphService(namespace, args.max_concurrency, args.max_queue, memo=memo, timeouts=timeouts)
+        try:
+            asyncio.run(service.serve_forever(host, port, unix_path, args.drain_timeout))
+        finally:
+            if memo is not None:
+                memo.close()
+        return
+    if args.dataset:
+        args.output = args.output or os.path.splitext(args.dataset)[0] + ".out.jsonl"
+        try:
+            asyncio.run(run_dataset_file(namespace, args, memo=memo, timeouts=timeouts))
+        finally:
+            if memo is not None:
+                print(f"Memo: {memo.hits} agent run(s) reused, {memo.misses} run.")
+                memo.close()
+        return
+    run_id = args.run_id or os.path.splitext(os.path.basename(args.program))[0]
+    checkpoint = CheckpointStore(args.checkpoint, run_id, resume=args.resume)
+    try:
+        asyncio.run(run_program(namespace, checkpoint, memo, timeouts))
+    finally:
+        if args.resume:
+            print(f"Run '{run_id}': {len(checkpoint.reused)} agent(s) resumed from checkpoints, "
+                  f"{len(checkpoint.stale)} stale checkpoint(s) re-run.")
+        checkpoint.close()
+        if timeouts is not None and timeouts.timed_out:
+            print(f"Timed out: {', '.join(f'{name} ({count}x)' for name, count in timeouts.timed_out.items())}.")
+        if memo is not None:
+            print(f"Memo: {memo.hits} agent(s) reused, {memo.misses} agent(s) run.")
+            memo.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Serving mode: a compiled agent graph as a long-running HTTP service, on TCP or a Unix socket.
+
+    POST /run       body: a JSON object with the inputs of the agents not fed by connections, as in
+                    dataset mode ("agent.param" or "param" keys); returns {"outputs": {output agent:
+                    outputs}, "seconds": ...}
+    GET  /health    {"status": "ok"} or, while draining, 503 {"status": "draining"}
+    GET  /metrics   requests in flight and queued, completed, errors, rejected, latency percentiles
+
+All requests share one event loop, the pooled LLM clients and the optional memo store. At most
+max_concurrency runs execute at a time; up to max_queue further requests wait for a slot, beyond
+that requests are rejected with 503. On SIGINT / SIGTERM the service stops accepting connections,
+finishes the runs in progress (up to drain_timeout seconds) and closes the clients.
+"""
+import asyncio
+import json
+import signal
+import time
+from pllm_runtime.dataset import free_parameters, output_agents, record_inputs
+from pllm_runtime.executor import execute
+from pllm_runtime.hedging import LatencyTracker
+from pllm_runtime.http_server import read_requests, send_json
+from pllm_runtime.llm import close_clients
+from pllm_runtime.timeouts import AgentTimeoutError
+
+class ServiceBusy(Exception):
+    """The queue of the service is full, or the service is draining."""
+
+class GraphService:
+    """
+    Args:
+        namespace (dict): A loaded program (see run.load_program).
+        max_concurrency (int): Runs executing at a time.
+        max_queue (int): Requests waiting for a slot before new requests are rejected; with 0, requests
+            run while a slot is free and are rejected otherwise.
+        execute_options: Passed on to execute (memo, timeouts).
+    """
+    def __init__(self, namespace: dict, max_concurrency: int = 16, max_queue: int = 256, **execute_options):
+        self.namespace = namespace
+        self.graph, self.param_mapping = namespace["graph"], namespace["param_mapping"]
+        self.free = free_parameters(self.graph, self.param_mapping, namespace)
+        self.targets = output_agents(namespace)
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.execute_options = execute_options
+        self.in_flight = 0
+        self.queued = 0
+        self.completed = 0
+        self.errors = 0
+        self.rejected = 0
+        self.draining = False
+        self.latencies = LatencyTracker()
+        self._slots = None
+        self._server = None
+        self._idle = None
+
+    async def run(self, record: dict) -> dict:
+        """Runs the graph for one request; returns the outputs of the output agents."""
+        # 有空闲槽位时直接运行，只有所有槽位都在使用且队列已满时才拒绝
+        if self.draining or (self._slots.locked() and self.queued >= self.max_queue):
+            self.rejected += 1
+            raise ServiceBusy("Service is draining." if self.draining else "Request queue is full.")
+        self._idle.clear()
+        self.queued += 1
+        queued_at = time.perf_counter()
+        try:
+            await self._slots.acquire()
+        except BaseException:
+            self.queued -= 1
+            self._update_idle()
+            raise
+        self.queued -= 1
+        self.in_flight += 1
+        started_at = time.perf_counter()
+        self.latencies.record("queue", started_at - queued_at)
+        try:
+            outputs = await execute(self.graph, self.param_mapping, self.namespace,
+                                    inputs=record_inputs(record, self.free), keep=self.targets,
+                                    **self.execute_options)
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+            self._update_idle()
+        self.completed += 1
+        self.latencies.record("run", time.perf_counter() - started_at)
+        return {name: outputs.get(name) for name in self.targets}
+
+    def _update_idle(self) -> None:
+        if self.in_flight == 0 and self.queued == 0:
+            self._idle.set()
+
+    def metrics(self) -> dict:
+        metrics = {"in_flight": self.in_flight, "queued": self.queued, "completed": self.completed,
+                   "errors": self.errors, "rejected": self.rejected, "draining": self.draining}
+        for name in ("run", "queue"):
+            for p in (50, 99):
+                seconds = self.latencies.percentile(name, p)
+                metrics[f"{name}_p{p}_ms"] = None if seconds is None else seconds * 1000
+        return metrics
+
+    async def _handle(self, reader, writer):
+        try:
+            async for method, path, _, body in read_requests(reader):
+                await self._route(method, path, body, writer)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method, path, body, writer):
+        close = {"Connection": "close"} if self.draining else None
+        if method == "GET" and path == "/health":
+            if self.draining:
+                return await send_json(writer, 503, {"status": "draining"}, close)
+            return await send_json(writer, 200, {"status": "ok"})
+        if method == "GET" and path == "/metrics":
+            return await send_json(writer, 200, self.metrics(), close)
+        if method != "POST" or path != "/run":
+            return await send_json(writer, 404, {"error": f"No route for {method} {path}."}, close)
+        try:
+            record = json.loads(body or b"{}")
+            if not isinstance(record, dict):
+                raise ValueError("expected a JSON object")
+        except ValueError as e:
+            return await send_json(writer, 400, {"error": f"Invalid request: {e}"}, close)
+        start = time.perf_counter()
+        try:
+            outputs = await self.run(record)
+        except ServiceBusy as e:
+            return await send_json(writer, 503, {"error": str(e)}, {"Retry-After": "1", **(close or {})})
+        except AgentTimeoutError as e:
+            return await send_json(writer, 504, {"error": str(e)}, close)
+        except Exception as e:
+            return await send_json(writer, 500, {"error": f"{type(e).__name__}: {e}"}, close)
+        await send_json(writer, 200, {"outputs": outputs, "seconds": time.perf_counter() - start}, close)
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8000, unix_path: str = None):
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self._idle = asyncio.Event()
+        self._idle.set()
+        if unix_path:
+            self._server = await asyncio.start_unix_server(self._handle, unix_path)
+        else:
+            self._server = await asyncio.start_server(self._handle, host, port)
+        return self
+
+    def addresses(self) -> list:
+        return [str(sock.getsockname()) for sock in self._server.sockets]
+
+    async def drain(self, timeout: float = 30.0) -> None:
+        """Stops accepting connections and waits for the runs in progress, then closes the clients."""
+        self.draining = True
+        self._server.close()
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            print(f"Drain timed out with {self.in_flight} run(s) in flight.")
+        await close_clients()
+
+    async def serve_forever(self, host: str = "127.0.0.1", port: int = 8000, unix_path: str = None,
+                            drain_timeout: float = 30.0) -> None:
+        await self.start(host, port, unix_path)
+        print(f"Serving on {', '.join(self.addresses())} (max concurrency {self.max_concurrency}, "
+              f"max queue {self.max_queue}).")
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop.set)
+            except (NotImplementedError, RuntimeError):
+                pass
+        await stop.wait()
+        print("Draining...")
+        await self.drain(drain_timeout)
+        print(f"Stopped after {self.completed} run(s).")
+
+def parse_address(address: str):
+    """'unix:/path', 'host:port' or 'port' -> (host, port, unix_path)."""
+    if address.startswith("unix:"):
+        return None, None, address[len("unix:"):]
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port), None
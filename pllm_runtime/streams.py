@@ -0,0 +1,81 @@
+"""
+Streamed connections (`stream[T]` in the connect block): the elements of a list output are passed to
+the consumer agent through a bounded queue while the producer agent is still running.
+
+The producer's generated code calls emit_stream after every assignment to a streamed output, which
+puts the elements appended since the last call into the queue of every streamed connection of that
+output; when the queue is full the producer waits for the consumer (back-pressure). The consumer's
+generated code iterates the streamed input with iterate_stream. The executor creates the queues and
+closes them when the producer returns (see executor.execute).
+"""
+import asyncio
+import contextvars
+
+STREAM_BUFFER = 16
+
+_END = object()
+
+# 当前运行的 agent 的流式输出：{输出名: StreamWriter}，由执行器在运行 agent 前设置
+stream_writers = contextvars.ContextVar("pllm_stream_writers", default=None)
+
+class Stream:
+    """The bounded queue of one streamed connection; the consumer iterates it with `async for`."""
+    def __init__(self, maxsize: int = STREAM_BUFFER):
+        self._queue = asyncio.Queue(maxsize)
+        self._abandoned = False
+
+    async def put(self, item) -> None:
+        if not self._abandoned:
+            await self._queue.put(item)
+
+    async def close(self) -> None:
+        await self.put(_END)
+
+    def abandon(self) -> None:
+        """The consumer has returned: drop the queued and later elements so the producer never blocks."""
+        self._abandoned = True
+        while not self._queue.empty():
+            self._queue.get_nowait()
+
+    async def __aiter__(self):
+        while True:
+            item = await self._queue.get()
+            if item is _END:
+                return
+            yield item
+
+class StreamWriter:
+    """The producer side of one streamed output, feeding the streams of all its streamed connections."""
+    def __init__(self):
+        self.streams = []
+        self.sent = 0
+
+    async def update(self, value) -> None:
+        """Puts the elements of the output list that were not sent yet."""
+        if not isinstance(value, list):
+            return
+        while self.sent < len(value):
+            item = value[self.sent]
+            for stream in self.streams:
+                await stream.put(item)
+            self.sent += 1
+
+    async def close(self, value) -> None:
+        await self.update(value)
+        for stream in self.streams:
+            await stream.close()
+
+async def emit_stream(output_name: str, value) -> None:
+    """Called by generated code after an assignment to an output; a no-op unless the output is streamed."""
+    writers = stream_writers.get()
+    if writers and output_name in writers:
+        await writers[output_name].update(value)
+
+async def iterate_stream(items):
+    """Iterates a streamed input as its elements arrive, or a plain list when the agent is called directly."""
+    if isinstance(items, Stream):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
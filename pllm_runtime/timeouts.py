@@ -0,0 +1,54 @@
+"""
+Timeouts of agents and deadlines of agent-graph runs.
+
+Each agent gets a budget: its own timeout, bounded by what is left of the run deadline. An agent that
+exceeds its budget is cancelled, which also cancels its in-flight chat requests, and then handled
+according to the policy: fail the run at once, retry the agent, or fall back to empty outputs so that
+the downstream agents still run.
+"""
+import time
+from collections import Counter
+
+ON_TIMEOUT = ("fail", "retry", "fallback")
+
+class AgentTimeoutError(TimeoutError):
+    """An agent exceeded its timeout or the run deadline."""
+    def __init__(self, agent_name: str, seconds: float):
+        super().__init__(f"Agent '{agent_name}' timed out after {seconds:.3g} s.")
+        self.agent_name = agent_name
+        self.seconds = seconds
+
+class TimeoutPolicy:
+    """
+    Args:
+        timeout (float): Timeout in seconds of every agent; None for no timeout.
+        agent_timeouts (dict): Timeouts of individual agents, overriding timeout.
+        deadline (float): Time in seconds for the whole run; the remaining time bounds every agent.
+        on_timeout (str): "fail" cancels the run and raises AgentTimeoutError; "retry" runs the agent
+            again, up to `retries` times while the run deadline allows; "fallback" gives the agent
+            empty strings as outputs and continues.
+        retries (int): Retries of an agent that timed out, for on_timeout="retry".
+    """
+    def __init__(self, timeout: float = None, agent_timeouts: dict = None, deadline: float = None,
+                 on_timeout: str = "fail", retries: int = 1):
+        if on_timeout not in ON_TIMEOUT:
+            raise ValueError(f"on_timeout must be one of {', '.join(ON_TIMEOUT)}, not '{on_timeout}'.")
+        self.timeout = timeout
+        self.agent_timeouts = agent_timeouts or {}
+        self.deadline = deadline
+        self.on_timeout = on_timeout
+        self.retries = retries
+        # 每个 agent 超时的次数，大小受 agent 数量限制
+        self.timed_out = Counter()
+
+    def start(self):
+        """Returns the absolute deadline (time.monotonic) of a run starting now, or None."""
+        return None if self.deadline is None else time.monotonic() + self.deadline
+
+    def budget(self, agent_name: str, run_deadline):
+        """Seconds the agent may run for, or None if unbounded."""
+        budget = self.agent_timeouts.get(agent_name, self.timeout)
+        if run_deadline is not None:
+            remaining = max(0.0, run_deadline - time.monotonic())
+            budget = remaining if budget is None else min(budget, remaining)
+        return budget
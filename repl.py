@@ -1,51 +1,86 @@
-from pllm_parser.pllm_lexer import lexer
-from pllm_parser.pllm_parser import parser
-from type_system.type_checker import TypeChecker
-from generate.code_gen import CodeGenerator
+import ast
+import asyncio
+import inspect
 import traceback
+from pllm_parser.pllm_parser import parse
+from type_system.type_checker import TypeChecker, TypeErrorHandler
+from generate.ast_gen import PyASTGenerator
+from pllm_runtime import close_clients
 
-from pllm_parser.pllm_lexer import lexer
-from pllm_parser.pllm_parser import parser
-from type_system.type_checker import TypeChecker
-from generate.code_gen import CodeGenerator
-import traceback
+class ReplSession:
+    """
+    REPL 会话：每次提交的输入单元单独编译执行，只付出这一段代码的开销。
+    - 类型环境常驻：前面单元定义的变量、函数与 agent 的类型对后续单元可见；
+    - Python 命名空间常驻：前面单元定义的值与 agent 可直接使用；
+    - 事件循环常驻：connect 块在同一个事件循环中 await 执行，LLM 客户端（按事件循环共享）只创建一次。
+    """
+    def __init__(self):
+        self.type_checker = TypeChecker()
+        self.type_checker.beginSession()
+        self.namespace = {"__name__": "__main__"}
+        self.loop = asyncio.new_event_loop()
+        self.cell_count = 0
+
+    def compile_cell(self, source_code):
+        """编译一个输入单元，返回代码对象；存在语法错误时返回 None"""
+        self.cell_count += 1
+        program, parse_errors = parse(source_code)
+        if parse_errors:
+            parse_error_handler = TypeErrorHandler()
+            parse_error_handler.errors = list(parse_errors)
+            parse_error_handler.show()
+            return None
+        self.type_checker.checkCell(program)
+        module = PyASTGenerator(top_level_await=True).generate(program)
+        return compile(module, f"<cell {self.cell_count}>", "exec", flags=ast.PyCF_ALLOW_TOP_LEVEL_AWAIT)
+
+    def run_cell(self, source_code):
+        code = self.compile_cell(source_code)
+        if code is None:
+            return
+        # 含有 await 的单元编译为协程代码，在常驻的事件循环中执行
+        if code.co_flags & inspect.CO_COROUTINE:
+            self.loop.run_until_complete(eval(code, self.namespace))
+        else:
+            exec(code, self.namespace)
 
-def run_code(source_code):
+    def close(self):
+        self.loop.run_until_complete(close_clients())
+        self.loop.close()
+
+def run_code(session, source_code):
     try:
-        # 解析代码生成 AST
-        ast = parser.parse(source_code, lexer=lexer)
-        # 类型检查
-        type_checker = TypeChecker()
-        type_checker.checkProgram(ast)
-        # 代码生成
-        code_generator = CodeGenerator()
-        py_code = code_generator.generate(ast)
-        # 执行生成的 Python 代码
-        exec(py_code, globals(), {})
+        session.run_cell(source_code)
     except Exception as e:
         print("Error: " + str(e))
         print(traceback.format_exc())
 
 def repl():
     print("Multi-Agent Language REPL")
+    session = ReplSession()
     buffer = []
-    while True:
-        try:
-            line = input(">>> ")
-            if line.strip() in ("exit", "quit"):
+    try:
+        while True:
+            try:
+                line = input(">>> ")
+                if line.strip() in ("exit", "quit"):
+                    break
+                if line.strip() == "":
+                    code = "\n".join(buffer)
+                    # 每个输入单元只执行一次，执行后清空缓冲区
+                    buffer.clear()
+                    if not code.strip():
+                        continue
+                    run_code(session, code)
+                else:
+                    buffer.append(line)
+            except EOFError:
                 break
-            if line.strip() == "":
-                code = "\n".join(buffer)
-                if not code.strip():
-                    continue
-                run_code(code)
-            else:
-                buffer.append(line)
-        except EOFError:
-            break
-        except Exception as e:
-            print("REPL Error: ", e)
-            buffer.clear()
+            except Exception as e:
+                print("REPL Error: ", e)
+                buffer.clear()
+    finally:
+        session.close()
 
 if __name__ == "__main__":
-    repl()
\ No newline at end of file
+    repl()
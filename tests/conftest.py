@@ -0,0 +1,49 @@
+import os
+import sys
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+@pytest.fixture(autouse=True)
+def _run_from_root(monkeypatch):
+    # 类型检查器按相对路径读取内置函数签名，测试从仓库根目录运行
+    monkeypatch.chdir(ROOT)
+
+@pytest.fixture
+def load_pllm(tmp_path):
+    """Compiles PLLM source and returns the namespace of the generated program (connect block not run)."""
+    from compile import compile_source
+    from pllm_runtime.run import load_program
+
+    def load(source, outputs=None):
+        code, parse_errors, _, _ = compile_source(source, verbose=False, outputs=outputs)
+        assert not parse_errors
+        path = tmp_path / f"program_{len(list(tmp_path.glob('program_*.py')))}.py"
+        path.write_text(code, encoding="utf-8")
+        return load_program(str(path))
+    return load
+
+@pytest.fixture
+def mock_llm():
+    """Returns a factory that makes the chat blocks use an in-process MockLLM; restored afterwards."""
+    from pllm_runtime import llm
+    from pllm_runtime.mock_llm import MockLLM, use_mock_llm
+
+    def use(**options):
+        return use_mock_llm(MockLLM(**options))
+    yield use
+    llm.set_client_factory(None)
+    llm.set_hedging(None)
+    llm.set_router(None)
+
+@pytest.fixture
+def mock_endpoints(mock_llm):
+    """Returns a function that gives each base URL its own MockLLM: {base_url: MockLLM}."""
+    from pllm_runtime.llm import set_client_factory
+    from pllm_runtime.mock_llm import FakeAsyncOpenAI
+
+    def use(mocks):
+        set_client_factory(lambda base_url, api_key: FakeAsyncOpenAI(mocks[base_url], base_url, api_key))
+        return mocks
+    return use
@@ -0,0 +1,32 @@
+import asyncio
+from pllm_runtime.checkpoint import MemoStore
+from pllm_runtime.run import run_program
+
+PROGRAM = """
+agent source:
+    output:
+        n: int
+    n = 20 + 1
+
+agent double:
+    input:
+        n: int
+    output:
+        m: int
+    m = n * 2
+
+connect:
+    c: int
+        source.output.n -> double.input.n
+"""
+
+def test_memo_counts_hits_and_misses(load_pllm, tmp_path):
+    namespace = load_pllm(PROGRAM)
+    counts = []
+    for _ in range(2):
+        memo = MemoStore(str(tmp_path / "memo.db"))
+        outputs = asyncio.run(run_program(namespace, memo=memo))
+        counts.append((memo.hits, memo.misses))
+        memo.close()
+        assert outputs["double"]["m"] == 42
+    assert counts == [(0, 2), (2, 0)]
@@ -0,0 +1,20 @@
+import pytest
+from compile import PLLMSyntaxError, compile_to_code
+
+def test_compile_to_code_runs_and_caches():
+    source = "x : int = 3\ny : int = x * 4\n"
+    code = compile_to_code(source, filename="<test>")
+    namespace = {}
+    exec(code, namespace)
+    assert namespace["y"] == 12
+    assert code.co_filename == "<test>"
+    assert compile_to_code(source, filename="<test>") is code
+
+def test_compile_to_code_raises_parse_errors():
+    with pytest.raises(PLLMSyntaxError) as info:
+        compile_to_code("x : int = 3\ny : int = = 4\n", filename="<bad>")
+    error = info.value
+    assert error.errors and all("message" in e and "start" in e for e in error.errors)
+    assert error.filename == "<bad>"
+    assert error.lineno == error.errors[0]["start"]["line"]
+    assert isinstance(error, SyntaxError)
@@ -0,0 +1,63 @@
+import asyncio
+import gc
+import weakref
+from pllm_runtime.executor import execute
+
+class Blob:
+    """A large intermediate result whose release can be observed."""
+
+def test_outputs_are_released_once_read():
+    refs = {}
+    seen = {}
+
+    async def source():
+        big, unused = Blob(), Blob()
+        refs.update(big=weakref.ref(big), unused=weakref.ref(unused))
+        return {"big": big, "unused": unused}
+
+    async def reader(big=None):
+        gc.collect()
+        # 没有 agent 读取的输出在产生时即被丢弃
+        seen["unused while reading"] = refs["unused"]() is not None
+        return {"size": 1 if isinstance(big, Blob) else 0}
+
+    async def sink(size=None):
+        gc.collect()
+        # big 的唯一读取者已经结束，输出随之释放
+        seen["big after reader"] = refs["big"]() is not None
+        return {"size": size}
+
+    graph = {"source": ["reader"], "reader": ["sink"], "sink": []}
+    param_mapping = {"reader": {"big": ("source", "big")}, "sink": {"size": ("reader", "size")}}
+    agents = {"source": source, "reader": reader, "sink": sink}
+    outputs = asyncio.run(execute(graph, param_mapping, agents))
+    assert outputs == {"sink": {"size": 1}}
+    assert seen == {"unused while reading": False, "big after reader": False}
+
+def test_kept_outputs_are_not_released():
+    async def source():
+        return {"text": "kept"}
+
+    async def reader(text=None):
+        return {"n": len(text)}
+
+    graph = {"source": ["reader"], "reader": []}
+    param_mapping = {"reader": {"text": ("source", "text")}}
+    outputs = asyncio.run(execute(graph, param_mapping, {"source": source, "reader": reader},
+                                  keep=["source", "reader"]))
+    assert outputs == {"source": {"text": "kept"}, "reader": {"n": 4}}
+
+def test_output_read_by_two_agents_is_kept_until_both_started():
+    async def source():
+        return {"text": "abc"}
+
+    async def upper(text=None):
+        return {"text": text.upper()}
+
+    async def length(text=None):
+        return {"n": len(text)}
+
+    graph = {"source": ["upper", "length"], "upper": [], "length": []}
+    param_mapping = {"upper": {"text": ("source", "text")}, "length": {"text": ("source", "text")}}
+    outputs = asyncio.run(execute(graph, param_mapping, {"source": source, "upper": upper, "length": length}))
+    assert outputs == {"upper": {"text": "ABC"}, "length": {"n": 3}}
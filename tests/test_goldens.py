@@ -0,0 +1,26 @@
+import os
+import pytest
+from compile import compile_source
+
+TESTS = os.path.dirname(os.path.abspath(__file__))
+RESULTS = os.path.join(TESTS, "tests_results")
+# 以 --outputs 编译的 golden：{golden 名: (源程序, 请求的输出)}
+OUTPUT_GOLDENS = {"dead_agents_outputs": ("dead_agents", ["summarizer"])}
+
+def read_source(name):
+    with open(os.path.join(TESTS, name + ".pllm"), encoding="utf-8") as f:
+        return f.read()
+
+def goldens():
+    found = {name[:-len(".pllm")]: (name[:-len(".pllm")], None) for name in os.listdir(TESTS) if name.endswith(".pllm")}
+    found.update(OUTPUT_GOLDENS)
+    return sorted((golden, options) for golden, options in found.items()
+                  if os.path.exists(os.path.join(RESULTS, golden + ".py")))
+
+@pytest.mark.parametrize("golden, options", goldens(), ids=[golden for golden, _ in goldens()])
+def test_golden(golden, options):
+    source, outputs = options
+    code, parse_errors, _, _ = compile_source(read_source(source), verbose=False, outputs=outputs)
+    assert not parse_errors
+    with open(os.path.join(RESULTS, golden + ".py"), encoding="utf-8") as f:
+        assert code == f.read()
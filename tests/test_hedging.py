@@ -0,0 +1,73 @@
+import asyncio
+import time
+import pytest
+from pllm_runtime import llm
+from pllm_runtime.hedging import HedgePolicy, LatencyTracker, hedged
+from pllm_runtime.mock_llm import MockLLM
+
+async def answer(value, delay, fail=False):
+    await asyncio.sleep(delay)
+    if fail:
+        raise RuntimeError(value)
+    return value
+
+def run_hedged(policy, primary, hedge, is_valid=lambda result: True):
+    return asyncio.run(hedged(policy, LatencyTracker(), "m", primary, hedge, is_valid))
+
+def test_slow_primary_is_hedged_and_cancelled():
+    policy = HedgePolicy(initial_delay=0.02)
+    cancelled = []
+
+    async def primary():
+        try:
+            return await answer("primary", 5)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    start = time.perf_counter()
+    assert run_hedged(policy, primary, lambda: answer("hedge", 0)) == "hedge"
+    assert time.perf_counter() - start < 1
+    assert (policy.hedged, policy.hedge_wins, cancelled) == (1, 1, [True])
+
+def test_fast_primary_is_not_hedged():
+    policy = HedgePolicy(initial_delay=1)
+    assert run_hedged(policy, lambda: answer("primary", 0), lambda: answer("hedge", 0)) == "primary"
+    assert policy.hedged == 0
+
+def test_failed_or_invalid_primary_is_hedged_at_once():
+    policy = HedgePolicy(initial_delay=5)
+    start = time.perf_counter()
+    assert run_hedged(policy, lambda: answer("primary", 0, fail=True), lambda: answer("hedge", 0)) == "hedge"
+    assert run_hedged(policy, lambda: answer("", 0), lambda: answer("hedge", 0), bool) == "hedge"
+    assert time.perf_counter() - start < 1
+    with pytest.raises(RuntimeError, match="hedge"):
+        run_hedged(policy, lambda: answer("primary", 0, fail=True), lambda: answer("hedge", 0, fail=True))
+
+def test_delay_follows_the_latency_percentile():
+    tracker = LatencyTracker(window=100)
+    policy = HedgePolicy(percentile=95, min_samples=10, initial_delay=2.0, min_delay=0.01)
+    assert policy.delay(tracker, "m") == 2.0
+    for i in range(1, 201):
+        tracker.record("m", i / 1000)
+    # 只保留最近的 window 个样本：101 ~ 200 ms
+    assert tracker.count("m") == 100
+    assert tracker.percentile("m", 95) == pytest.approx(0.195)
+    assert policy.delay(tracker, "m") == pytest.approx(0.195)
+
+def test_chat_hedges_to_another_endpoint(mock_endpoints):
+    mocks = mock_endpoints({None: MockLLM(latency="fixed:5000"), "hedge": MockLLM()})
+    policy = HedgePolicy(initial_delay=0.02, base_url="hedge", api_key="k")
+    llm.set_hedging(policy)
+
+    async def main():
+        try:
+            return await llm.chat("gpt-4o", "Answer: <completion0></completion0>", 1)
+        finally:
+            await llm.close_clients()
+
+    start = time.perf_counter()
+    [content] = asyncio.run(main())
+    assert content.startswith("mock gpt-4o")
+    assert time.perf_counter() - start < 1
+    assert (mocks[None].requests, mocks["hedge"].requests, policy.hedge_wins) == (1, 1, 1)
@@ -0,0 +1,34 @@
+import asyncio
+import pytest
+from compile import compile_source
+from pllm_runtime.executor import execute
+from pllm_runtime.run import run_program
+from test_goldens import read_source
+
+def test_sinks_without_outputs_or_side_effects_are_pruned(load_pllm):
+    namespace = load_pllm(read_source("dead_agents"))
+    assert sorted(namespace["graph"]) == ["logger", "reader", "summarizer", "translator"]
+    assert "graph_outputs" not in namespace
+
+def test_outputs_prune_agents_they_do_not_depend_on(load_pllm, mock_llm, capsys):
+    mock = mock_llm()
+    namespace = load_pllm(read_source("dead_agents"), outputs=["summarizer"])
+    assert sorted(namespace["graph"]) == ["logger", "reader", "summarizer"]
+    outputs = asyncio.run(run_program(namespace))
+    assert list(outputs) == ["summarizer"] and outputs["summarizer"]["summary"]
+    # translator 不再运行；有副作用的 logger 仍然运行
+    assert mock.requests == 1
+    assert "Dead-agent elimination" in capsys.readouterr().out
+
+def test_targets_run_only_the_needed_subgraph(load_pllm, mock_llm, capsys):
+    mock = mock_llm()
+    namespace = load_pllm(read_source("dead_agents"))
+    outputs = asyncio.run(execute(namespace["graph"], namespace["param_mapping"], namespace, targets=["translator"]))
+    assert list(outputs) == ["translator"]
+    assert mock.requests == 1
+    assert capsys.readouterr().out == ""
+
+@pytest.mark.parametrize("output", ["nobody", "summarizer.nothing"])
+def test_unknown_outputs_are_rejected(output):
+    with pytest.raises(ValueError):
+        compile_source(read_source("dead_agents"), verbose=False, outputs=[output])
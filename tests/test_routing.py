@@ -0,0 +1,65 @@
+import asyncio
+import pytest
+from pllm_runtime import llm
+from pllm_runtime.mock_llm import MockLLM
+from pllm_runtime.routing import Endpoint, NoEndpointError, Router
+
+PROMPT = "Answer: <completion0></completion0>"
+
+def complete_all(count, model="gpt-4o"):
+    async def main():
+        results = []
+        for _ in range(count):
+            results.append(await llm.complete(model, PROMPT))
+        await llm.close_clients()
+        return results
+    return asyncio.run(main())
+
+def test_failed_requests_fail_over_to_another_endpoint(mock_endpoints):
+    mocks = mock_endpoints({"bad": MockLLM(error_rate=1.0), "good": MockLLM()})
+    bad, good = Endpoint("bad", "k"), Endpoint("good", "k")
+    llm.set_router(Router({"*": [bad, good]}))
+    assert all("<completion0>" in content for content in complete_all(1))
+    assert (bad.errors, good.requests, mocks["good"].requests) == (1, 1, 1)
+
+def test_circuit_opens_after_consecutive_failures_and_closes_after_a_probe(mock_endpoints):
+    mocks = mock_endpoints({"bad": MockLLM(error_rate=1.0), "good": MockLLM()})
+    bad, good = Endpoint("bad", "k"), Endpoint("good", "k")
+    router = Router({"*": [bad, good]}, failure_threshold=2, cooldown=0.05)
+    llm.set_router(router)
+    complete_all(4)
+    # 连续失败两次后熔断，其余请求只发往 good
+    assert (bad.requests, good.requests) == (2, 4)
+    assert router.stats()["bad"]["circuit"] == "open"
+    # 冷却结束后的第一个请求作为探测，成功则关闭熔断
+    mocks["bad"].error_rate = 0.0
+    asyncio.run(asyncio.sleep(0.06))
+    complete_all(1)
+    assert bad.requests == 3 and bad.failures == 0 and bad.open_until == 0.0
+    assert router.stats()["bad"]["circuit"] == "closed"
+
+def test_rate_limited_endpoint_is_skipped_without_opening_the_circuit(mock_endpoints):
+    mock_endpoints({"busy": MockLLM(rate_limit=0.001), "good": MockLLM()})
+    busy, good = Endpoint("busy", "k"), Endpoint("good", "k")
+    router = Router({"*": [busy, good]}, failure_threshold=1, busy_delay=60)
+    llm.set_router(router)
+    complete_all(3)
+    # 令牌桶初始为空：第一个请求被限流，此后 busy 在 busy_delay 内不再被选择
+    assert (busy.requests, busy.errors, busy.failures, good.requests) == (1, 1, 0, 3)
+    assert router.stats()["busy"]["circuit"] == "closed"
+
+def test_pools_are_selected_by_model_pattern():
+    fast, slow, fallback = Endpoint("fast", "k"), Endpoint("slow", "k"), Endpoint("any", "k")
+    router = Router({"gpt-4o": [fast], "gpt-*": [slow], "*": [fallback]})
+    assert router.pool("gpt-4o") == [fast]
+    assert router.pool("gpt-3.5-turbo") == [slow]
+    assert router.pool("claude") == [fallback]
+    with pytest.raises(NoEndpointError):
+        Router({"gpt-*": [slow]}).pool("claude")
+
+def test_least_outstanding_and_latency_strategies():
+    a, b = Endpoint("a", "k"), Endpoint("b", "k")
+    a.outstanding, b.outstanding = 2, 1
+    a.latency, b.latency = 0.01, 1.0
+    assert Router({"*": [a, b]}).choose("m") is b
+    assert Router({"*": [a, b]}, strategy="latency").choose("m") is a
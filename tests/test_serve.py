@@ -0,0 +1,95 @@
+import asyncio
+import json
+import urllib.request
+import pytest
+from pllm_runtime.serve import GraphService, ServiceBusy
+
+PROGRAM = """
+agent greet:
+    model: "gpt-4o"
+    input:
+        name: str
+    output:
+        reply: str
+    chat: \"\"\"
+    Greet {name}: ${reply}
+    \"\"\"
+
+agent shout:
+    input:
+        reply: str
+    output:
+        text: str
+    text = reply + "!"
+
+connect:
+    c: str
+        greet.output.reply -> shout.input.reply
+"""
+
+def test_max_queue_zero_runs_while_a_slot_is_free(load_pllm, mock_llm):
+    mock_llm()
+
+    async def main():
+        service = await GraphService(load_pllm(PROGRAM), max_concurrency=2, max_queue=0).start(port=0)
+        try:
+            outputs = await asyncio.gather(*(service.run({"name": name}) for name in ("a", "b")))
+        finally:
+            await service.drain()
+        return service, outputs
+
+    service, outputs = asyncio.run(main())
+    assert [output["shout"]["text"].endswith("!") for output in outputs] == [True, True]
+    assert (service.completed, service.rejected) == (2, 0)
+
+def test_requests_beyond_the_queue_are_rejected(load_pllm, mock_llm):
+    mock_llm(latency="fixed:200")
+
+    async def main():
+        service = await GraphService(load_pllm(PROGRAM), max_concurrency=1, max_queue=1).start(port=0)
+        try:
+            return service, await asyncio.gather(*(service.run({"name": str(i)}) for i in range(3)),
+                                                 return_exceptions=True)
+        finally:
+            await service.drain()
+
+    service, results = asyncio.run(main())
+    # 第一个请求占用槽位，第二个排队，第三个被拒绝
+    assert [isinstance(result, ServiceBusy) for result in results] == [False, False, True]
+    assert (service.completed, service.rejected, service.queued, service.in_flight) == (2, 1, 0, 0)
+
+def test_http_run_health_and_metrics(load_pllm, mock_llm):
+    mock_llm()
+
+    def request(url, body=None):
+        data = None if body is None else json.dumps(body).encode()
+        with urllib.request.urlopen(urllib.request.Request(url, data=data)) as response:
+            return response.status, json.loads(response.read())
+
+    async def main():
+        service = await GraphService(load_pllm(PROGRAM)).start(port=0)
+        base = "http://%s:%s" % service._server.sockets[0].getsockname()[:2]
+        try:
+            health = await asyncio.to_thread(request, base + "/health")
+            run = await asyncio.to_thread(request, base + "/run", {"greet.name": "x"})
+            metrics = await asyncio.to_thread(request, base + "/metrics")
+        finally:
+            await service.drain()
+        return health, run, metrics
+
+    health, run, metrics = asyncio.run(main())
+    assert health == (200, {"status": "ok"})
+    assert run[0] == 200 and run[1]["outputs"]["shout"]["text"].endswith("!")
+    assert metrics[1]["completed"] == 1 and metrics[1]["in_flight"] == 0
+
+def test_draining_service_rejects_requests(load_pllm, mock_llm):
+    mock_llm()
+
+    async def main():
+        service = await GraphService(load_pllm(PROGRAM)).start(port=0)
+        await service.drain()
+        with pytest.raises(ServiceBusy):
+            await service.run({"name": "x"})
+        return service
+
+    assert asyncio.run(main()).rejected == 1
@@ -0,0 +1,51 @@
+from compile import compile_source
+
+CONSUMER = """
+agent counter:
+    input:
+        lines: list[str]
+    output:
+        count: int
+    count = 0
+    for line in lines:
+        count = count + 1
+
+connect:
+    c: stream[str]
+        producer.output.lines -> counter.input.lines
+"""
+
+def stream_errors(producer):
+    _, parse_errors, type_errors, _ = compile_source(producer + CONSUMER, verbose=False)
+    assert not parse_errors
+    return [error["message"] for error in type_errors if "Streamed output" in error["message"]]
+
+def test_appending_producer_is_accepted():
+    assert stream_errors("""
+agent producer:
+    output:
+        lines: list[str]
+    lines = ["a"]
+    for word in ["b", "c"]:
+        lines = lines + [word]
+""") == []
+
+def test_reassigned_stream_is_reported():
+    assert stream_errors("""
+agent producer:
+    output:
+        lines: list[str]
+    lines = ["a", "b"]
+    lines = ["c"]
+""") == ["Streamed output 'lines' can only be initialized once and then appended to ('lines = lines + [...]')."]
+
+def test_assignment_in_branch_is_reported():
+    assert len(stream_errors("""
+agent producer:
+    output:
+        lines: list[str]
+    if 1 > 0:
+        lines = ["y"]
+    else:
+        lines = ["z"]
+""")) == 1
@@ -0,0 +1,39 @@
+import asyncio
+import pytest
+from pllm_runtime.run import run_program
+from pllm_runtime.timeouts import AgentTimeoutError, TimeoutPolicy
+
+PROGRAM = """
+agent slow:
+    model: "gpt-4o"
+    output:
+        answer: str
+    chat: \"\"\"
+    Answer: ${answer}
+    \"\"\"
+
+agent echo:
+    input:
+        answer: str
+    output:
+        text: str
+    text = answer + "!"
+
+connect:
+    c: str
+        slow.output.answer -> echo.input.answer
+"""
+
+def test_fallback_counts_timeouts(load_pllm, mock_llm):
+    mock_llm(latency="fixed:1000")
+    timeouts = TimeoutPolicy(timeout=0.05, on_timeout="fallback")
+    outputs = asyncio.run(run_program(load_pllm(PROGRAM), timeouts=timeouts))
+    assert outputs["echo"]["text"] == "!"
+    assert timeouts.timed_out == {"slow": 1}
+
+def test_retries_are_counted_per_agent(load_pllm, mock_llm):
+    mock_llm(latency="fixed:1000")
+    timeouts = TimeoutPolicy(timeout=0.05, on_timeout="retry", retries=2)
+    with pytest.raises(AgentTimeoutError):
+        asyncio.run(run_program(load_pllm(PROGRAM), timeouts=timeouts))
+    assert timeouts.timed_out == {"slow": 3}
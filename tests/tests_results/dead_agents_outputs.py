@@ -0,0 +1,35 @@
+# import (pllm_runtime 1.0.0)
+import asyncio
+from pllm_runtime import chat, console, execute
+
+async def reader():
+    text = "Dead-agent elimination keeps only the agents the outputs depend on."
+    return {'text': text}
+async def summarizer(text=None):
+    model_name="gpt-3.5-turbo"
+    prompt="""
+    Summarize the text in one sentence.
+    text: {text}
+    summary: <completion0></completion0>
+    """.format(text=text)
+    [summary] = await chat(model_name, prompt, 1)
+    return {'summary': summary}
+async def translator(text=None):
+    model_name="gpt-3.5-turbo"
+    prompt="""
+    Translate the text into French.
+    text: {text}
+    translation: <completion0></completion0>
+    """.format(text=text)
+    [translation] = await chat(model_name, prompt, 1)
+    return {'translation': translation}
+async def logger(text=None):
+    _ = console(text)
+async def audit(text=None):
+    checked = text
+graph = {'reader': ['summarizer', 'logger'], 'summarizer': [], 'logger': []}
+param_mapping={'summarizer': {'text': ('reader', 'text')}, 'logger': {'text': ('reader', 'text')}}
+agent_fingerprints = {'reader': '85f350c64cbd6206', 'summarizer': 'f4d1836f99192f80'}
+graph_outputs = ['summarizer']
+if __name__ == "__main__":
+    asyncio.run(execute(graph, param_mapping, globals(), keep=graph_outputs))
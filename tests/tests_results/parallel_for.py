@@ -0,0 +1,30 @@
+# import (pllm_runtime 1.0.0)
+import asyncio
+from pllm_runtime import chat, console, execute, parallel_map, read_lines, str_to_int
+
+async def splitter():
+    topics = read_lines("topics.txt")
+    return {'topics': topics}
+async def reviewer(topics=None):
+    model_name="gpt-3.5-turbo"
+    approved = 0
+    async def _parallel_1(topic):
+        approved = []
+        prompt="""
+        Is the following topic suitable for a short essay? Answer 1 for yes and 0 for no.
+        topic: {topic}
+        answer: <completion0></completion0>
+        """.format(topic=topic)
+        [verdict] = await chat(model_name, prompt, 1)
+        approved.append(str_to_int(verdict))
+        return [approved]
+    for _results in await parallel_map(_parallel_1, topics, 4):
+        for _part in _results[0]:
+            approved = (approved + _part)
+    _ = console(approved)
+    return {'approved': approved}
+graph = {'splitter': ['reviewer'], 'reviewer': []}
+param_mapping={'reviewer': {'topics': ('splitter', 'topics')}}
+agent_fingerprints = {}
+if __name__ == "__main__":
+    asyncio.run(execute(graph, param_mapping, globals()))
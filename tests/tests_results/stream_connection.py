@@ -0,0 +1,20 @@
+# import (pllm_runtime 1.0.0)
+import asyncio
+from pllm_runtime import console, emit_stream, execute, iterate_stream, read_lines
+
+async def reader():
+    lines = read_lines("article.txt")
+    await emit_stream('lines', lines)
+    return {'lines': lines}
+async def counter(lines=None):
+    count = 0
+    async for line in iterate_stream(lines):
+        _ = console(line)
+        count = (count + 1)
+    return {'count': count}
+graph = {'reader': ['counter'], 'counter': []}
+param_mapping={'counter': {'lines': ('reader', 'lines')}}
+agent_fingerprints = {}
+stream_mapping = {'counter': ['lines']}
+if __name__ == "__main__":
+    asyncio.run(execute(graph, param_mapping, globals()))
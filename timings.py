@@ -0,0 +1,136 @@
+"""
+File name: timings.py
+Description: Per-phase instrumentation of the compiler: wall time, CPU time and (optionally) peak
+memory of each phase, counters such as tokens, AST nodes, types created and subtype checks, and an
+optional cProfile dump per phase. Reported by `compile.py --timings` as text or JSON.
+"""
+import json
+import os
+import re
+import time
+from contextlib import contextmanager, nullcontext
+
+class Timings:
+    """
+    Collects the measurements of one compilation.
+    Args:
+        memory (bool): Trace allocations with tracemalloc and record the peak memory of each phase.
+            Tracing slows the compiler down, so it is off by default.
+        profile_dir (str): Dump a cProfile of each phase to <profile_dir>/<index>-<phase>.prof.
+        counters (bool): Count tokens, AST nodes, types created and subtype checks. Counting types
+            adds a little overhead to the type checking phase.
+    """
+    def __init__(self, memory: bool = False, profile_dir: str = None, counters: bool = True):
+        self.memory = memory
+        self.profile_dir = profile_dir
+        self.counters = counters
+        self.phases = []
+        self.counts = {}
+
+    def add(self, name: str, seconds: float, cpu_seconds: float = None, peak_bytes: int = None) -> None:
+        self.phases.append({"name": name, "seconds": seconds, "cpu_seconds": cpu_seconds, "peak_bytes": peak_bytes})
+
+    def count(self, name: str, value: int) -> None:
+        self.counts[name] = self.counts.get(name, 0) + value
+
+    @contextmanager
+    def phase(self, name: str):
+        """Measures the enclosed block as one phase."""
+        if self.memory:
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            base_bytes = tracemalloc.get_traced_memory()[0]
+        profiler = None
+        if self.profile_dir:
+            import cProfile
+            profiler = cProfile.Profile()
+        start, cpu_start = time.perf_counter(), time.process_time()
+        if profiler:
+            profiler.enable()
+        try:
+            yield
+        finally:
+            if profiler:
+                profiler.disable()
+            seconds, cpu_seconds = time.perf_counter() - start, time.process_time() - cpu_start
+            peak_bytes = None
+            if self.memory:
+                peak_bytes = tracemalloc.get_traced_memory()[1] - base_bytes
+            if profiler:
+                os.makedirs(self.profile_dir, exist_ok=True)
+                slug = re.sub(r"\W+", "_", name).strip("_")
+                profiler.dump_stats(os.path.join(self.profile_dir, f"{len(self.phases):02d}-{slug}.prof"))
+            self.add(name, seconds, cpu_seconds, peak_bytes)
+
+    def as_dict(self) -> dict:
+        return {
+            "phases": self.phases,
+            "total_seconds": sum(phase["seconds"] for phase in self.phases),
+            "counts": self.counts,
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.as_dict(), indent=2)
+
+    def report(self) -> str:
+        width = max([len(phase["name"]) for phase in self.phases] + [len("total")])
+        header = f"{'phase':<{width}}  {'wall':>12}  {'cpu':>12}"
+        if self.memory:
+            header += f"  {'peak memory':>12}"
+        lines = [header]
+        for phase in self.phases:
+            line = f"{phase['name']:<{width}}  {phase['seconds'] * 1000:9.2f} ms"
+            line += "  " + (f"{phase['cpu_seconds'] * 1000:9.2f} ms" if phase["cpu_seconds"] is not None else f"{'-':>12}")
+            if self.memory:
+                line += "  " + (f"{phase['peak_bytes'] / 1024:9.1f} KB" if phase["peak_bytes"] is not None else f"{'-':>12}")
+            lines.append(line)
+        total = sum(phase["seconds"] for phase in self.phases)
+        lines.append(f"{'total':<{width}}  {total * 1000:9.2f} ms")
+        for name, value in self.counts.items():
+            lines.append(f"{name}: {value}")
+        return "\n".join(lines)
+
+def no_phase(name: str):
+    """Stand-in for Timings.phase when no timings are collected."""
+    return nullcontext()
+
+@contextmanager
+def count_type_activity(timings: Timings):
+    """
+    Counts the type objects created and the subtype checks performed within the block, by wrapping
+    the type classes for its duration only, so that uninstrumented compilations pay nothing.
+    """
+    from type_system.type_pre import Type
+
+    counts = {"types created": 0, "subtype checks": 0}
+
+    def counting_init(method):
+        def __init__(self, *args, **kwargs):
+            counts["types created"] += 1
+            method(self, *args, **kwargs)
+        return __init__
+
+    def counting_subtype(method):
+        def is_subtype_of(self, other):
+            counts["subtype checks"] += 1
+            return method(self, other)
+        return is_subtype_of
+
+    classes = [Type]
+    for cls in classes:
+        classes.extend(cls.__subclasses__())
+    wrapped = [(cls, name, cls.__dict__[name], wrap)
+               for cls in classes
+               for name, wrap in (("__init__", counting_init), ("is_subtype_of", counting_subtype))
+               if name in cls.__dict__]
+    for cls, name, method, wrap in wrapped:
+        setattr(cls, name, wrap(method))
+    try:
+        yield
+    finally:
+        for cls, name, method, _ in wrapped:
+            setattr(cls, name, method)
+        for name, value in counts.items():
+            timings.count(name, value)
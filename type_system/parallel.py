@@ -0,0 +1,94 @@
+"""
+Parallel for loops: the iterations of `parallel for x in xs limit N:` run concurrently, so the body
+must not carry state from one iteration to the next. The only variables of the enclosing agent the
+body may assign are accumulators, updated only as `v = v + e` and not read otherwise in the body;
+their updates are applied after the loop in the order of the elements. Any other assignment of an
+outer variable, mutation of an outer record or list, and break / continue of the loop itself are errors.
+"""
+import re
+from pllm_parser.pllm_ast import (AssignStmt, BinaryOp, BreakStmt, ChatBlock, ContinueStmt, FieldAccess,
+                                  ForStmt, Identifier, IfStmt, IndexAccess, ParallelForStmt)
+from pllm_parser.ast_visitor import walk
+
+# chat 模板中的输出变量 ${name}
+CHAT_OUTPUT = re.compile(r"\$\{(.*?)\}")
+
+def is_accumulation(node) -> bool:
+    """`v = v + e` where e does not read v."""
+    if not (isinstance(node, AssignStmt) and isinstance(node.target, Identifier)):
+        return False
+    value, name = node.value, node.target.name
+    return (isinstance(value, BinaryOp) and value.op == "+"
+            and isinstance(value.left, Identifier) and value.left.name == name
+            and not any(isinstance(child, Identifier) and child.name == name for child in walk(value.right)))
+
+def assigned_names(stmts) -> dict:
+    """{name: [nodes assigning it]} for the variables assigned in the statements, including nested blocks."""
+    assigned = {}
+    for stmt in stmts:
+        for node in walk(stmt):
+            if isinstance(node, AssignStmt) and isinstance(node.target, Identifier):
+                assigned.setdefault(node.target.name, []).append(node)
+            elif isinstance(node, ChatBlock):
+                for name in CHAT_OUTPUT.findall(node.template):
+                    assigned.setdefault(name, []).append(node)
+            elif isinstance(node, ForStmt) and isinstance(node.iterator, Identifier):
+                assigned.setdefault(node.iterator.name, []).append(node)
+    return assigned
+
+def accumulators(stmts) -> list:
+    """The variables assigned in the statements only as `v = v + e`, in order of first assignment."""
+    return [name for name, nodes in assigned_names(stmts).items() if all(map(is_accumulation, nodes))]
+
+def _mutated_names(stmts) -> set:
+    mutated = set()
+    for stmt in stmts:
+        for node in walk(stmt):
+            if isinstance(node, AssignStmt) and isinstance(node.target, (FieldAccess, IndexAccess)):
+                obj = node.target.obj
+                if isinstance(obj, Identifier):
+                    mutated.add(obj.name)
+    return mutated
+
+def _loop_exits(stmts) -> list:
+    """break / continue statements that would exit the parallel loop itself (not a nested loop)."""
+    exits = []
+    for stmt in stmts:
+        if isinstance(stmt, (BreakStmt, ContinueStmt)):
+            exits.append(stmt)
+        elif isinstance(stmt, IfStmt):
+            exits.extend(_loop_exits(stmt.body))
+            exits.extend(_loop_exits(stmt.else_block or []))
+    return exits
+
+def loop_carried_errors(node: ParallelForStmt, outer) -> list:
+    """
+    The loop-carried dependencies of a parallel for statement, as (message, node) pairs.
+    outer: the names defined in the enclosing agent before the loop.
+    """
+    errors = []
+    outer = set(outer) - {node.iterator.name}
+    assigned = assigned_names(node.body)
+    carried = [name for name in accumulators(node.body) if name in outer]
+    for name, nodes in assigned.items():
+        if name in outer and name not in carried:
+            errors.append((f"Parallel for assigns outer variable '{name}'; iterations run concurrently, "
+                           f"only accumulations '{name} = {name} + ...' are allowed.", nodes[0]))
+    for name in sorted(_mutated_names(node.body) & outer):
+        errors.append((f"Parallel for mutates outer variable '{name}'; iterations run concurrently.", node))
+    # 累加变量只能出现在自身的累加语句中
+    allowed = set()
+    for nodes in assigned.values():
+        for stmt in nodes:
+            if is_accumulation(stmt):
+                allowed.update((id(stmt.target), id(stmt.value.left)))
+    for stmt in node.body:
+        for child in walk(stmt):
+            if isinstance(child, Identifier) and child.name in carried and id(child) not in allowed:
+                errors.append((f"Accumulator '{child.name}' cannot be read in the body of a parallel for.", node))
+                allowed.add(id(child))
+            elif isinstance(child, ChatBlock) and any(f"{{{name}}}" in child.template for name in carried):
+                errors.append(("Accumulators cannot be read in the body of a parallel for.", child))
+    if _loop_exits(node.body):
+        errors.append(("break / continue cannot leave a parallel for.", node))
+    return list({message: (message, at) for message, at in errors}.values())
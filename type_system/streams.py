@@ -0,0 +1,110 @@
+"""
+Streamed connections: a connection of type stream[T] passes the elements of a list[T] output to the
+consumer agent one by one while the producer agent is still running, instead of the whole list
+after the producer returns. The producer must build the output by appending to it; the consumer
+may only iterate the streamed input, in a single for statement.
+"""
+from pllm_parser.pllm_ast import AssignStmt, ConnectBlock, ForStmt, Identifier, InputBlock, OutputBlock, ChatBlock
+from pllm_parser.ast_visitor import walk
+from type_system.parallel import assigned_names, is_accumulation
+
+def element_type(conn_type):
+    """'stream[T]' -> 'T'; None for the type of an ordinary connection."""
+    if isinstance(conn_type, str) and conn_type.startswith("stream[") and conn_type.endswith("]"):
+        return conn_type[len("stream["):-1]
+    return None
+
+def streamed_connections(nodes) -> tuple:
+    """
+    Returns ({producer agent: {streamed output}}, {consumer agent: {streamed input}}) for the
+    connect blocks among the given top-level nodes.
+    """
+    outputs, inputs = {}, {}
+    for node in nodes:
+        if not isinstance(node, ConnectBlock):
+            continue
+        for connection in node.connections:
+            if element_type(connection.conn_type) is None:
+                continue
+            source, target = connection.source.parts, connection.target.parts
+            outputs.setdefault(source[0].name, set()).add(source[2].name)
+            inputs.setdefault(target[0].name, set()).add(target[2].name)
+    return outputs, inputs
+
+def stream_usage_errors(agent_def, param_name: str) -> list:
+    """Uses of a streamed input in the agent body other than as the iterable of one for statement."""
+    errors = []
+    loops = 0
+    iterables = set()
+    for child in agent_def.body:
+        if isinstance(child, (InputBlock, OutputBlock)):
+            continue
+        if isinstance(child, ChatBlock) and "{" + param_name + "}" in child.template:
+            errors.append(f"Streamed input '{param_name}' cannot be used in a chat template.")
+        for node in walk(child):
+            if isinstance(node, ForStmt) and isinstance(node.iterable, Identifier) and node.iterable.name == param_name:
+                loops += 1
+                iterables.add(id(node.iterable))
+            elif isinstance(node, Identifier) and node.name == param_name and id(node) not in iterables:
+                errors.append(f"Streamed input '{param_name}' can only be iterated with a for statement.")
+    if loops > 1:
+        errors.append(f"Streamed input '{param_name}' can only be iterated once.")
+    return list(dict.fromkeys(errors))
+
+def stream_producer_errors(agent_def, output_name: str) -> list:
+    """
+    Assignments to a streamed output that do not append to it: elements already sent cannot be
+    taken back. The output may be initialized once, by a statement of the agent body itself (not
+    nested in a loop or branch) before it is appended to; every other assignment must have the
+    form `v = v + e`.
+    """
+    body = [child for child in agent_def.body if not isinstance(child, (InputBlock, OutputBlock))]
+    nodes = assigned_names(body).get(output_name, [])
+    initializer = next((node for node in nodes if not is_accumulation(node)), None)
+    if (initializer is not None and isinstance(initializer, AssignStmt)
+            and any(child is initializer for child in body) and nodes[0] is initializer):
+        nodes = [node for node in nodes if node is not initializer]
+    if all(map(is_accumulation, nodes)):
+        return []
+    return [f"Streamed output '{output_name}' can only be initialized once and then appended to "
+            f"('{output_name} = {output_name} + [...]')."]
+
+def stream_deadlocks(connections) -> list:
+    """
+    Streamed connections whose consumer cannot start before the producer completes: the producer
+    would block on the full queue of the connection and the run would never finish.
+    """
+    streamed, completed = {}, {}
+    for connection in connections:
+        source, target = connection.source.parts[0].name, connection.target.parts[0].name
+        deps = streamed if element_type(connection.conn_type) is not None else completed
+        deps.setdefault(target, set()).add(source)
+    for target in streamed:
+        streamed[target] -= completed.get(target, set())
+
+    start_memo, done_memo = {}, {}
+    def start_requires(agent):
+        # 开始运行前必须已完成的 agent
+        if agent not in start_memo:
+            start_memo[agent] = set()
+            required = set()
+            for source in completed.get(agent, ()):
+                required |= done_requires(source)
+            for source in streamed.get(agent, ()):
+                required |= start_requires(source)
+            start_memo[agent] = required
+        return start_memo[agent]
+    def done_requires(agent):
+        # 完成前必须已完成的 agent（包括自身）：流式输入在上游完成时才结束
+        if agent not in done_memo:
+            done_memo[agent] = {agent}
+            required = {agent} | start_requires(agent)
+            for source in streamed.get(agent, ()):
+                required |= done_requires(source)
+            done_memo[agent] = required
+        return done_memo[agent]
+
+    return [connection for connection in connections
+            if element_type(connection.conn_type) is not None
+            and (connection.source.parts[0].name in completed.get(connection.target.parts[0].name, ())
+                 or connection.source.parts[0].name in start_requires(connection.target.parts[0].name))]
@@ -3,8 +3,11 @@ import json
 import os 
 from typing import Optional
 from pllm_parser.pllm_ast import *
+from pllm_parser.ast_visitor import ASTVisitor
 from type_system.type_env import TypeEnvironment
 from type_system.type_pre import *
+from type_system.streams import element_type, stream_usage_errors, stream_producer_errors, stream_deadlocks
+from type_system.parallel import CHAT_OUTPUT, loop_carried_errors
 
 class TypeErrorHandler:
     def __init__(self):
@@ -18,7 +21,7 @@ class TypeErrorHandler:
         """
         if node:
             self.errors.append({
-                **node.position,
+                **position_to_dict(node.position),
                 "message": message or "Type Error",
             })
 
@@ -27,10 +30,14 @@ class TypeErrorHandler:
             for err in self.errors:
                 print(f"{err['start']['line']}:{err['start']['column']} ~ {err['end']['line']}:{err['end']['column']} : {err['message']}")
 
-class TypeChecker:
+class TypeChecker(ASTVisitor):
     def __init__(self):
+        super().__init__()
         self.type_env = TypeEnvironment()
         self.agent_io = TypeEnvironment()
+        self.agent_defs = {}
+        # 当前 agent 体的作用域层级，None 表示不在 agent 中
+        self.agent_scope = None
         self.err_handler = TypeErrorHandler()
 
     def _addBuiltInFuncs(self, built_in_path: str) -> None:
@@ -47,16 +54,29 @@ class TypeChecker:
     def _show(self) -> None:
         self.err_handler.show()
 
-    def checkProgram(self, program_node: Program) -> None:
+    def checkProgram(self, program_node: Program, show_errors: bool = True) -> None:
         self._initTypeEnvironment()
         self.visit(program_node)
-        self._show()
+        if show_errors:
+            self._show()
+
+    def beginSession(self) -> None:
+        """
+        为增量检查（如 REPL 会话）初始化类型环境，并进入一个常驻的程序作用域。
+        之后每段输入用 checkCell 检查，前面定义的变量、函数与 agent 的类型保持可见。
+        """
+        self._initTypeEnvironment()
+        self.type_env.enterScope()
+
+    def checkCell(self, program_node: Program, show_errors: bool = True) -> list:
+        """在常驻的程序作用域中检查一段程序，返回这一段的类型错误"""
+        self.err_handler.errors = []
+        for child in program_node.body:
+            self.visit(child)
+        if show_errors:
+            self._show()
+        return self.err_handler.errors
 
-    def visit(self, ast_node: ASTNode) -> Optional[Type]:
-        method_name: str = f"visit{type(ast_node).__name__}"
-        visitor = getattr(self, method_name, self._defaultVisitor)
-        return visitor(ast_node)
-    
     def _defaultVisitor(self, node: ASTNode) -> None:
         return
 
@@ -101,7 +121,9 @@ class TypeChecker:
     # AgentDef
     # TODO: Assign a type to Agent, current type system is not complete
     def visitAgentDef(self, node: AgentDef) -> None:
+        self.agent_defs[node.name.name] = node
         with self.type_env.scoped():
+            self.agent_scope = self.type_env.depth()
             for child in node.body:
                 self.visit(child)
                 if isinstance(child, InputBlock):
@@ -110,6 +132,7 @@ class TypeChecker:
                 if isinstance(child, OutputBlock):
                     for var in child.variables:
                         self.agent_io.define(f"{node.name.name}.output.{var.name.name}", self.type_env.lookup(var.name.name));
+        self.agent_scope = None
 
     # InputBlock
     def visitInputBlock(self, node: InputBlock) -> None:
@@ -127,12 +150,21 @@ class TypeChecker:
     
     # ChatBlock
     def visitChatBlock(self, node: ChatBlock) -> None:
+        # chat 的输出变量：类型未知，只记录其已定义
+        for name in CHAT_OUTPUT.findall(node.template):
+            if name not in self.type_env.names(1):
+                self.type_env.define(name, Any)
         return
     
     # ConnectBlock
     def visitConnectBlock(self, node: ConnectBlock) -> None:
         for child in node.connections:
             self.visit(child)
+        for connection in stream_deadlocks(node.connections):
+            self.err_handler.report(
+                f"Streamed connection '{connection.name.name}' deadlocks: its consumer only starts after its producer completes.",
+                node=connection
+            )
 
     # Connection
     def visitConnection(self, node: Connection) -> None:
@@ -143,6 +175,20 @@ class TypeChecker:
         if not source_type.is_subtype_of(target_type):
             self.err_handler.report(node=node)
             return
+        stream_element = element_type(node.conn_type)
+        if stream_element is not None:
+            # stream[T] 连接逐个传递 list[T] 输出的元素
+            stream_type = ListType(string_to_type_with_alias(stream_element, self.type_env))
+            if not source_type.is_subtype_of(stream_type) or not stream_type.is_subtype_of(target_type):
+                self.err_handler.report(f"Streamed connection '{node.name.name}' expects list[{stream_element}] outputs and inputs.", node=node)
+            source_def = self.agent_defs.get(node.source.parts[0].name)
+            if source_def is not None:
+                for message in stream_producer_errors(source_def, node.source.parts[2].name):
+                    self.err_handler.report(message, node=node)
+            target_def = self.agent_defs.get(node.target.parts[0].name)
+            if target_def is not None:
+                for message in stream_usage_errors(target_def, node.target.parts[2].name):
+                    self.err_handler.report(message, node=node)
     
     # AgentRef
     def visitAgentRef(self, node: AgentRef) -> None:
@@ -267,9 +313,10 @@ class TypeChecker:
         with self.type_env.scoped():
             for stmt in node.body:
                 self.visit(stmt)
-        with self.type_env.scoped():
-            for stmt in node.else_block:        
-                self.visit(stmt)
+        if node.else_block:
+            with self.type_env.scoped():
+                for stmt in node.else_block:
+                    self.visit(stmt)
         return
     
     # WhileStmt
@@ -299,6 +346,17 @@ class TypeChecker:
             for stmt in node.body:
                 self.visit(stmt)
 
+    # ParallelForStmt
+    def visitParallelForStmt(self, node: ParallelForStmt) -> None:
+        if self.agent_scope is None:
+            self.err_handler.report("Parallel for can only be used in the body of an agent.", node=node)
+        if node.limit != "" and not self.visit(node.limit).is_subtype_of(Int):
+            self.err_handler.report("Parallel for limit must be an int.", node=node)
+        if self.agent_scope is not None:
+            for message, at in loop_carried_errors(node, self.type_env.names(self.agent_scope)):
+                self.err_handler.report(message, node=at)
+        self.visitForStmt(node)
+
     # BreakStmt
     def visitBreakStmt(self, node: BreakStmt) -> None:
         return
@@ -21,6 +21,13 @@ class TypeEnvironment:
             if name in scope:
                 return scope[name]
         return Any
+
+    def depth(self) -> int:
+        return len(self._scopes)
+
+    def names(self, depth: int) -> set:
+        """第 depth 层（从 1 开始）及更内层作用域中定义的标识符"""
+        return {name for scope in self._scopes[depth - 1:] for name in scope}
     
     def set_alias(self, name: str, type_: Type, level: int = 1) -> None:
         if not self._aliases: